@@ -0,0 +1,91 @@
+import getpass
+import os
+import sqlite3
+import time
+
+# Claim index: every train invoice number, Didi invoice number and Didi trip
+# fingerprint ever extracted, with the claim (workspace directory), employee and
+# source file it was first claimed under. Stored in SQLite keyed by (kind, key),
+# so checking a ticket is one primary-key lookup however many months and
+# employees share the file. Point REIMBURSEMENT_CLAIM_INDEX at a shared location
+# to catch tickets claimed by other employees; REIMBURSEMENT_EMPLOYEE overrides
+# the login name recorded with each claim.
+
+INDEX_FILE = os.environ.get('REIMBURSEMENT_CLAIM_INDEX', '.claim_index.sqlite')
+TRAIN_INVOICE = 'train_invoice'
+DIDI_INVOICE = 'didi_invoice'
+DIDI_TRIP = 'didi_trip'
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS claims (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    claim TEXT NOT NULL,
+    employee TEXT NOT NULL,
+    source TEXT NOT NULL,
+    claimed_at TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID'''
+
+def trip_fingerprint(time_str, amount, start, end):
+    # ('11-09 08:25', '23.5', start, end) -> '11-09 08:25|23.50|start|end'
+    try: amount = f"{float(str(amount).replace('=', '').replace('¥', '').replace(',', '').strip()):.2f}"
+    except ValueError: amount = str(amount).strip()
+    return '|'.join([str(time_str).strip(), amount, str(start).strip(), str(end).strip()])
+
+def describe(previous):
+    # (claim, employee, source, claimed_at) -> text for the output column
+    claim, employee, source, claimed_at = previous
+    return f"{claimed_at[:10]} {employee} 已报销 ({source}, {claim})"
+
+class ClaimIndex:
+    def __init__(self, path=INDEX_FILE, claim=None, employee=None):
+        self.claim = claim or os.path.abspath(os.getcwd())
+        self.employee = employee or os.environ.get('REIMBURSEMENT_EMPLOYEE') or getpass.getuser()
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)  # transactions are explicit
+        self.db.execute(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def register(self, kind, items):
+        # items: [(key, source file)]. Records keys not seen before and returns,
+        # item by item, None or the (claim, employee, source, claimed_at) the
+        # key was first claimed under if that was another workspace or another
+        # source file. Re-running a workspace over the same files flags nothing.
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        batch, flags, new = {}, [], []
+        # One transaction for the whole batch. BEGIN IMMEDIATE takes the write
+        # lock before the lookups, so concurrent runs registering the same key
+        # are serialized and every one but the first sees the earlier claim.
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            for key, source in items:
+                previous = key and (batch.get(key) or self.db.execute(
+                    'SELECT claim, employee, source, claimed_at FROM claims WHERE kind = ? AND key = ?',
+                    (kind, key)).fetchone())
+                if key and previous is None:
+                    batch[key] = (self.claim, self.employee, source, now)
+                    new.append((kind, key, self.claim, self.employee, source, now))
+                flags.append(previous if previous and (previous[0] != self.claim or previous[2] != source) else None)
+            self.db.executemany('INSERT OR IGNORE INTO claims VALUES (?, ?, ?, ?, ?, ?)', new)
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+        return flags
+
+def flag_claims(kind, items, index_file=INDEX_FILE):
+    # register() against the index file -> one duplicate_claim text ('' if
+    # none) per item. An unusable index only warns.
+    try:
+        with ClaimIndex(index_file) as index:
+            return [describe(previous) if previous else '' for previous in index.register(kind, items)]
+    except sqlite3.Error as e:
+        print(f"Warning: claim index {index_file} unavailable: {e}")
+        return [''] * len(items)
@@ -4,100 +4,113 @@ import sys
 import os
 import csv
 from pathlib import Path
+from buyer_registry import BUYER, REGISTRY_FILE, SELLER, assign_parties, load_registry, lookup
+from claim_index import DIDI_INVOICE, INDEX_FILE, flag_claims
+from ledger import LEDGER_FILE, invoice_row, record
 
-def extract_invoice_info(pdf_path):
+# 购买方登记表：工作目录下有 buyer_registry.json 时优先使用，否则用脚本旁边的
+REGISTRY_PATH = REGISTRY_FILE if os.path.exists(REGISTRY_FILE) else os.path.join(os.path.dirname(os.path.abspath(__file__)), REGISTRY_FILE)
+
+# 正则在模块加载时编译一次，所有发票共用
+AMOUNT_PATTERNS = [re.compile(p) for p in (
+    r'价税合计.*?(\d+(?:\.\d+)?)¥',
+    r'价税合计.*?(\d+(?:\.\d+)?)',
+    r'小写.*?(\d+(?:\.\d+)?)',
+    r'¥\s*(\d+(?:\.\d+)?)'
+)]
+INVOICE_NUMBER_PATTERN = re.compile(r'发票号码\s*[:：]\s*(\d+)')
+DATE_PATTERN = re.compile(r'开票日期\s*[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)')
+NAME_PATTERN = re.compile(r'名称\s*[:：]\s*([^\s\n]+)')
+TAX_ID_PATTERN = re.compile(r'纳税人识别号\s*[:：]\s*([A-Z0-9]+)')
+NAME_SUFFIX_PATTERN = re.compile(r'统一社会|纳税人|识别号')
+# 识别号与名称连写的情况，如 B.pdf
+ID_NAME_PATTERN = re.compile(r'纳税人识别号\s*[:：]\s*([A-Z0-9]+)名称\s*[:：]\s*([^\s\n]+)')
+
+def extract_invoice_info(pdf_path, registry=None):
     """
     从滴滴电子发票 PDF 中提取详细信息
     
+    Args:
+        registry: 购买方登记表 (BuyerRegistry)，默认读取 REGISTRY_PATH
+    
     Returns:
-        dict: 包含文件名、金额、日期、销售方、购买方的字典
+        dict: 包含文件名、金额、日期、销售方、购买方及购买方主体的字典
     """
     info = {
         '文件名': os.path.basename(pdf_path),
+        '发票号码': '未找到',
         '开票日期': '未找到',
         '金额': 0.0,
         '销售方名称': '未找到',
         '销售方识别号': '未找到',
         '购买方名称': '未找到',
-        '购买方识别号': '未找到'
+        '购买方识别号': '未找到',
+        '购买方主体': '未找到'
     }
 
     if not os.path.exists(pdf_path):
         return info
+    if registry is None:
+        registry = load_registry(REGISTRY_PATH)
 
     try:
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
             full_text = ""
+            name_count = id_count = 0
+            # 逐页读取：电子发票的字段都在第 1 页，字段齐全即停止，
+            # 不再解析后面附带的行程单页
             for page in reader.pages:
-                full_text += page.extract_text() + "\n"
-            
-            lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-            
-            # 1. 提取金额 (价税合计)
-            amount_patterns = [
-                r'价税合计.*?(\d+(?:\.\d+)?)¥',
-                r'价税合计.*?(\d+(?:\.\d+)?)',
-                r'小写.*?(\d+(?:\.\d+)?)',
-                r'¥\s*(\d+(?:\.\d+)?)'
-            ]
-            for line in lines:
-                if '价税合计' in line:
-                    for pattern in amount_patterns:
-                        match = re.search(pattern, line)
-                        if match:
-                            info['金额'] = float(match.group(1))
-                            break
-                    if info['金额'] > 0: break
-
-            # 2. 提取日期
-            # 格式: 开票日期 :2025年12月29日
-            date_match = re.search(r'开票日期\s*[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)', full_text)
-            if date_match:
-                info['开票日期'] = date_match.group(1)
+                text = page.extract_text() or ""
+                full_text += text + "\n"
 
-            # 3. 提取购买方和销售方信息
-            # 滴滴发票的文本提取结果比较碎，需要根据上下文逻辑提取
-            
-            # 获取所有名称和识别号
-            all_names = re.findall(r'名称\s*[:：]\s*([^\s\n]+)', full_text)
-            all_ids = re.findall(r'纳税人识别号\s*[:：]\s*([A-Z0-9]+)', full_text)
-
-            # 购买方固定信息
-            BUYER_ID = "91440300MA5F1W6866"
-            BUYER_NAME_KEYWORD = "宝链"
-            
-            # 逻辑：先在所有提取到的 ID 中找购买方 ID
-            if BUYER_ID in all_ids:
-                info['购买方识别号'] = BUYER_ID
-            
-            # 在所有提取到的名称中找购买方名称
-            for name in all_names:
-                if BUYER_NAME_KEYWORD in name:
-                    info['购买方名称'] = re.split(r'统一社会|纳税人|识别号', name)[0]
-                    break
-            
-            # 销售方信息：排除掉购买方后的第一个
-            for tax_id in all_ids:
-                if tax_id != BUYER_ID:
-                    info['销售方识别号'] = tax_id
-                    break
-            
-            for name in all_names:
-                # 排除包含购买方关键字的名称
-                clean_name = re.split(r'统一社会|纳税人|识别号', name)[0]
-                if BUYER_NAME_KEYWORD not in clean_name and clean_name != '未找到':
-                    info['销售方名称'] = clean_name
+                # 1. 提取金额 (价税合计)
+                if info['金额'] == 0.0:
+                    for line in text.split('\n'):
+                        if '价税合计' in line:
+                            for pattern in AMOUNT_PATTERNS:
+                                match = pattern.search(line.strip())
+                                if match:
+                                    info['金额'] = float(match.group(1))
+                                    break
+                            if info['金额'] > 0: break
+
+                # 2. 提取发票号码和日期
+                # 格式: 开票日期 :2025年12月29日
+                if info['发票号码'] == '未找到':
+                    number_match = INVOICE_NUMBER_PATTERN.search(text)
+                    if number_match:
+                        info['发票号码'] = number_match.group(1)
+                if info['开票日期'] == '未找到':
+                    date_match = DATE_PATTERN.search(text)
+                    if date_match:
+                        info['开票日期'] = date_match.group(1)
+
+                name_count += len(NAME_PATTERN.findall(text))
+                id_count += len(TAX_ID_PATTERN.findall(text))
+                if (info['金额'] > 0 and info['发票号码'] != '未找到' and info['开票日期'] != '未找到'
+                        and name_count >= 2 and id_count >= 2):
                     break
 
+            # 3. 提取购买方和销售方信息
+            # 发票上购买方、销售方各占一栏，第 i 个名称与第 i 个识别号属于同一方。
+            # 由登记表判断哪一栏是购买方；都认不出时按发票版式，第一栏为购买方
+            all_names = [NAME_SUFFIX_PATTERN.split(name)[0] for name in NAME_PATTERN.findall(full_text)]
+            all_ids = TAX_ID_PATTERN.findall(full_text)
+            parties = assign_parties(all_names, all_ids, registry)
+            for role, party in ((BUYER, '购买方'), (SELLER, '销售方')):
+                name, tax_id, _ = parties[role]
+                info[party + '名称'] = name or '未找到'
+                info[party + '识别号'] = tax_id or '未找到'
+
             # 针对 B.pdf 这种特殊连写情况的补丁
             if info['销售方名称'] == '未找到' or info['销售方识别号'] == '未找到':
-                special = re.search(r'纳税人识别号\s*[:：]\s*([A-Z0-9]+)名称\s*[:：]\s*([^\s\n]+)', full_text)
+                special = ID_NAME_PATTERN.search(full_text)
                 if special:
                     found_id = special.group(1)
-                    found_name = re.split(r'统一社会|纳税人|识别号', special.group(2))[0]
+                    found_name = NAME_SUFFIX_PATTERN.split(special.group(2))[0]
                     
-                    if found_id == BUYER_ID or BUYER_NAME_KEYWORD in found_name:
+                    if (lookup(registry, found_name, found_id) or (None,))[0] == BUYER:
                         # 这是购买方，更新购买方信息
                         info['购买方识别号'] = found_id
                         info['购买方名称'] = found_name
@@ -106,6 +119,10 @@ def extract_invoice_info(pdf_path):
                         info['销售方识别号'] = found_id
                         info['销售方名称'] = found_name
 
+            # 购买方主体：登记表中的购买方名称，未登记时用发票上的购买方名称，用于分组汇总
+            hit = lookup(registry, info['购买方名称'].replace('未找到', ''), info['购买方识别号'].replace('未找到', ''))
+            info['购买方主体'] = hit[1] if hit and hit[0] == BUYER else info['购买方名称']
+
             return info
     except Exception as e:
         print(f"处理文件 {pdf_path} 时出错: {e}")
@@ -124,17 +141,38 @@ def main():
 
     if not target_files:
         print("未找到滴滴电子发票文件。")
+        record('didi_invoices', [], LEDGER_FILE)  # 清除上次运行记入台账的发票
         return
 
+    registry = load_registry(REGISTRY_PATH)
     all_data = []
     for file_path in target_files:
         print(f"正在处理: {os.path.basename(file_path)}...")
-        data = extract_invoice_info(str(file_path))
+        data = extract_invoice_info(str(file_path), registry)
+        if len(registry) and lookup(registry, data['购买方名称'].replace('未找到', ''), data['购买方识别号'].replace('未找到', '')) is None:
+            print(f"警告: {data['文件名']} 的购买方不在登记表中: {data['购买方名称']}")
         all_data.append(data)
 
+    # 检查发票是否在以前的报销或其他人的报销中已经出现过
+    claimed = flag_claims(DIDI_INVOICE, [(d['发票号码'] if d['发票号码'] != '未找到' else '', d['文件名']) for d in all_data],
+                          INDEX_FILE)
+    for data, duplicate_claim in zip(all_data, claimed):
+        data['重复报销'] = duplicate_claim
+        if duplicate_claim:
+            print(f"警告: {data['文件名']} 已报销过: {duplicate_claim}")
+    # 记入报销台账（'未找到' 记为空值）
+    record('didi_invoices', [invoice_row({k: v for k, v in d.items() if v != '未找到'}) for d in all_data], LEDGER_FILE)
+
+    # 按购买方主体分组，组内保持文件顺序
+    groups = {}
+    for data in all_data:
+        groups.setdefault(data['购买方主体'], []).append(data)
+    all_data = [data for group in groups.values() for data in group]
+
     # 保存为 CSV
     output_file = 'didi_invoices_extracted.csv'
-    fieldnames = ['文件名', '开票日期', '金额', '购买方名称', '购买方识别号', '销售方名称', '销售方识别号']
+    summary_file = 'didi_invoices_by_buyer.csv'
+    fieldnames = ['文件名', '发票号码', '开票日期', '金额', '购买方名称', '购买方识别号', '销售方名称', '销售方识别号', '重复报销']
     
     try:
         # 在写入 CSV 之前，对识别号进行特殊处理，防止 Excel 显示为科学计数法
@@ -142,6 +180,8 @@ def main():
         formatted_data = []
         for row in all_data:
             new_row = row.copy()
+            if new_row['发票号码'] != '未找到':
+                new_row['发票号码'] = f'="{new_row["发票号码"]}"'
             if new_row['购买方识别号'] != '未找到':
                 new_row['购买方识别号'] = f'="{new_row["购买方识别号"]}"'
             if new_row['销售方识别号'] != '未找到':
@@ -149,15 +189,23 @@ def main():
             formatted_data.append(new_row)
 
         with open(output_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
             writer.writeheader()
             for row in formatted_data:
                 writer.writerow(row)
-        print(f"\n提取完成！结果已保存至: {output_file}")
+        # 按购买方汇总：每个购买方的发票数和金额合计
+        with open(summary_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['购买方', '发票数', '金额合计'])
+            for buyer, group in groups.items():
+                writer.writerow([buyer, len(group), round(sum(d['金额'] for d in group), 2)])
+        print(f"\n提取完成！结果已保存至: {output_file}，按购买方汇总: {summary_file}")
         
         # 打印简要统计
         total = sum(d['金额'] for d in all_data)
         print(f"处理文件数: {len(all_data)}")
+        for buyer, group in groups.items():
+            print(f"  {buyer}: {len(group)} 张, {sum(d['金额'] for d in group):.2f}")
         print(f"总计金额: {total:.2f}")
         
     except Exception as e:
@@ -2,6 +2,8 @@ import os
 import csv
 import sys
 from pathlib import Path
+from claim_index import DIDI_TRIP, INDEX_FILE, flag_claims, trip_fingerprint
+from ledger import LEDGER_FILE, record, trip_row
 
 
 def check_dependencies():
@@ -466,6 +468,16 @@ def is_new_table_row(line):
     return False
 
 
+def receipt_time(time_str):
+    """把 "2025/11/9 8:25" 还原为行程单上的 "11-09 08:25"，与其他提取脚本的行程指纹一致"""
+    import re
+    m = re.match(r'\d{4}/(\d{1,2})/(\d{1,2}) (\d{1,2}):(\d{2})', time_str)
+    if not m:
+        return time_str
+    month, day, hour, minute = m.groups()
+    return f"{int(month):02d}-{int(day):02d} {int(hour):02d}:{minute}"
+
+
 def process_trip_receipts(input_dir, output_csv):
     """处理所有行程报销单文件并生成CSV"""
     input_path = Path(input_dir)
@@ -485,6 +497,7 @@ def process_trip_receipts(input_dir, output_csv):
     
     if not found_files:
         print(f"在目录 {input_dir} 中未找到匹配 '滴滴出行行程报销单*.pdf' 模式的PDF文件")
+        record('didi_trips', [], LEDGER_FILE)  # 清除上次运行记入台账的行程
         return
     
     # 遍历输入目录中的所有文件
@@ -507,12 +520,26 @@ def process_trip_receipts(input_dir, output_csv):
                 print(f"警告: 无法从文件 {file_path.name} 中提取内容")
     
     if all_data:
+        parsed = len(all_data[0]) == 9  # [文件名, 序号, 车型, 时间, 城市, 起点, 终点, 里程, 金额]
+        if parsed:
+            # 检查行程是否在以前的报销或其他人的报销中已经出现过
+            fingerprints = [trip_fingerprint(receipt_time(row[3]), row[8], row[5], row[6]) for row in all_data]
+            claimed = flag_claims(DIDI_TRIP, [(key, row[0]) for key, row in zip(fingerprints, all_data)], INDEX_FILE)
+            all_data = [row + [duplicate_claim] for row, duplicate_claim in zip(all_data, claimed)]
+            duplicates = sum(1 for flag in claimed if flag)
+            if duplicates:
+                print(f"警告: {duplicates} 条行程已报销过，见“重复报销”列")
+        # 记入报销台账，上车时间按行程单原样 (MM-DD HH:MM) 记录
+        trips = [dict(zip(['来源文件', '序号', '车型', '上车时间', '城市', '起点', '终点', '里程', '金额'], row[:3] + [receipt_time(row[3])] + row[4:9]))
+                 for row in all_data] if parsed else []
+        record('didi_trips', [trip_row(t) for t in trips], LEDGER_FILE)
+
         # 写入CSV文件，使用UTF-8 BOM编码
         with open(output_csv, 'w', newline='', encoding='utf-8-sig') as csvfile:
             writer = csv.writer(csvfile)
             # 写入表头 - 检查数据是否已解析为多列
-            if all_data and len(all_data[0]) == 9:  # [文件名, 序号, 车型, 时间, 城市, 起点, 终点, 里程, 金额]
-                writer.writerow(['文件名', '序号', '车型', '上车时间', '城市', '起点', '终点', '里程', '金额'])
+            if parsed:
+                writer.writerow(['文件名', '序号', '车型', '上车时间', '城市', '起点', '终点', '里程', '金额', '重复报销'])
             else:
                 # 如果数据未解析，使用原始格式
                 writer.writerow(['文件名', '内容'])
@@ -522,6 +549,7 @@ def process_trip_receipts(input_dir, output_csv):
         print(f"处理完成！共提取 {len(all_data)} 行数据，保存到 {output_csv}")
     else:
         print("没有提取到任何数据，请检查文件格式和依赖库")
+        record('didi_trips', [], LEDGER_FILE)
 
 
 def main():
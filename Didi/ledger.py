@@ -0,0 +1,172 @@
+import csv
+import getpass
+import os
+import re
+import sqlite3
+import sys
+from openpyxl import Workbook
+
+# Reimbursement ledger: every extracted train ticket, Didi invoice, Didi trip and
+# attachment in one SQLite file, indexed by claim (workspace directory), employee,
+# date and invoice number. Each extractor run replaces its rows for the current
+# claim in one transaction; totals and page counts are SQL aggregates, and any
+# table can be exported to CSV or XLSX. REIMBURSEMENT_LEDGER moves the file (e.g.
+# to a shared location); REIMBURSEMENT_EMPLOYEE overrides the login name.
+
+LEDGER_FILE = os.environ.get('REIMBURSEMENT_LEDGER', '.reimbursement_ledger.sqlite')
+
+# Columns each table takes from the extractors, in export order
+TABLES = {
+    'train_tickets': ['source', 'invoice_number', 'date', 'train_number', 'departure_station', 'arrival_station',
+                      'departure_time', 'passenger_name', 'seat_type', 'seat_number', 'amount'],
+    'didi_invoices': ['source', 'invoice_number', 'date', 'amount', 'buyer_name', 'buyer_tax_id',
+                      'seller_name', 'seller_tax_id', 'buyer_entity'],
+    'didi_trips': ['source', 'seq', 'car_type', 'time', 'city', 'origin', 'destination', 'distance', 'amount', 'note'],
+    'attachments': ['path', 'size', 'mtime', 'pages', 'sha256'],
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS train_tickets (
+    claim TEXT NOT NULL, employee TEXT NOT NULL, source TEXT, invoice_number TEXT, date TEXT,
+    train_number TEXT, departure_station TEXT, arrival_station TEXT, departure_time TEXT,
+    passenger_name TEXT, seat_type TEXT, seat_number TEXT, amount REAL);
+CREATE INDEX IF NOT EXISTS train_tickets_claim ON train_tickets (claim);
+CREATE INDEX IF NOT EXISTS train_tickets_employee ON train_tickets (employee, date);
+CREATE INDEX IF NOT EXISTS train_tickets_date ON train_tickets (date);
+CREATE INDEX IF NOT EXISTS train_tickets_invoice ON train_tickets (invoice_number);
+
+CREATE TABLE IF NOT EXISTS didi_invoices (
+    claim TEXT NOT NULL, employee TEXT NOT NULL, source TEXT, invoice_number TEXT, date TEXT,
+    amount REAL, buyer_name TEXT, buyer_tax_id TEXT, seller_name TEXT, seller_tax_id TEXT, buyer_entity TEXT);
+CREATE INDEX IF NOT EXISTS didi_invoices_claim ON didi_invoices (claim);
+CREATE INDEX IF NOT EXISTS didi_invoices_employee ON didi_invoices (employee, date);
+CREATE INDEX IF NOT EXISTS didi_invoices_date ON didi_invoices (date);
+CREATE INDEX IF NOT EXISTS didi_invoices_invoice ON didi_invoices (invoice_number);
+
+CREATE TABLE IF NOT EXISTS didi_trips (
+    claim TEXT NOT NULL, employee TEXT NOT NULL, source TEXT, seq INTEGER, car_type TEXT, time TEXT,
+    city TEXT, origin TEXT, destination TEXT, distance TEXT, amount REAL, note TEXT);
+CREATE INDEX IF NOT EXISTS didi_trips_claim ON didi_trips (claim, source);
+CREATE INDEX IF NOT EXISTS didi_trips_employee ON didi_trips (employee, time);
+CREATE INDEX IF NOT EXISTS didi_trips_time ON didi_trips (time);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    claim TEXT NOT NULL, employee TEXT NOT NULL, path TEXT NOT NULL, size INTEGER, mtime REAL,
+    pages INTEGER, sha256 TEXT, PRIMARY KEY (claim, path));
+CREATE INDEX IF NOT EXISTS attachments_employee ON attachments (employee);
+'''
+
+def to_amount(value):
+    # '=35.0', '¥1,234.50', 35 -> 35.0; None if not a number
+    try: return float(str(value).replace('=', '').replace('¥', '').replace('￥', '').replace(',', '').strip())
+    except (TypeError, ValueError): return None
+
+def iso_date(value):
+    # '2024年11月5日' -> '2024-11-05', so dates sort and range-scan as text
+    m = re.search(r'(\d{4})\D+(\d{1,2})\D+(\d{1,2})', str(value or ''))
+    return f"{m.group(1)}-{int(m.group(2)):02d}-{int(m.group(3)):02d}" if m else (value or None)
+
+# Extractor records -> ledger rows
+
+def train_row(ticket):
+    return {**ticket, 'source': ticket.get('filename'), 'date': iso_date(ticket.get('date')),
+            'amount': to_amount(ticket.get('price'))}
+
+def invoice_row(info):
+    return {'source': info.get('文件名'), 'invoice_number': info.get('发票号码'), 'date': iso_date(info.get('开票日期')),
+            'amount': to_amount(info.get('金额')), 'buyer_name': info.get('购买方名称'),
+            'buyer_tax_id': info.get('购买方识别号'), 'seller_name': info.get('销售方名称'),
+            'seller_tax_id': info.get('销售方识别号'), 'buyer_entity': info.get('购买方主体')}
+
+TRIP_COLUMNS = {'序号': 'seq', '车型': 'car_type', '上车时间': 'time', '城市': 'city', '起点': 'origin',
+                '终点': 'destination', '备注': 'note', '来源文件': 'source'}
+
+def trip_row(trip):
+    # Keyed by the receipt table header; 里程[公里] and 金额[元] by prefix
+    row = {}
+    for column, value in trip.items():
+        column = str(column)
+        key = TRIP_COLUMNS.get(column) or ('distance' if column.startswith('里程') else 'amount' if column.startswith('金额') else None)
+        if key: row[key] = value
+    row['amount'] = to_amount(row.get('amount'))
+    row['seq'] = int(row['seq']) if str(row.get('seq', '')).isdigit() else None
+    return row
+
+class Ledger:
+    def __init__(self, path=LEDGER_FILE, claim=None, employee=None):
+        self.claim = claim or os.path.abspath(os.getcwd())
+        self.employee = employee or os.environ.get('REIMBURSEMENT_EMPLOYEE') or getpass.getuser()
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def replace(self, table, rows):
+        # Replace this claim's rows of `table` with `rows` (dicts keyed by
+        # TABLES[table]; missing keys are NULL) in a single transaction
+        columns = TABLES[table]
+        insert = (f"INSERT INTO {table} (claim, employee, {', '.join(columns)}) "
+                  f"VALUES ({', '.join('?' * (len(columns) + 2))})")
+        with self.db:
+            self.db.execute(f"DELETE FROM {table} WHERE claim = ?", (self.claim,))
+            self.db.executemany(insert, ([self.claim, self.employee] + [row.get(c) for c in columns] for row in rows))
+
+    def count(self, table):
+        return self.db.execute(f"SELECT COUNT(*) FROM {table} WHERE claim = ?", (self.claim,)).fetchone()[0]
+
+    def total(self, table):
+        # Sum of `amount` over this claim's rows
+        return self.db.execute(f"SELECT COALESCE(SUM(amount), 0) FROM {table} WHERE claim = ?", (self.claim,)).fetchone()[0]
+
+    def attachment_pages(self):
+        # Identical files (same sha256) are merged once, so they are counted once
+        return self.db.execute("SELECT COALESCE(SUM(pages), 0) FROM (SELECT MAX(pages) AS pages FROM attachments "
+                               "WHERE claim = ? GROUP BY sha256)", (self.claim,)).fetchone()[0]
+
+    def rows(self, table):
+        cursor = self.db.execute(f"SELECT {', '.join(TABLES[table])} FROM {table} WHERE claim = ? ORDER BY rowid", (self.claim,))
+        return TABLES[table], cursor
+
+    def export(self, table, path):
+        # CSV or XLSX by file extension -> number of rows written
+        columns, cursor = self.rows(table)
+        count = 0
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in cursor:
+                    writer.writerow(row)
+                    count += 1
+        else:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(table)
+            ws.append(columns)
+            for row in cursor:
+                ws.append(row)
+                count += 1
+            wb.save(path)
+        return count
+
+def record(table, rows, ledger_file=LEDGER_FILE):
+    # Ledger.replace() on the ledger file; an unusable ledger only warns
+    try:
+        with Ledger(ledger_file) as ledger:
+            ledger.replace(table, rows)
+    except sqlite3.Error as e:
+        print(f"Warning: ledger {ledger_file} unavailable: {e}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != 'export' or sys.argv[2] not in TABLES:
+        print(f"Usage: python ledger.py export <{'|'.join(TABLES)}> <output.csv|output.xlsx>")
+        sys.exit(1)
+    with Ledger() as ledger:
+        n = ledger.export(sys.argv[2], sys.argv[3])
+    print(f"Exported {n} {sys.argv[2]} rows to {sys.argv[3]}")
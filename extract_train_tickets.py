@@ -10,10 +10,14 @@ import csv
 from datetime import datetime
 import pdfplumber
 from pathlib import Path
+from claim_index import INDEX_FILE, TRAIN_INVOICE, flag_claims
+from ledger import LEDGER_FILE, record, train_row
 
 class TrainTicketExtractor:
-    def __init__(self):
+    def __init__(self, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
         self.extracted_data = []
+        self.claim_index = claim_index
+        self.ledger_file = ledger_file
         
     def extract_text_from_pdf(self, pdf_path):
         """Extract text content from PDF file"""
@@ -150,6 +154,7 @@ class TrainTicketExtractor:
         """Save extracted data to CSV file with deduplication based on invoice number"""
         if not self.extracted_data:
             print("No data to save.")
+            record('train_tickets', [], self.ledger_file)  # clear rows left by an earlier run
             return
         
         # Remove duplicates based on invoice number
@@ -165,20 +170,28 @@ class TrainTicketExtractor:
         # Convert back to list
         deduplicated_data = list(unique_data.values())
         
-        # Add route column to each ticket
-        for ticket_data in deduplicated_data:
+        # Invoice numbers already claimed in an earlier run or by someone else
+        claimed = flag_claims(TRAIN_INVOICE, [(t.get('invoice_number', ''), t['filename']) for t in deduplicated_data],
+                              self.claim_index)
+        
+        # Add route and duplicate_claim columns to each ticket
+        for ticket_data, duplicate_claim in zip(deduplicated_data, claimed):
             departure = ticket_data.get('departure_station', '')
             arrival = ticket_data.get('arrival_station', '')
             if departure and arrival:
                 ticket_data['route'] = f"{departure} → {arrival}"
             else:
                 ticket_data['route'] = ""
+            ticket_data['duplicate_claim'] = duplicate_claim
+            if duplicate_claim:
+                print(f"Warning: {ticket_data['filename']} was already claimed: {duplicate_claim}")
+        record('train_tickets', [train_row(t) for t in deduplicated_data], self.ledger_file)
         
-        # Define CSV headers (with route column added)
+        # Define CSV headers (with route and duplicate_claim columns added)
         headers = [
             'filename', 'invoice_number', 'date', 'train_number', 'departure_station', 
             'arrival_station', 'route', 'departure_time', 'arrival_time', 
-            'passenger_name', 'seat_type', 'seat_number', 'price'
+            'passenger_name', 'seat_type', 'seat_number', 'price', 'duplicate_claim'
         ]
         
         try:
@@ -0,0 +1,102 @@
+import json
+import os
+from collections import deque
+
+# Registry of the legal entities we buy for (and known sellers), used to tell
+# the buyer from the seller on an invoice instead of relying on field order.
+#
+# buyer_registry.json:
+# {
+#   "buyers": [{"name": "深圳宝链科技有限公司", "tax_id": "91440300MA5F1W6866", "aliases": ["宝链"]}],
+#   "sellers": [{"name": "滴滴出行科技有限公司", "tax_id": "911201163409833307"}]
+# }
+#
+# Tax IDs go into a hash map; names and aliases go into an Aho-Corasick
+# automaton, so one pass over a company name finds every registered name or
+# alias it contains, wherever it occurs ("宝链" matches "深圳宝链科技有限公司").
+
+REGISTRY_FILE = 'buyer_registry.json'
+BUYER = 'buyer'
+SELLER = 'seller'
+class BuyerRegistry:
+    def __init__(self, buyers=(), sellers=()):
+        self.ids = {}  # tax ID -> (role, entity name)
+        # Automaton states: transitions, failure link and the longest registered
+        # name ending at the state, as (length, (role, entity name)); 0 is the root
+        self.goto, self.fail, self.out = [{}], [0], [None]
+        self.entities = set()
+        for role, entries in ((BUYER, buyers), (SELLER, sellers)):
+            for entry in entries:
+                entity = (role, entry['name'])
+                self.entities.add(entity)
+                if entry.get('tax_id'):
+                    self.ids[entry['tax_id'].strip().upper()] = entity
+                for name in [entry['name']] + list(entry.get('aliases', [])):
+                    if name.strip(): self._add_name(name.strip(), entity)
+        self._link()
+
+    def _add_name(self, name, entity):
+        state = 0
+        for ch in name:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = self.goto[state][ch] = len(self.goto)
+                self.goto.append({}); self.fail.append(0); self.out.append(None)
+            state = nxt
+        self.out[state] = (len(name), entity)
+
+    def _link(self):
+        # Breadth-first failure links; a state without a name of its own inherits
+        # the longest name ending at its failure state
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and ch not in self.goto[f]: f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                if self.out[nxt] is None: self.out[nxt] = self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def by_tax_id(self, tax_id):
+        # -> (role, entity name) or None
+        return self.ids.get(tax_id.strip().upper())
+
+    def by_name(self, name):
+        # Longest registered name or alias contained in `name` -> (role, entity name) or None
+        state, found = 0, None
+        for ch in name.strip():
+            while state and ch not in self.goto[state]: state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            hit = self.out[state]
+            if hit and (found is None or hit[0] > found[0]): found = hit
+        return found[1] if found else None
+
+def load_registry(path=REGISTRY_FILE):
+    # A missing registry file gives an empty registry (field order decides)
+    if not path or not os.path.exists(path): return BuyerRegistry()
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return BuyerRegistry(data.get('buyers', []), data.get('sellers', []))
+
+def lookup(registry, name, tax_id):
+    # Tax ID first, then name -> (role, entity name) or None
+    return (tax_id and registry.by_tax_id(tax_id)) or (name and registry.by_name(name)) or None
+
+def assign_parties(names, tax_ids, registry):
+    # Invoices print a buyer block and a seller block, so the i-th name and the
+    # i-th tax ID belong together. Registered parties decide which block is the
+    # buyer; otherwise the buyer is the first one, as on Chinese VAT invoices.
+    # Returns {role: (name, tax ID, registered entity name or None)}.
+    slots = [(names[i] if i < len(names) else '', tax_ids[i] if i < len(tax_ids) else '') for i in range(2)]
+    hits = [lookup(registry, *slot) for slot in slots]
+    roles = [hit[0] if hit else None for hit in hits]
+    other = {BUYER: SELLER, SELLER: BUYER}
+    if roles[0] is None and roles[1] is not None: roles[0] = other[roles[1]]
+    if roles[1] is None and roles[0] is not None: roles[1] = other[roles[0]]
+    if roles[0] is None or roles[0] == roles[1]: roles = [BUYER, SELLER]
+    return {role: (name, tax_id, hit[1] if hit and hit[0] == role else None)
+            for (name, tax_id), hit, role in zip(slots, hits, roles)}
@@ -1,4 +1,6 @@
 import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfplumber.page import Page
 import pandas as pd
 import os
 import sys
@@ -6,60 +8,96 @@ import re
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
+from buyer_registry import BUYER, REGISTRY_FILE, SELLER, BuyerRegistry, assign_parties, load_registry, lookup
+from claim_index import DIDI_INVOICE, INDEX_FILE, flag_claims
+from ledger import LEDGER_FILE, invoice_row, record
 
-def extract_invoice_info(pdf_path):
+# Compiled once and shared by every invoice
+INVOICE_NUMBER_PATTERN = re.compile(r"发票号码[:：]\s*(\d+)")
+DATE_PATTERN = re.compile(r"开票日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)")
+AMOUNT_PATTERN = re.compile(r"¥\s*([\d\.]+)")
+# First amount on a line that contains 价税合计
+TOTAL_PATTERN = re.compile(r"^(?=[^\n]*价税合计)[^\n]*?¥\s*([\d\.]+)", re.MULTILINE)
+NAME_PATTERN = re.compile(r"名称[:：]\s*([^\n\s]+)")
+TAX_ID_PATTERN = re.compile(r"纳税人识别号[:：]\s*([A-Z0-9]+)")
+
+def iter_page_texts(pdf):
+    # Pages are parsed one at a time, so nothing after the last page read is loaded
+    for i, page_obj in enumerate(PDFPage.create_pages(pdf.doc)):
+        page = Page(pdf, page_obj, page_number=i + 1, initial_doctop=0)
+        yield page.extract_text() or ""
+        page.close()
+
+def extract_invoice_info(pdf_path, registry=None):
     info = {
         "文件名": os.path.basename(pdf_path),
+        "发票号码": "",
         "开票日期": "",
         "金额": 0.0,
         "购买方名称": "",
         "购买方识别号": "",
         "销售方名称": "",
-        "销售方识别号": ""
+        "销售方识别号": "",
+        "购买方主体": ""  # registered entity the invoice belongs to, for grouping
     }
     
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            page = pdf.pages[0]
-            text = page.extract_text()
-            
-            # Date
-            date_match = re.search(r"开票日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)", text)
-            if date_match:
-                info["开票日期"] = date_match.group(1)
-                
-            # Amount
-            lines = text.split('\n')
-            for line in lines:
-                if "价税合计" in line:
-                    amt_match = re.search(r"¥\s*([\d\.]+)", line)
+            names = []
+            tax_ids = []
+            # Fallback amount from the invoice page (the one carrying the invoice
+            # number, else page 1), never from trip receipts bundled after it
+            invoice_page_amount = first_page_amount = None
+            # An electronic invoice has every field on page 1, so reading
+            # usually stops there; bundles only read on if something is missing
+            for page_index, text in enumerate(iter_page_texts(pdf)):
+                # Invoice number
+                number_match = INVOICE_NUMBER_PATTERN.search(text)
+                if number_match and not info["发票号码"]:
+                    info["发票号码"] = number_match.group(1)
+
+                # Date
+                if not info["开票日期"]:
+                    date_match = DATE_PATTERN.search(text)
+                    if date_match:
+                        info["开票日期"] = date_match.group(1)
+
+                # Amount, falling back to the last amount on the invoice page if there is no total line
+                if info["金额"] == 0.0:
+                    amt_match = TOTAL_PATTERN.search(text)
                     if amt_match:
                         info["金额"] = float(amt_match.group(1))
-                        break
-            
-            if info["金额"] == 0.0:
-                amts = re.findall(r"¥\s*([\d\.]+)", text)
-                if amts:
-                    info["金额"] = float(amts[-1])
-
-            # Names and Tax IDs
-            name_matches = re.findall(r"名称[:：]\s*([^\n\s]+)", text)
-            if len(name_matches) >= 1:
-                info["购买方名称"] = name_matches[0].strip()
-            if len(name_matches) >= 2:
-                info["销售方名称"] = name_matches[1].strip()
-                
-            tax_matches = re.findall(r"纳税人识别号[:：]\s*([A-Z0-9]+)", text)
-            if len(tax_matches) >= 1:
-                info["购买方识别号"] = tax_matches[0].strip()
-            if len(tax_matches) >= 2:
-                info["销售方识别号"] = tax_matches[1].strip()
+                    else:
+                        amts = AMOUNT_PATTERN.findall(text)
+                        if amts and number_match and invoice_page_amount is None:
+                            invoice_page_amount = amts[-1]
+                        elif amts and page_index == 0:
+                            first_page_amount = amts[-1]
+
+                # Names and Tax IDs of both parties
+                if len(names) < 2:
+                    names += NAME_PATTERN.findall(text)
+                if len(tax_ids) < 2:
+                    tax_ids += TAX_ID_PATTERN.findall(text)
+
+                if info["发票号码"] and info["开票日期"] and info["金额"] != 0.0 and len(names) >= 2 and len(tax_ids) >= 2:
+                    break
+
+            last_amount = invoice_page_amount or first_page_amount
+            if info["金额"] == 0.0 and last_amount:
+                info["金额"] = float(last_amount)
+
+            parties = assign_parties([n.strip() for n in names], [t.strip() for t in tax_ids],
+                                     registry or BuyerRegistry())
+            info["购买方名称"], info["购买方识别号"], entity = parties[BUYER]
+            info["销售方名称"], info["销售方识别号"], _ = parties[SELLER]
+            info["购买方主体"] = entity or info["购买方名称"]
     except Exception as e:
         print(f"Error processing {pdf_path}: {e}")
 
     return info
 
-def process_directory(input_dir, output_file):
+def process_directory(input_dir, output_file, registry_file=REGISTRY_FILE, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
     if not os.path.exists(input_dir):
         print(f"Error: Directory '{input_dir}' does not exist.")
         return
@@ -69,24 +107,47 @@ def process_directory(input_dir, output_file):
     
     if not pdf_files:
         print(f"No Didi invoice PDF files found in '{input_dir}'.")
+        record('didi_invoices', [], ledger_file)  # clear rows left by an earlier run
         return
 
+    registry = load_registry(registry_file)
+    if registry:
+        print(f"Loaded {len(registry)} registered parties from {registry_file}")
+
     for f in pdf_files:
         path = os.path.join(input_dir, f)
         print(f"Processing: {f}")
-        results.append(extract_invoice_info(path))
+        info = extract_invoice_info(path, registry)
+        if registry and lookup(registry, info["购买方名称"], info["购买方识别号"]) is None:
+            print(f"Warning: buyer of {f} is not a registered entity: {info['购买方名称']}")
+        results.append(info)
 
     if not results:
         print("No information extracted.")
+        record('didi_invoices', [], ledger_file)
         return
 
+    # Invoice numbers already claimed in an earlier run or by someone else
+    claimed = flag_claims(DIDI_INVOICE, [(r["发票号码"], r["文件名"]) for r in results], claim_index)
+    for r, duplicate_claim in zip(results, claimed):
+        r["重复报销"] = duplicate_claim
+        if duplicate_claim:
+            print(f"Warning: {r['文件名']} was already claimed: {duplicate_claim}")
+    record('didi_invoices', [invoice_row(r) for r in results], ledger_file)
+
+    # Group invoices by buyer entity, keeping file order within each group
+    groups = {}
+    for r in results:
+        groups.setdefault(r["购买方主体"], []).append(r)
+    results = [r for group in groups.values() for r in group]
+
     # Create Excel with openpyxl
     wb = Workbook()
     ws = wb.active
     ws.title = "发票汇总"
 
     # Headers
-    headers = ["文件名", "开票日期", "金额", "购买方名称", "购买方识别号", "销售方名称", "销售方识别号"]
+    headers = ["文件名", "发票号码", "开票日期", "金额", "购买方名称", "购买方识别号", "销售方名称", "销售方识别号", "重复报销"]
     ws.append(headers)
 
     # Style headers
@@ -102,12 +163,14 @@ def process_directory(input_dir, output_file):
     for r in results:
         ws.append([
             r["文件名"],
+            f'="{r["发票号码"]}"',
             r["开票日期"],
             f'={r["金额"]}',
             r["购买方名称"],
             f'="{r["购买方识别号"]}"',
             r["销售方名称"],
-            f'="{r["销售方识别号"]}"'
+            f'="{r["销售方识别号"]}"',
+            r["重复报销"]
         ])
 
 
@@ -124,12 +187,24 @@ def process_directory(input_dir, output_file):
         adjusted_width = (max_length + 2) * 1.2
         ws.column_dimensions[column].width = adjusted_width
 
+    # One summary row per buyer entity
+    ws_buyers = wb.create_sheet("按购买方汇总")
+    ws_buyers.append(["购买方", "发票数", "金额合计"])
+    for cell in ws_buyers[1]:
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="center")
+    for buyer, group in groups.items():
+        ws_buyers.append([buyer, len(group), round(sum(r["金额"] for r in group), 2)])
+    ws_buyers.column_dimensions["A"].width = max(len(str(b)) for b in groups) * 2 + 4
+
     wb.save(output_file)
-    print(f"Success! Saved {len(results)} invoices to: {output_file}")
+    print(f"Success! Saved {len(results)} invoices for {len(groups)} buyers to: {output_file}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python extract_didi_invoices.py <input_dir> <output_xlsx>")
+        print("Usage: python extract_didi_invoices.py <input_dir> <output_xlsx> [buyer_registry.json] [claim_index.sqlite]")
         sys.exit(1)
     
-    process_directory(sys.argv[1], sys.argv[2])
+    process_directory(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else REGISTRY_FILE,
+                      sys.argv[4] if len(sys.argv) > 4 else INDEX_FILE)
@@ -3,13 +3,15 @@ import pandas as pd
 import os
 import sys
 import re
+from claim_index import DIDI_TRIP, INDEX_FILE, flag_claims, trip_fingerprint
+from ledger import LEDGER_FILE, record, trip_row
 
 def clean_text(text):
     if not text:
         return ""
     return str(text).replace('\n', ' ').strip()
 
-def process_didi_pdfs(input_dir, output_file):
+def process_didi_pdfs(input_dir, output_file, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
     if not os.path.exists(input_dir):
         print(f"Error: Directory '{input_dir}' does not exist.")
         return
@@ -19,6 +21,7 @@ def process_didi_pdfs(input_dir, output_file):
     
     if not pdf_files:
         print(f"No Didi reimbursement PDF files found in '{input_dir}'.")
+        record('didi_trips', [], ledger_file)  # clear rows left by an earlier run
         return
 
     for file_name in pdf_files:
@@ -72,11 +75,22 @@ def process_didi_pdfs(input_dir, output_file):
         columns = header + ["来源文件"] if header else None
         df = pd.DataFrame(all_trips, columns=columns)
         df = df.dropna(how='all')
-        
+
+        # Trips already claimed in an earlier run or by someone else
+        if columns:
+            fingerprints = [trip_fingerprint(t['上车时间'], t.get('金额[元]', ''), t.get('起点', ''), t.get('终点', ''))
+                            for t in df.to_dict('records')]
+            df['重复报销'] = flag_claims(DIDI_TRIP, list(zip(fingerprints, df['来源文件'])), claim_index)
+            duplicates = sum(1 for flag in df['重复报销'] if flag)
+            if duplicates:
+                print(f"Warning: {duplicates} trips were already claimed, see the 重复报销 column")
+        record('didi_trips', [trip_row(t) for t in df.to_dict('records')] if columns else [], ledger_file)
+
         df.to_excel(output_file, index=False)
         print(f"Success! Saved {len(df)} trips to: {output_file}")
     else:
         print("No valid trip info extracted.")
+        record('didi_trips', [], ledger_file)
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -1,7 +1,10 @@
+from collections import defaultdict
 from dataclasses import dataclass
 import json
 import sys
 
+from box_overlaps import overlapping_pairs
+
 
 # Script to check that the `fields.json` file that Claude creates when analyzing PDFs
 # does not have overlapping bounding boxes. See forms.md.
@@ -30,20 +33,28 @@ def get_bounding_box_messages(fields_json_stream) -> list[str]:
         rects_and_fields.append(RectAndField(f["label_bounding_box"], "label", f))
         rects_and_fields.append(RectAndField(f["entry_bounding_box"], "entry", f))
 
+    # Sweep-line search per page; pairs come back in the same (i, j) order the
+    # pairwise comparison used to visit them.
+    intersecting = defaultdict(list)
+    for i, j in overlapping_pairs(
+        [r.rect for r in rects_and_fields],
+        groups=[r.field["page_number"] for r in rects_and_fields],
+        intersects=rects_intersect,
+    ):
+        intersecting[i].append(j)
+
     has_error = False
     for i, ri in enumerate(rects_and_fields):
-        # This is O(N^2); we can optimize if it becomes a problem.
-        for j in range(i + 1, len(rects_and_fields)):
+        for j in intersecting[i]:
             rj = rects_and_fields[j]
-            if ri.field["page_number"] == rj.field["page_number"] and rects_intersect(ri.rect, rj.rect):
-                has_error = True
-                if ri.field is rj.field:
-                    messages.append(f"FAILURE: intersection between label and entry bounding boxes for `{ri.field['description']}` ({ri.rect}, {rj.rect})")
-                else:
-                    messages.append(f"FAILURE: intersection between {ri.rect_type} bounding box for `{ri.field['description']}` ({ri.rect}) and {rj.rect_type} bounding box for `{rj.field['description']}` ({rj.rect})")
-                if len(messages) >= 20:
-                    messages.append("Aborting further checks; fix bounding boxes and try again")
-                    return messages
+            has_error = True
+            if ri.field is rj.field:
+                messages.append(f"FAILURE: intersection between label and entry bounding boxes for `{ri.field['description']}` ({ri.rect}, {rj.rect})")
+            else:
+                messages.append(f"FAILURE: intersection between {ri.rect_type} bounding box for `{ri.field['description']}` ({ri.rect}) and {rj.rect_type} bounding box for `{rj.field['description']}` ({rj.rect})")
+            if len(messages) >= 20:
+                messages.append("Aborting further checks; fix bounding boxes and try again")
+                return messages
         if ri.rect_type == "entry":
             if "entry_text" in ri.field:
                 font_size = ri.field["entry_text"].get("font_size", 14)
@@ -1,6 +1,7 @@
 import unittest
 import json
 import io
+from box_overlaps import overlapping_pairs, pairwise_overlapping_pairs, random_boxes
 from check_bounding_boxes import get_bounding_box_messages
 
 
@@ -221,6 +222,53 @@ class TestGetBoundingBoxMessages(unittest.TestCase):
         self.assertTrue(any("SUCCESS" in msg for msg in messages))
         self.assertFalse(any("FAILURE" in msg for msg in messages))
     
+    def test_many_fields_across_pages(self):
+        """Test that only same-page intersections are reported among many fields"""
+        fields = []
+        for i in range(200):
+            page = i % 2 + 1
+            y = (i // 2) * 40
+            fields.append({
+                "description": f"Field{i}",
+                "page_number": page,
+                "label_bounding_box": [10, y, 50, y + 30],
+                "entry_bounding_box": [60, y, 150, y + 30]
+            })
+        fields[5]["entry_bounding_box"] = [60, 75, 150, 130]  # Page 2, overlaps Field7's entry
+
+        stream = self.create_json_stream({"form_fields": fields})
+        messages = get_bounding_box_messages(stream)
+        failures = [msg for msg in messages if "FAILURE" in msg]
+        self.assertEqual(len(failures), 1)
+        self.assertIn("`Field5`", failures[0])
+        self.assertIn("`Field7`", failures[0])
+
+
+class TestOverlappingPairs(unittest.TestCase):
+
+    def test_matches_pairwise_reference(self):
+        """Sweep-line search finds exactly the pairs of the pairwise comparison"""
+        for seed in range(5):
+            boxes, groups = random_boxes(500, pages=3, seed=seed)
+            for tolerance in (0.0, 2.0):
+                self.assertEqual(
+                    overlapping_pairs(boxes, tolerance, groups),
+                    pairwise_overlapping_pairs(boxes, tolerance, groups),
+                )
+
+    def test_touching_and_degenerate_boxes(self):
+        """Edge-touching boxes never overlap; custom predicates are honored"""
+        boxes = [(0, 0, 10, 10), (10, 0, 20, 10), (5, 5, 5, 8), (0, 10, 10, 20)]
+        self.assertEqual(overlapping_pairs(boxes), [])
+
+        def rects_intersect(r1, r2):
+            return not (r1[0] >= r2[2] or r1[2] <= r2[0] or r1[1] >= r2[3] or r1[3] <= r2[1])
+
+        self.assertEqual(
+            overlapping_pairs(boxes, intersects=rects_intersect),
+            pairwise_overlapping_pairs(boxes, intersects=rects_intersect),
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
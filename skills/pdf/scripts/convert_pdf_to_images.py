@@ -1,35 +1,106 @@
 import os
+import shutil
 import sys
+import tempfile
 
 from pdf2image import convert_from_path
+from PIL import Image
+from pypdf import PdfReader
 
 
 # Converts each page of a PDF to a PNG image.
+#
+# Pages are rendered by pdftoppm straight to PNG files at their final size, a
+# chunk of pages at a time split across worker processes. Only one page per
+# worker is ever held in memory, however long the PDF is.
 
 
-def convert(pdf_path, output_dir, max_dim=1000):
-    images = convert_from_path(pdf_path, dpi=200)
+DPI = 200
+PAGES_PER_CHUNK = 16
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
 
-    for i, image in enumerate(images):
-        # Scale image if needed to keep width/height under `max_dim`
-        width, height = image.size
-        if width > max_dim or height > max_dim:
-            scale_factor = min(max_dim / width, max_dim / height)
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            image = image.resize((new_width, new_height))
-        
-        image_path = os.path.join(output_dir, f"page_{i+1}.png")
-        image.save(image_path)
-        print(f"Saved page {i+1} as {image_path} (size: {image.size})")
 
-    print(f"Converted {len(images)} pages to PNG images")
+# Returns a list of (first page, last page, size) page ranges to render, where
+# size is None to render at DPI or `max_dim` to have pdftoppm scale the page so
+# its longer side is `max_dim`. Pages are only scaled down, never up.
+def page_chunks(pdf_path, first_page, last_page, max_dim, chunk_size):
+    pages = PdfReader(pdf_path).pages
+    last_page = min(last_page or len(pages), len(pages))
+    chunks = []
+    for page_number in range(max(first_page, 1), last_page + 1):
+        box = pages[page_number - 1].mediabox
+        long_side = max(float(box.width), float(box.height)) * DPI / 72
+        size = max_dim if long_side > max_dim else None
+        if chunks and chunks[-1][2] == size and page_number - chunks[-1][0] < chunk_size:
+            chunks[-1][1] = page_number
+        else:
+            chunks.append([page_number, page_number, size])
+    return [tuple(chunk) for chunk in chunks]
+
+
+# Yields (page number, image) for each page from `first_page` to `last_page`
+# (1-based, inclusive; None for the last page), in order. If `output_dir` is
+# given, pages are saved there as page_N.png and their paths are yielded
+# instead of images.
+def render_pages(pdf_path, output_dir=None, max_dim=1000, first_page=1, last_page=None,
+                 workers=DEFAULT_WORKERS):
+    chunks = page_chunks(pdf_path, first_page, last_page, max_dim, PAGES_PER_CHUNK * workers)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for start, end, size in chunks:
+            paths = convert_from_path(
+                pdf_path,
+                dpi=DPI,
+                first_page=start,
+                last_page=end,
+                size=size,
+                fmt="png",
+                output_folder=temp_dir,
+                output_file="page",
+                paths_only=True,
+                thread_count=workers,
+            )
+            for path in sorted(paths, key=rendered_page_number):
+                page_number = rendered_page_number(path)
+                if output_dir is not None:
+                    image_path = os.path.join(output_dir, f"page_{page_number}.png")
+                    shutil.move(path, image_path)
+                    yield page_number, image_path
+                else:
+                    with Image.open(path) as image:
+                        image.load()
+                    os.remove(path)
+                    yield page_number, image
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# pdftoppm names files <prefix>-<page number>.png, with zero-padded page numbers.
+def rendered_page_number(path):
+    return int(os.path.splitext(path)[0].rsplit("-", 1)[1])
+
+
+def convert(pdf_path, output_dir, max_dim=1000, first_page=1, last_page=None, workers=DEFAULT_WORKERS):
+    count = 0
+    for page_number, image_path in render_pages(pdf_path, output_dir, max_dim, first_page, last_page, workers):
+        with Image.open(image_path) as image:
+            size = image.size
+        print(f"Saved page {page_number} as {image_path} (size: {size})")
+        count += 1
+
+    print(f"Converted {count} pages to PNG images")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: convert_pdf_to_images.py [input pdf] [output directory]")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: convert_pdf_to_images.py [input pdf] [output directory] [pages, e.g. 3-7]")
         sys.exit(1)
     pdf_path = sys.argv[1]
     output_directory = sys.argv[2]
-    convert(pdf_path, output_directory)
+    first, last = 1, None
+    if len(sys.argv) == 4:
+        # "3" is page 3 only, "3-7" pages 3 to 7 and "3-" page 3 to the end
+        first, dash, last = sys.argv[3].partition("-")
+        first = int(first)
+        last = int(last) if last else (None if dash else first)
+    convert(pdf_path, output_directory, first_page=first, last_page=last)
@@ -1,59 +1,155 @@
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 
 from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, NameObject
 
-from extract_form_field_info import get_field_info
+from extract_form_field_info import get_field_info, get_full_annotation_field_id
 
 
 # Fills fillable form fields in a PDF. See forms.md.
+#
+# The blank form is parsed once into a FormTemplate, which indexes its fields by
+# ID. Each set of values is then filled into a fresh copy of the parsed form, so
+# many copies of the same form can be filled in one process (see fill_batch).
+# Only the indexed widgets of the fields being filled are handed to pypdf, so a
+# fill doesn't rescan every annotation on the page for each value.
+
+
+class FormTemplate:
+    def __init__(self, input_pdf_path: str):
+        self.input_pdf_path = input_pdf_path
+        with open(input_pdf_path, "rb") as f:
+            self.reader = PdfReader(BytesIO(f.read()))
+        # field ID -> field info from get_field_info, which includes the page,
+        # type, annotation rect and allowed values.
+        self.fields_by_ids = {f["field_id"]: f for f in get_field_info(self.reader)}
+        # field ID -> [(page index, index in the page's /Annots)] of its widgets.
+        # Copies made with clone_from keep the /Annots order, so the positions hold there too.
+        self.widgets_by_ids = {}
+        for page_index, page in enumerate(self.reader.pages):
+            for annot_index, annot in enumerate(page.get("/Annots", [])):
+                annot = annot.get_object()
+                if annot.get("/Subtype") == "/Widget":
+                    field_id = get_full_annotation_field_id(annot)
+                    self.widgets_by_ids.setdefault(field_id, []).append((page_index, annot_index))
+
+    def validation_errors(self, fields):
+        errors = []
+        for field in fields:
+            existing_field = self.fields_by_ids.get(field["field_id"])
+            if not existing_field:
+                errors.append(f"ERROR: `{field['field_id']}` is not a valid field ID")
+            elif field["page"] != existing_field["page"]:
+                errors.append(f"ERROR: Incorrect page number for `{field['field_id']}` (got {field['page']}, expected {existing_field['page']})")
+            elif "value" in field:
+                err = validation_error_for_field_value(existing_field, field["value"])
+                if err:
+                    errors.append(err)
+        return errors
+
+    # Writes a filled copy of the form. The fields must have been validated.
+    def fill(self, fields, output_pdf_path: str):
+        # Group values and their widgets by page index.
+        fields_by_page = {}
+        for field in fields:
+            if "value" in field:
+                for page_index, annot_index in self.widgets_by_ids.get(field["field_id"], []):
+                    field_values, annot_indexes = fields_by_page.setdefault(page_index, ({}, []))
+                    field_values[field["field_id"]] = field["value"]
+                    annot_indexes.append(annot_index)
+
+        writer = PdfWriter(clone_from=self.reader)
+        for page_index, (field_values, annot_indexes) in fields_by_page.items():
+            page = writer.pages[page_index]
+            # Let pypdf see only this job's widgets, then put the full list back.
+            all_annots = page.raw_get("/Annots")
+            annots = all_annots.get_object()
+            page[NameObject("/Annots")] = ArrayObject(annots[i] for i in annot_indexes)
+            try:
+                writer.update_page_form_field_values(page, field_values, auto_regenerate=False)
+            finally:
+                page[NameObject("/Annots")] = all_annots
+
+        # This seems to be necessary for many PDF viewers to format the form values correctly.
+        # It may cause the viewer to show a "save changes" dialog even if the user doesn't make any changes.
+        writer.set_need_appearances_writer(True)
+
+        with open(output_pdf_path, "wb") as f:
+            writer.write(f)
 
 
 def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path: str):
     with open(fields_json_path) as f:
         fields = json.load(f)
-    # Group by page number.
-    fields_by_page = {}
-    for field in fields:
-        if "value" in field:
-            field_id = field["field_id"]
-            page = field["page"]
-            if page not in fields_by_page:
-                fields_by_page[page] = {}
-            fields_by_page[page][field_id] = field["value"]
-    
-    reader = PdfReader(input_pdf_path)
-
-    has_error = False
-    field_info = get_field_info(reader)
-    fields_by_ids = {f["field_id"]: f for f in field_info}
-    for field in fields:
-        existing_field = fields_by_ids.get(field["field_id"])
-        if not existing_field:
-            has_error = True
-            print(f"ERROR: `{field['field_id']}` is not a valid field ID")
-        elif field["page"] != existing_field["page"]:
-            has_error = True
-            print(f"ERROR: Incorrect page number for `{field['field_id']}` (got {field['page']}, expected {existing_field['page']})")
-        else:
-            if "value" in field:
-                err = validation_error_for_field_value(existing_field, field["value"])
-                if err:
-                    print(err)
-                    has_error = True
-    if has_error:
+
+    template = FormTemplate(input_pdf_path)
+    errors = template.validation_errors(fields)
+    if errors:
+        for err in errors:
+            print(err)
         sys.exit(1)
+    template.fill(fields, output_pdf_path)
+
 
-    writer = PdfWriter(clone_from=reader)
-    for page, field_values in fields_by_page.items():
-        writer.update_page_form_field_values(writer.pages[page - 1], field_values, auto_regenerate=False)
+# The template of the current process, set up once per worker by _init_worker.
+_template = None
 
-    # This seems to be necessary for many PDF viewers to format the form values correctly.
-    # It may cause the viewer to show a "save changes" dialog even if the user doesn't make any changes.
-    writer.set_need_appearances_writer(True)
-    
-    with open(output_pdf_path, "wb") as f:
-        writer.write(f)
+
+def _init_worker(input_pdf_path: str):
+    global _template
+    monkeypatch_pydpf_method()
+    # Workers forked from the parent inherit its already parsed template.
+    if _template is None or _template.input_pdf_path != input_pdf_path:
+        _template = FormTemplate(input_pdf_path)
+
+
+# Returns (output path, list of errors); the output is only written if there are no errors.
+def _fill_job(job):
+    try:
+        values = job["values"]
+        if isinstance(values, str):
+            with open(values) as f:
+                values = json.load(f)
+        errors = _template.validation_errors(values)
+        if not errors:
+            _template.fill(values, job["output"])
+        return job["output"], errors
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        # An unreadable values file or malformed entry fails only its own job
+        return job.get("output"), [f"ERROR: {type(e).__name__}: {e}"]
+
+
+# Fills the same form once per job. Each job is {"values": ..., "output": ...}, where
+# "values" is a field values list as for fill_pdf_fields, or the path to its JSON file.
+# Returns a list of (output path, errors) in job order.
+def fill_batch(input_pdf_path: str, jobs, workers: int = 1):
+    _init_worker(input_pdf_path)
+    if workers <= 1 or len(jobs) <= 1:
+        return [_fill_job(job) for job in jobs]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)), initializer=_init_worker, initargs=(input_pdf_path,)
+    ) as executor:
+        return list(executor.map(_fill_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def fill_batch_from_json(input_pdf_path: str, jobs_json_path: str, workers: int):
+    with open(jobs_json_path) as f:
+        jobs = json.load(f)
+    results = fill_batch(input_pdf_path, jobs, workers)
+    failed = 0
+    for output, errors in results:
+        if errors:
+            failed += 1
+            print(f"FAILED {output}:")
+            for err in errors:
+                print(f"  {err}")
+    print(f"Filled {len(results) - failed} of {len(results)} forms")
+    if failed:
+        sys.exit(1)
 
 
 def validation_error_for_field_value(field_info, field_value):
@@ -91,6 +187,10 @@ def monkeypatch_pydpf_method():
     from pypdf.generic import DictionaryObject
     from pypdf.constants import FieldDictionaryAttributes
 
+    # Only patch once: forked workers inherit the parent's patched method, and
+    # wrapping it again would stack a wrapper per call.
+    if getattr(DictionaryObject.get_inherited, "_opt_patched", False):
+        return
     original_get_inherited = DictionaryObject.get_inherited
 
     def patched_get_inherited(self, key: str, default = None):
@@ -100,12 +200,18 @@ def monkeypatch_pydpf_method():
                 result = [r[0] for r in result]
         return result
 
+    patched_get_inherited._opt_patched = True
     DictionaryObject.get_inherited = patched_get_inherited
 
 
 if __name__ == "__main__":
+    if len(sys.argv) in (4, 5) and sys.argv[1] == "--batch":
+        workers = int(sys.argv[4]) if len(sys.argv) == 5 else (os.cpu_count() or 1)
+        fill_batch_from_json(sys.argv[2], sys.argv[3], workers)
+        sys.exit(0)
     if len(sys.argv) != 4:
         print("Usage: fill_fillable_fields.py [input pdf] [field_values.json] [output pdf]")
+        print("       fill_fillable_fields.py --batch [input pdf] [jobs.json] [workers]")
         sys.exit(1)
     monkeypatch_pydpf_method()
     input_pdf = sys.argv[1]
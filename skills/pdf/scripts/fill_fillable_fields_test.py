@@ -0,0 +1,133 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    NameObject,
+    NumberObject,
+    TextStringObject,
+)
+from fill_fillable_fields import FormTemplate, fill_batch
+
+
+def make_widget(writer, name, field_type, rect, states=None):
+    widget = DictionaryObject({
+        NameObject("/Type"): NameObject("/Annot"),
+        NameObject("/Subtype"): NameObject("/Widget"),
+        NameObject("/FT"): NameObject(field_type),
+        NameObject("/T"): TextStringObject(name),
+        NameObject("/Rect"): ArrayObject([FloatObject(v) for v in rect]),
+    })
+    if field_type == "/Tx":
+        widget[NameObject("/DA")] = TextStringObject("/Helv 10 Tf 0 g")
+    if states:
+        normal = DictionaryObject({
+            NameObject(state): writer._add_object(DecodedStreamObject()) for state in states
+        })
+        widget[NameObject("/AP")] = DictionaryObject({NameObject("/N"): normal})
+        widget[NameObject("/AS")] = NameObject("/Off")
+    return writer._add_object(widget)
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestFillFillableFields(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = self.temp_dir.name
+        self.form_pdf = os.path.join(self.dir, "form.pdf")
+
+        writer = PdfWriter()
+        fields = []
+        for page_number in (1, 2):
+            page = writer.add_blank_page(612, 792)
+            annots = [
+                make_widget(writer, f"name{page_number}", "/Tx", [50, 700, 300, 720]),
+                make_widget(writer, f"city{page_number}", "/Tx", [50, 650, 300, 670]),
+                make_widget(writer, f"agree{page_number}", "/Btn", [50, 600, 70, 620], ["/Yes", "/Off"]),
+            ]
+            page[NameObject("/Annots")] = ArrayObject(annots)
+            fields.extend(annots)
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        })
+        writer._root_object[NameObject("/AcroForm")] = writer._add_object(DictionaryObject({
+            NameObject("/Fields"): ArrayObject(fields),
+            NameObject("/DA"): TextStringObject("/Helv 10 Tf 0 g"),
+            NameObject("/DR"): DictionaryObject({
+                NameObject("/Font"): DictionaryObject({NameObject("/Helv"): writer._add_object(font)}),
+            }),
+        }))
+        writer.write(self.form_pdf)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_values(self, name, values):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            json.dump(values, f)
+        return path
+
+    def fill_batch(self, jobs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fill_batch(self.form_pdf, jobs)
+
+    def test_fill_sets_only_the_given_fields(self):
+        """Test values reach their own widgets and other fields stay empty"""
+        output = os.path.join(self.dir, "out.pdf")
+        FormTemplate(self.form_pdf).fill([
+            {"field_id": "name2", "page": 2, "value": "Jane Doe"},
+            {"field_id": "agree1", "page": 1, "value": "/Yes"},
+        ], output)
+        fields = PdfReader(output).get_fields()
+        self.assertEqual(fields["name2"].get("/V"), "Jane Doe")
+        self.assertEqual(fields["agree1"].get("/V"), "/Yes")
+        self.assertIsNone(fields["name1"].get("/V"))
+        self.assertIsNone(fields["city2"].get("/V"))
+        annots = [a.get_object() for a in PdfReader(output).pages[0]["/Annots"]]
+        self.assertEqual(len(annots), 3)
+        self.assertEqual(annots[2]["/AS"], "/Yes")
+
+    def test_fill_leaves_template_untouched(self):
+        """Test filling one copy doesn't leak its values into the next"""
+        template = FormTemplate(self.form_pdf)
+        first = os.path.join(self.dir, "first.pdf")
+        second = os.path.join(self.dir, "second.pdf")
+        template.fill([{"field_id": "name1", "page": 1, "value": "Jane"}], first)
+        template.fill([{"field_id": "city1", "page": 1, "value": "Paris"}], second)
+        fields = PdfReader(second).get_fields()
+        self.assertIsNone(fields["name1"].get("/V"))
+        self.assertEqual(fields["city1"].get("/V"), "Paris")
+
+    def test_batch_reports_bad_jobs_alone(self):
+        """Test unreadable or malformed jobs fail on their own and the others are written"""
+        good = os.path.join(self.dir, "good.pdf")
+        jobs = [
+            {"values": os.path.join(self.dir, "missing.json"), "output": os.path.join(self.dir, "missing.pdf")},
+            {"values": self.write_values("broken.json", {"field_id": "name1"}), "output": os.path.join(self.dir, "broken.pdf")},
+            {"values": [{"field_id": "name1", "value": "No page"}], "output": os.path.join(self.dir, "nopage.pdf")},
+            {"values": [{"field_id": "name1", "page": 1, "value": "Jane"}], "output": good},
+            {"values": [{"field_id": "bogus", "page": 1, "value": "x"}], "output": os.path.join(self.dir, "invalid.pdf")},
+        ]
+        results = self.fill_batch(jobs)
+        self.assertEqual([output for output, _ in results], [job["output"] for job in jobs])
+        self.assertEqual([bool(errors) for _, errors in results], [True, True, True, False, True])
+        self.assertTrue(all(err.startswith("ERROR") for _, errors in results for err in errors))
+        self.assertEqual(PdfReader(good).get_fields()["name1"].get("/V"), "Jane")
+        written = sorted(f for f in os.listdir(self.dir) if f.endswith(".pdf"))
+        self.assertEqual(written, ["form.pdf", "good.pdf"])
+
+
+if __name__ == '__main__':
+    unittest.main()
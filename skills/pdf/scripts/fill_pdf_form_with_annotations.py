@@ -3,9 +3,18 @@ import sys
 
 from pypdf import PdfReader, PdfWriter
 from pypdf.annotations import FreeText
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+    TextStringObject,
+)
 
 
 # Fills a PDF by adding text annotations defined in `fields.json`. See forms.md.
+# With --overlay, the text is instead drawn into one content stream per page.
 
 
 def transform_coordinates(bbox, image_width, image_height, pdf_width, pdf_height):
@@ -25,9 +34,184 @@ def transform_coordinates(bbox, image_width, image_height, pdf_width, pdf_height
     return left, bottom, right, top
 
 
-def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
-    """Fill the PDF form with data from fields.json"""
-    
+# Standard PDF fonts for the font names used in fields.json. Viewers always have
+# these, so nothing needs to be embedded.
+STANDARD_FONTS = {
+    "arial": "Helvetica",
+    "helvetica": "Helvetica",
+    "times": "Times-Roman",
+    "times new roman": "Times-Roman",
+    "courier": "Courier",
+    "courier new": "Courier",
+}
+BOLD_FONTS = {"Helvetica": "Helvetica-Bold", "Times-Roman": "Times-Bold", "Courier": "Courier-Bold"}
+
+# Text that the standard fonts can't encode (e.g. Chinese) uses one of the
+# Adobe CJK fonts, which viewers provide without embedding.
+CJK_FONT = "STSong-Light"
+
+LINE_SPACING = 1.2
+PADDING = 2
+
+
+def overlay_font_name(font_name, text):
+    """Pick the PDF base font for a fields.json font name and text"""
+    try:
+        text.encode("cp1252")
+    except UnicodeEncodeError:
+        return CJK_FONT
+    name = font_name.lower()
+    bold = "bold" in name
+    name = name.replace("bold", "").replace("-", " ").strip()
+    base_font = STANDARD_FONTS.get(name, "Helvetica")
+    return BOLD_FONTS[base_font] if bold else base_font
+
+
+def make_font_dict(base_font):
+    """Create the font dictionary for a standard or CJK base font"""
+    if base_font != CJK_FONT:
+        return DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/" + base_font),
+            NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+        })
+    descriptor = DictionaryObject({
+        NameObject("/Type"): NameObject("/FontDescriptor"),
+        NameObject("/FontName"): NameObject("/" + CJK_FONT),
+        NameObject("/Flags"): NumberObject(6),
+        NameObject("/FontBBox"): ArrayObject([NumberObject(v) for v in (-25, -254, 1000, 880)]),
+        NameObject("/ItalicAngle"): NumberObject(0),
+        NameObject("/Ascent"): NumberObject(880),
+        NameObject("/Descent"): NumberObject(-120),
+        NameObject("/CapHeight"): NumberObject(880),
+        NameObject("/StemV"): NumberObject(93),
+    })
+    cid_font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/CIDFontType0"),
+        NameObject("/BaseFont"): NameObject("/" + CJK_FONT),
+        NameObject("/CIDSystemInfo"): DictionaryObject({
+            NameObject("/Registry"): TextStringObject("Adobe"),
+            NameObject("/Ordering"): TextStringObject("GB1"),
+            NameObject("/Supplement"): NumberObject(4),
+        }),
+        NameObject("/FontDescriptor"): descriptor,
+        NameObject("/DW"): NumberObject(1000),
+        # ASCII characters map to CIDs 1-95, which are half width
+        NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(95), NumberObject(500)]),
+    })
+    return DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type0"),
+        NameObject("/BaseFont"): NameObject("/" + CJK_FONT),
+        NameObject("/Encoding"): NameObject("/UniGB-UCS2-H"),
+        NameObject("/DescendantFonts"): ArrayObject([cid_font]),
+    })
+
+
+def encode_text(base_font, text):
+    """Encode text as a PDF string operand for the given base font"""
+    if base_font == CJK_FONT:
+        # UniGB-UCS2-H takes two-byte Unicode code points
+        return "<" + text.encode("utf-16-be").hex() + ">"
+    # Each character stands for one WinAnsiEncoding byte of the content stream
+    escaped = text.encode("cp1252").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return "(" + escaped + ")"
+
+
+class OverlayFonts:
+    """Font resources of one output PDF, each written once and shared by all pages"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.fonts = {}  # base font -> (resource name, indirect reference)
+
+    def get(self, base_font):
+        if base_font not in self.fonts:
+            ref = self.writer._add_object(make_font_dict(base_font))
+            self.fonts[base_font] = (f"/FillF{len(self.fonts)}", ref)
+        return self.fonts[base_font]
+
+
+def text_operations(box, text, font_resource, base_font, font_size, font_color):
+    """Content stream operations drawing text at the top left of a box, clipped to it"""
+    left, bottom, right, top = box
+    font_color = font_color.lstrip("#")
+    red, green, blue = (int(font_color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    ops = [
+        "q",
+        f"{left:.2f} {bottom:.2f} {right - left:.2f} {top - bottom:.2f} re W n",
+        "BT",
+        f"{font_resource} {font_size:g} Tf",
+        f"{red:.3f} {green:.3f} {blue:.3f} rg",
+        f"{font_size * LINE_SPACING:.2f} TL",
+        f"{left + PADDING:.2f} {top - PADDING - font_size:.2f} Td",
+    ]
+    for i, line in enumerate(text.split("\n")):
+        if i > 0:
+            ops.append("T*")
+        ops.append(encode_text(base_font, line) + " Tj")
+    ops += ["ET", "Q"]
+    return ops
+
+
+def add_page_overlay(writer, page, fonts, entries):
+    """Draw all of a page's field text in one content stream on top of the page"""
+    ops = []
+    used_fonts = {}
+    for box, entry_text in entries:
+        text = entry_text["text"]
+        base_font = overlay_font_name(entry_text.get("font", "Arial"), text)
+        resource_name, ref = fonts.get(base_font)
+        used_fonts[resource_name] = ref
+        ops += text_operations(
+            box, text, resource_name, base_font,
+            float(entry_text.get("font_size", 14)),
+            entry_text.get("font_color", "000000"),
+        )
+
+    resources = page.get("/Resources")
+    if resources is None:
+        resources = DictionaryObject()
+        page[NameObject("/Resources")] = resources
+    resources = resources.get_object()
+    page_fonts = resources.get("/Font")
+    if page_fonts is None:
+        page_fonts = DictionaryObject()
+        resources[NameObject("/Font")] = page_fonts
+    page_fonts = page_fonts.get_object()
+    for resource_name, ref in used_fonts.items():
+        page_fonts[NameObject(resource_name)] = ref
+
+    # Wrap the original content in q/Q so the overlay draws in default page
+    # coordinates whatever graphics state the page leaves behind.
+    contents = page.get("/Contents")
+    if contents is None:
+        parts = []
+    elif isinstance(contents.get_object(), ArrayObject):
+        parts = list(contents.get_object())
+    else:
+        parts = [contents]
+    page[NameObject("/Contents")] = ArrayObject(
+        [add_stream(writer, b"q\n")]
+        + parts
+        + [add_stream(writer, b"\nQ\n"), add_stream(writer, "\n".join(ops).encode("latin-1"), compress=True)]
+    )
+
+
+def add_stream(writer, data, compress=False):
+    stream = StreamObject()
+    stream.set_data(data)
+    return writer._add_object(stream.flate_encode() if compress else stream)
+
+
+def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path, overlay=False):
+    """Fill the PDF form with data from fields.json
+
+    With overlay=True the text is drawn into the page content instead of being
+    added as one FreeText annotation per field.
+    """
     # `fields.json` format described in forms.md.
     with open(fields_json_path, "r") as f:
         fields_data = json.load(f)
@@ -47,6 +231,7 @@ def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
     
     # Process each form field
     annotations = []
+    overlay_entries = {}  # page number -> [(box, entry_text)]
     for field in fields_data["form_fields"]:
         page_num = field["page_number"]
         
@@ -70,6 +255,10 @@ def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
         if not text:
             continue
         
+        if overlay:
+            overlay_entries.setdefault(page_num, []).append((transformed_entry_box, entry_text))
+            continue
+
         font_name = entry_text.get("font", "Arial")
         font_size = str(entry_text.get("font_size", 14)) + "pt"
         font_color = entry_text.get("font_color", "000000")
@@ -89,20 +278,29 @@ def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
         # page_number is 0-based for pypdf
         writer.add_annotation(page_number=page_num - 1, annotation=annotation)
         
+    fonts = OverlayFonts(writer)
+    for page_num, entries in overlay_entries.items():
+        add_page_overlay(writer, writer.pages[page_num - 1], fonts, entries)
+
     # Save the filled PDF
     with open(output_pdf_path, "wb") as output:
         writer.write(output)
     
     print(f"Successfully filled PDF form and saved to {output_pdf_path}")
-    print(f"Added {len(annotations)} text annotations")
+    if overlay:
+        field_count = sum(len(entries) for entries in overlay_entries.values())
+        print(f"Drew {field_count} fields as overlays on {len(overlay_entries)} pages")
+    else:
+        print(f"Added {len(annotations)} text annotations")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: fill_pdf_form_with_annotations.py [input pdf] [fields.json] [output pdf]")
+    args = [arg for arg in sys.argv[1:] if arg != "--overlay"]
+    if len(args) != 3:
+        print("Usage: fill_pdf_form_with_annotations.py [input pdf] [fields.json] [output pdf] [--overlay]")
         sys.exit(1)
-    input_pdf = sys.argv[1]
-    fields_json = sys.argv[2]
-    output_pdf = sys.argv[3]
+    input_pdf = args[0]
+    fields_json = args[1]
+    output_pdf = args[2]
     
-    fill_pdf_form(input_pdf, fields_json, output_pdf)
\ No newline at end of file
+    fill_pdf_form(input_pdf, fields_json, output_pdf, overlay="--overlay" in sys.argv)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pypdf import PdfReader, PdfWriter
+from fill_pdf_form_with_annotations import fill_pdf_form
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestFillPdfFormOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_pdf = os.path.join(self.temp_dir.name, "blank.pdf")
+        self.fields_json = os.path.join(self.temp_dir.name, "fields.json")
+        self.output_pdf = os.path.join(self.temp_dir.name, "filled.pdf")
+        writer = PdfWriter()
+        for _ in range(2):
+            writer.add_blank_page(612, 792)
+        writer.write(self.input_pdf)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fill(self, texts, overlay):
+        fields = {
+            "pages": [{"page_number": n, "image_width": 612, "image_height": 792} for n in (1, 2)],
+            "form_fields": [
+                {
+                    "page_number": page,
+                    "entry_bounding_box": [20, 40 + i * 22, 600, 60 + i * 22],
+                    "entry_text": {"text": text, "font_size": 10},
+                }
+                for i, (page, text) in enumerate(texts)
+            ],
+        }
+        with open(self.fields_json, "w") as f:
+            json.dump(fields, f, ensure_ascii=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fill_pdf_form(self.input_pdf, self.fields_json, self.output_pdf, overlay=overlay)
+        return PdfReader(self.output_pdf)
+
+    def test_overlay_draws_text_without_annotations(self):
+        """Test overlay mode puts extractable text in the page and adds no annotations"""
+        reader = self.fill([(1, "Jane (Doe)"), (2, "Total: 35.00")], overlay=True)
+        self.assertIn("Jane (Doe)", reader.pages[0].extract_text())
+        self.assertIn("Total: 35.00", reader.pages[1].extract_text())
+        for page in reader.pages:
+            self.assertNotIn("/Annots", page)
+
+    def test_overlay_draws_cjk_text(self):
+        """Test text outside WinAnsiEncoding is drawn with the CJK font"""
+        reader = self.fill([(1, "开票日期：2024年11月05日")], overlay=True)
+        self.assertIn("开票日期：2024年11月05日", reader.pages[0].extract_text())
+
+    def test_overlay_shares_fonts_between_pages(self):
+        """Test pages using the same font refer to one font object"""
+        reader = self.fill([(1, "first"), (2, "second")], overlay=True)
+        fonts = [page["/Resources"]["/Font"] for page in reader.pages]
+        refs = [font.raw_get(name).idnum for font in fonts for name in font if name.startswith("/FillF")]
+        self.assertEqual(len(refs), 2)
+        self.assertEqual(len(set(refs)), 1)
+
+    def test_default_mode_adds_annotations(self):
+        """Test without overlay each field is still one FreeText annotation"""
+        reader = self.fill([(1, "first"), (1, "second"), (2, "third")], overlay=False)
+        counts = [len(page.get("/Annots", [])) for page in reader.pages]
+        self.assertEqual(counts, [2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
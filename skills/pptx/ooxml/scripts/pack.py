@@ -7,14 +7,14 @@ Example usage:
 """
 
 import argparse
-import shutil
 import subprocess
 import sys
 import tempfile
 import defusedxml.minidom
-import zipfile
 from pathlib import Path
 
+from package import OfficePackage
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
@@ -61,28 +61,19 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # Condense XML in memory; the input directory is left untouched
+    package = OfficePackage.from_directory(input_dir)
+    for name in package.xml_parts():
+        package[name] = condense_xml(package[name])
+
+    # Create final Office file as zip archive
+    package.save(output_file)
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
@@ -130,10 +121,9 @@ def validate_document(doc_path):
             return False
 
 
-def condense_xml(xml_file):
-    """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+def condense_xml(data):
+    """Strip unnecessary whitespace and remove comments from XML bytes."""
+    dom = defusedxml.minidom.parseString(data)
 
     # Process each element to remove whitespace and comments
     for element in dom.getElementsByTagName("*"):
@@ -150,9 +140,7 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+    return dom.toxml(encoding="UTF-8")
 
 
 if __name__ == "__main__":
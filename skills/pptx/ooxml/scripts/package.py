@@ -0,0 +1,220 @@
+"""
+In-memory access to Office packages (.docx, .pptx, .xlsx).
+
+An OfficePackage is a mapping of part name to bytes backed by the zip file (or
+an unpacked directory). Parts are only read when accessed, XML parts are only
+parsed when asked for with xml(), and when the package is saved every part
+that was not changed is copied byte-for-byte from the source zip without being
+decompressed or recompressed.
+
+Example usage:
+    with OfficePackage("deck.pptx") as pkg:
+        root = pkg.xml("ppt/slides/slide1.xml")
+        ...  # edit root in place
+        pkg["ppt/media/new.png"] = png_bytes
+        pkg.save("edited.pptx")
+"""
+
+import copy
+import re
+import shutil
+import struct
+import zipfile
+from collections.abc import MutableMapping
+from io import BytesIO
+from pathlib import Path
+
+import lxml.etree
+
+CONTENT_TYPES = "[Content_Types].xml"
+XML_SUFFIXES = (".xml", ".rels")
+XML_DECLARATION = re.compile(rb"(?:\xef\xbb\xbf)?(?:<\?xml[^>]*\?>\s*)?")
+
+# Entity resolution and network access stay off, as with defusedxml
+_PARSER = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+
+# Raw copies write through private zipfile internals; on a Python whose zipfile
+# lacks them, unmodified parts are recompressed instead.
+_RAW_COPY_MODULE = ("structFileHeader", "sizeFileHeader", "_FH_FILENAME_LENGTH", "_FH_EXTRA_FIELD_LENGTH")
+_RAW_COPY_WRITER = ("_lock", "fp", "filelist", "NameToInfo", "start_dir", "_didModify")
+
+
+class OfficePackage(MutableMapping):
+    """Parts of an Office file, read, parsed and rewritten on demand."""
+
+    def __init__(self, source=None):
+        """Open an Office file.
+
+        Args:
+            source: Path, bytes or binary file object of an Office file, or
+                None for an empty package
+        """
+        self._zip = None
+        self._parts = {}  # name -> ZipInfo, Path or bytes
+        self._trees = {}  # name -> lxml ElementTree, for parsed parts
+        self._prologs = {}  # name -> original XML declaration of parsed parts
+        if source is not None:
+            if isinstance(source, (bytes, bytearray)):
+                source = BytesIO(source)
+            self._zip = zipfile.ZipFile(source)
+            for info in self._zip.infolist():
+                if not info.is_dir():
+                    self._parts[info.filename] = info
+
+    @classmethod
+    def from_directory(cls, directory):
+        """Open an unpacked Office document directory as a package."""
+        directory = Path(directory)
+        pkg = cls()
+        files = sorted(f for f in directory.rglob("*") if f.is_file())
+        # [Content_Types].xml goes first, as Office writes it
+        files.sort(key=lambda f: f.name != CONTENT_TYPES)
+        for f in files:
+            pkg._parts[f.relative_to(directory).as_posix()] = f
+        return pkg
+
+    def __getitem__(self, name):
+        if name in self._trees:
+            return self._serialize(name)
+        source = self._parts[name]
+        if isinstance(source, zipfile.ZipInfo):
+            return self._zip.read(source)
+        if isinstance(source, Path):
+            return source.read_bytes()
+        return source
+
+    def __setitem__(self, name, data):
+        self._trees.pop(name, None)
+        self._prologs.pop(name, None)
+        self._parts[name] = bytes(data)
+
+    def __delitem__(self, name):
+        del self._parts[name]
+        self._trees.pop(name, None)
+        self._prologs.pop(name, None)
+
+    def __iter__(self):
+        return iter(self._parts)
+
+    def __len__(self):
+        return len(self._parts)
+
+    def xml(self, name):
+        """Return the root element of an XML part, parsing it on first access.
+
+        The element is live: changes to it are written out by save().
+        """
+        if name not in self._trees:
+            data = self[name]
+            self._prologs[name] = XML_DECLARATION.match(data).group(0)
+            self._trees[name] = lxml.etree.parse(BytesIO(data), _PARSER)
+        return self._trees[name].getroot()
+
+    def xml_parts(self):
+        """List the names of all XML and relationship parts."""
+        return [name for name in self._parts if name.endswith(XML_SUFFIXES)]
+
+    def is_modified(self, name):
+        """Check whether a part differs from the source zip."""
+        source = self._parts[name]
+        if not isinstance(source, zipfile.ZipInfo):
+            return True
+        if name not in self._trees:
+            return False
+        return self._serialize(name) != self._zip.read(source)
+
+    def save(self, output, compression=zipfile.ZIP_DEFLATED):
+        """Write the package to a path or binary file object.
+
+        Unmodified parts from the source zip are copied as raw compressed data.
+        """
+        if isinstance(output, (str, Path)):
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(output, "w", compression) as dst:
+            for name, source in self._parts.items():
+                if isinstance(source, zipfile.ZipInfo) and not self.is_modified(name):
+                    self._copy_raw(source, dst)
+                else:
+                    dst.writestr(name, self[name])
+
+    def to_bytes(self, compression=zipfile.ZIP_DEFLATED):
+        """Return the packed Office file as bytes."""
+        buffer = BytesIO()
+        self.save(buffer, compression)
+        return buffer.getvalue()
+
+    def extract(self, output_dir, transform=None):
+        """Write all parts into a directory.
+
+        Args:
+            output_dir: Directory to write into, created if missing
+            transform: Optional function (name, data) -> data applied to XML
+                and relationship parts before writing
+        """
+        output_dir = Path(output_dir)
+        for name in self._parts:
+            target = output_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if transform is not None and name.endswith(XML_SUFFIXES):
+                target.write_bytes(transform(name, self[name]))
+            elif isinstance(self._parts[name], zipfile.ZipInfo) and name not in self._trees:
+                with self._zip.open(self._parts[name]) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                target.write_bytes(self[name])
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _serialize(self, name):
+        # Reuse the part's own declaration so unedited parts round-trip unchanged
+        body = lxml.etree.tostring(self._trees[name], encoding="UTF-8", xml_declaration=False)
+        return self._prologs[name] + body
+
+    def _copy_raw(self, info, dst):
+        """Append a zip entry to dst using its compressed bytes as they are.
+
+        Falls back to writestr(), which recompresses the part, on Python
+        versions whose zipfile lacks the internals used here.
+        """
+        if not (
+            all(hasattr(zipfile, attr) for attr in _RAW_COPY_MODULE)
+            and all(hasattr(dst, attr) for attr in _RAW_COPY_WRITER)
+            and hasattr(self._zip, "fp")
+        ):
+            # writestr() updates the ZipInfo it is given, so pass a copy
+            dst.writestr(copy.copy(info), self._zip.read(info))
+            return
+        src = self._zip.fp
+        src.seek(info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, src.read(zipfile.sizeFileHeader))
+        src.seek(
+            header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], 1
+        )
+        raw = src.read(info.compress_size)
+
+        # The sizes and CRC are known, so no data descriptor follows the data
+        entry = zipfile.ZipInfo(info.filename, info.date_time)
+        entry.compress_type = info.compress_type
+        entry.external_attr = info.external_attr
+        entry.create_system = info.create_system
+        entry.flag_bits = info.flag_bits & ~0x08
+        entry.CRC = info.CRC
+        entry.compress_size = info.compress_size
+        entry.file_size = info.file_size
+        with dst._lock:
+            entry.header_offset = dst.fp.tell()
+            dst.fp.write(entry.FileHeader())
+            dst.fp.write(raw)
+            dst.filelist.append(entry)
+            dst.NameToInfo[entry.filename] = entry
+            dst.start_dir = dst.fp.tell()
+            dst._didModify = True
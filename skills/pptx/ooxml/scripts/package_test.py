@@ -0,0 +1,130 @@
+import io
+import struct
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import package
+from package import OfficePackage
+
+
+class Unseekable(io.RawIOBase):
+    """Write-only stream, so zipfile has to follow each entry with a data descriptor."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def raw_member(zf, info):
+    """Return the compressed bytes of a member as stored in the zip."""
+    zf.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, zf.fp.read(zipfile.sizeFileHeader))
+    zf.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], 1)
+    return zf.fp.read(info.compress_size)
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestOfficePackageSave(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+        self.parts = {
+            "[Content_Types].xml": b'<?xml version="1.0"?><Types/>',
+            "ppt/stored.xml": b"<a>" + b"stored " * 200 + b"</a>",
+            "ppt/deflated.xml": b"<b>" + b"deflated " * 200 + b"</b>",
+            "ppt/media/image1.bin": bytes(range(256)) * 64,
+        }
+
+        # Stored and deflated members, each followed by a data descriptor
+        stream = Unseekable()
+        with zipfile.ZipFile(stream, "w") as zf:
+            zf.writestr("[Content_Types].xml", self.parts["[Content_Types].xml"], zipfile.ZIP_DEFLATED)
+            zf.writestr("ppt/stored.xml", self.parts["ppt/stored.xml"], zipfile.ZIP_STORED)
+            zf.writestr("ppt/deflated.xml", self.parts["ppt/deflated.xml"], zipfile.ZIP_DEFLATED)
+        # ...plus a member with ZIP64 extra fields, as written for entries over 4 GiB
+        self.source = self.dir / "source.pptx"
+        self.source.write_bytes(stream.buffer.getvalue())
+        with zipfile.ZipFile(self.source, "a") as zf:
+            info = zipfile.ZipInfo("ppt/media/image1.bin", (2024, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=True) as f:
+                f.write(self.parts["ppt/media/image1.bin"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_copy(self, output):
+        with zipfile.ZipFile(self.source) as src, zipfile.ZipFile(output) as dst:
+            self.assertIsNone(dst.testzip())
+            self.assertEqual(dst.namelist(), src.namelist())
+            for name, data in self.parts.items():
+                self.assertEqual(dst.read(name), data)
+                self.assertEqual(dst.getinfo(name).compress_type, src.getinfo(name).compress_type)
+            return src, dst
+
+    def test_source_has_descriptors_and_zip64(self):
+        """Test the source zip exercises the cases the raw copy has to handle"""
+        with zipfile.ZipFile(self.source) as zf:
+            flags = {info.filename: info.flag_bits for info in zf.infolist()}
+            self.assertTrue(flags["ppt/stored.xml"] & 0x08)
+            self.assertTrue(flags["ppt/deflated.xml"] & 0x08)
+            info = zf.getinfo("ppt/media/image1.bin")
+            zf.fp.seek(info.header_offset)
+            header = struct.unpack(zipfile.structFileHeader, zf.fp.read(zipfile.sizeFileHeader))
+            self.assertGreater(header[zipfile._FH_EXTRA_FIELD_LENGTH], 0)
+
+    def test_unmodified_parts_are_copied_byte_for_byte(self):
+        """Test every untouched member keeps its compressed bytes and CRC"""
+        output = self.dir / "copy.pptx"
+        with OfficePackage(self.source) as pkg:
+            pkg.save(output)
+        with zipfile.ZipFile(self.source) as src, zipfile.ZipFile(output) as dst:
+            self.check_copy(output)
+            for info in src.infolist():
+                copied = dst.getinfo(info.filename)
+                self.assertEqual(copied.CRC, info.CRC)
+                self.assertEqual(raw_member(dst, copied), raw_member(src, info))
+                self.assertFalse(copied.flag_bits & 0x08)
+
+    def test_save_is_stable(self):
+        """Test saving a saved package again gives the same file"""
+        first, second = self.dir / "first.pptx", self.dir / "second.pptx"
+        with OfficePackage(self.source) as pkg:
+            pkg.save(first)
+        with OfficePackage(first) as pkg:
+            pkg.save(second)
+        self.assertEqual(first.read_bytes(), second.read_bytes())
+
+    def test_edited_part_is_rewritten(self):
+        """Test an edited part is recompressed while the others are copied"""
+        output = self.dir / "edited.pptx"
+        with OfficePackage(self.source) as pkg:
+            pkg.xml("ppt/deflated.xml").text = "changed"
+            pkg.save(output)
+        with zipfile.ZipFile(output) as dst:
+            self.assertIsNone(dst.testzip())
+            self.assertIn(b"changed", dst.read("ppt/deflated.xml"))
+            self.assertEqual(dst.read("ppt/stored.xml"), self.parts["ppt/stored.xml"])
+
+    def test_fallback_without_zipfile_internals(self):
+        """Test parts are recompressed when zipfile lacks the internals of the raw copy"""
+        output = self.dir / "fallback.pptx"
+        with mock.patch.object(package, "_RAW_COPY_MODULE", ("no_such_attribute",)):
+            with OfficePackage(self.source) as pkg:
+                pkg.save(output)
+                # The source entries are left as they were for later reads
+                self.assertEqual(pkg["ppt/stored.xml"], self.parts["ppt/stored.xml"])
+        self.check_copy(output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,24 +4,25 @@
 import random
 import sys
 import defusedxml.minidom
-import zipfile
 from pathlib import Path
 
+from package import OfficePackage
+
+
+def pretty_xml(name, data):
+    """Pretty print an XML part."""
+    return defusedxml.minidom.parseString(data).toprettyxml(indent="  ", encoding="ascii")
+
+
 # Get command line arguments
 assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
 input_file, output_dir = sys.argv[1], sys.argv[2]
 
-# Extract and format
+# Extract and pretty print all XML files straight from the zip
 output_path = Path(output_dir)
 output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# Pretty print all XML files
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
+with OfficePackage(input_file) as package:
+    package.extract(output_path, transform=pretty_xml)
 
 # For .docx files, suggest an RSID for tracked changes
 if input_file.endswith(".docx"):
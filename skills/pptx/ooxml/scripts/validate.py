@@ -8,6 +8,7 @@ Usage:
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
 from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
@@ -24,6 +25,13 @@ def main():
         required=True,
         help="Path to original file (.docx/.pptx/.xlsx)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for the per-part XSD pass; other checks run serially (0: one per CPU)",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -55,9 +63,21 @@ def main():
     # Run validators
     success = True
     for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
+        start = time.perf_counter()
+        if V is RedliningValidator:
+            validator = V(unpacked_dir, original_file, verbose=args.verbose)
+        else:
+            validator = V(
+                unpacked_dir, original_file, verbose=args.verbose, jobs=args.jobs
+            )
         if not validator.validate():
             success = False
+        if args.verbose and hasattr(validator, "parses_saved"):
+            print(
+                f"{V.__name__}: {validator.parse_count} parses, "
+                f"{validator.parses_saved} saved by the shared tree cache, "
+                f"{time.perf_counter() - start:.2f}s"
+            )
 
     if success:
         print("All validations PASSED!")
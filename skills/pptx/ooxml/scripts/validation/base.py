@@ -2,11 +2,54 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import io
+import os
 import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import lxml.etree
 
+# Compiled XSD schemas shared by every validator in the process, keyed by schema path.
+# Compiling the ISO-IEC29500 schemas dominates validation time, so each one is
+# compiled at most once per process no matter how many parts or documents use it.
+_SCHEMA_CACHE = {}
+
+
+def load_schema(schema_path):
+    """Return the compiled lxml.etree.XMLSchema for schema_path, compiling it on first use."""
+    key = str(schema_path)
+    schema = _SCHEMA_CACHE.get(key)
+    if schema is None:
+        with open(key, "rb") as xsd_file:
+            parser = lxml.etree.XMLParser()
+            xsd_doc = lxml.etree.parse(xsd_file, parser=parser, base_url=key)
+            schema = lxml.etree.XMLSchema(xsd_doc)
+        _SCHEMA_CACHE[key] = schema
+    return schema
+
+
+# Validator instance owned by each process-pool worker (see _init_xsd_worker)
+_WORKER_VALIDATOR = None
+
+
+def _init_xsd_worker(validator_class, unpacked_dir, original_file, schema_paths):
+    """Build the worker's validator and compile every schema it will need up front."""
+    global _WORKER_VALIDATOR
+    _WORKER_VALIDATOR = validator_class(unpacked_dir, original_file)
+    for schema_path in schema_paths:
+        try:
+            load_schema(schema_path)
+        except Exception:
+            pass  # Reported per part when the schema is used
+
+
+def _validate_part_in_worker(xml_file):
+    """Validate one part against its XSD inside a pool worker."""
+    return _WORKER_VALIDATOR.validate_file_against_xsd(xml_file, verbose=False)
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -103,10 +146,24 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    # Minimum number of parts before XSD validation is fanned out to a process pool
+    PARALLEL_MIN_PARTS = 32
+
+    def __init__(self, unpacked_dir, original_file, verbose=False, jobs=1):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
+        # Worker processes for per-part XSD validation (None or 0: one per CPU)
+        self.jobs = jobs if jobs else os.cpu_count() or 1
+
+        # Original package, opened once on first use, and its XSD errors per part
+        self._original_zip = None
+        self._original_errors = {}
+
+        # Parsed trees shared by all validation passes, with parse statistics
+        self._dom_cache = {}
+        self.parse_count = 0
+        self.parse_requests = 0
 
         # Set schemas directory
         self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
@@ -124,6 +181,47 @@ class BaseSchemaValidator:
         """Run all validation checks and return True if all pass."""
         raise NotImplementedError("Subclasses must implement the validate method")
 
+    def close(self):
+        """Close the original package if it was opened; it is reopened on demand."""
+        if self._original_zip is not None:
+            self._original_zip.close()
+            self._original_zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _parse_xml(self, xml_file):
+        """Return the parsed tree for xml_file, parsing each file at most once.
+
+        The tree is shared by every validation pass and must not be modified;
+        passes that mutate the tree should use _parse_xml_copy instead.
+        Parse errors are cached too and re-raised on every request.
+        """
+        key = str(xml_file)
+        self.parse_requests += 1
+        if key not in self._dom_cache:
+            self.parse_count += 1
+            try:
+                self._dom_cache[key] = lxml.etree.parse(key)
+            except Exception as e:
+                self._dom_cache[key] = e
+        cached = self._dom_cache[key]
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+    def _parse_xml_copy(self, xml_file):
+        """Return a private copy of the cached tree for passes that modify it."""
+        return copy.deepcopy(self._parse_xml(xml_file))
+
+    @property
+    def parses_saved(self):
+        """Number of parses avoided by the shared tree cache."""
+        return self.parse_requests - self.parse_count
+
     def validate_xml(self):
         """Validate that all XML files are well-formed."""
         errors = []
@@ -131,7 +229,7 @@ class BaseSchemaValidator:
         for xml_file in self.xml_files:
             try:
                 # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
+                self._parse_xml(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -159,7 +257,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_xml(xml_file).getroot()
                 declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
 
                 for attr_val in [
@@ -190,15 +288,17 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_xml(xml_file).getroot()
                 file_ids = {}  # Track IDs that must be unique within this file
 
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
+                # Remove all mc:AlternateContent elements from the tree,
+                # working on a private copy so the shared tree stays intact
+                mc_xpath = ".//mc:AlternateContent"
+                mc_namespaces = {"mc": self.MC_NAMESPACE}
+                if root.xpath(mc_xpath, namespaces=mc_namespaces):
+                    root = self._parse_xml_copy(xml_file).getroot()
+                    for elem in root.xpath(mc_xpath, namespaces=mc_namespaces):
+                        elem.getparent().remove(elem)
 
                 # Now check IDs in the cleaned tree
                 for elem in root.iter():
@@ -310,7 +410,7 @@ class BaseSchemaValidator:
         for rels_file in rels_files:
             try:
                 # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_xml(rels_file).getroot()
 
                 # Get the directory where this .rels file is located
                 rels_dir = rels_file.parent
@@ -411,7 +511,7 @@ class BaseSchemaValidator:
 
             try:
                 # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_xml(rels_file).getroot()
                 rid_to_type = {}
 
                 for rel in rels_root.findall(
@@ -434,7 +534,7 @@ class BaseSchemaValidator:
                         rid_to_type[rid] = type_name
 
                 # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
+                xml_root = self._parse_xml(xml_file).getroot()
 
                 # Find all elements with r:id attributes
                 for elem in xml_root.iter():
@@ -531,7 +631,7 @@ class BaseSchemaValidator:
 
         try:
             # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._parse_xml(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -593,7 +693,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._parse_xml(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -692,11 +792,14 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        # The original package is only needed while the parts are checked
+        try:
+            results = self._validate_parts_against_xsd()
+        finally:
+            self.close()
+
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -738,6 +841,43 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_parts_against_xsd(self):
+        """Run validate_file_against_xsd for every part, in self.xml_files order.
+
+        Parts are independent, so with jobs > 1 they are spread over a process
+        pool whose workers compile the needed schemas once at start-up. Results
+        come back in input order, keeping the report deterministic. Only this
+        XSD pass uses the pool; the other checks (well-formedness, namespaces,
+        IDs, references, content types) run serially.
+        """
+        if self.jobs <= 1 or len(self.xml_files) < self.PARALLEL_MIN_PARTS:
+            return [
+                self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in self.xml_files
+            ]
+
+        schema_paths = {
+            schema_path
+            for schema_path in map(self._get_schema_path, self.xml_files)
+            if schema_path
+        }
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_xsd_worker,
+            initargs=(
+                type(self),
+                self.unpacked_dir,
+                self.original_file,
+                sorted(schema_paths),
+            ),
+        ) as executor:
+            chunksize = max(1, len(self.xml_files) // (self.jobs * 4))
+            return list(
+                executor.map(
+                    _validate_part_in_worker, self.xml_files, chunksize=chunksize
+                )
+            )
+
     def _get_schema_path(self, xml_file):
         """Determine the appropriate schema path for an XML file."""
         # Check exact filename match
@@ -830,23 +970,23 @@ class BaseSchemaValidator:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            xml_doc = self._parse_xml(xml_file)
+            return self._validate_xml_doc_xsd(
+                xml_doc, schema_path, xml_file.relative_to(base_path)
+            )
+        except Exception as e:
+            return False, {str(e)}
 
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+    def _validate_xml_doc_xsd(self, xml_doc, schema_path, relative_path):
+        """Validate a parsed XML document against XSD schema. Returns (is_valid, errors_set)."""
+        try:
+            # Load schema (compiled once per process)
+            schema = load_schema(schema_path)
 
             xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
             xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
             # Clean ignorable namespaces if needed
-            relative_path = xml_file.relative_to(base_path)
             if (
                 relative_path.parts
                 and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
@@ -869,39 +1009,50 @@ class BaseSchemaValidator:
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        The original package is opened once per validator (until close()) and
+        each part is read straight from the zip; results are memoized per part.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        member = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
+        if member not in self._original_errors:
+            self._original_errors[member] = self._validate_original_member(
+                member, relative_path
+            )
+        return self._original_errors[member]
 
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+    def _validate_original_member(self, member, relative_path):
+        """Validate one part of the original package, read directly from the zip."""
+        if self._original_zip is None:
+            self._original_zip = zipfile.ZipFile(self.original_file, "r")
 
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
+        try:
+            data = self._original_zip.read(member)
+        except KeyError:
+            # File didn't exist in original, so no original errors
+            return set()
 
-            if not original_xml_file.exists():
-                # File didn't exist in original, so no original errors
-                return set()
+        schema_path = self._get_schema_path(relative_path)
+        if not schema_path:
+            return set()
 
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        try:
+            xml_doc = lxml.etree.parse(io.BytesIO(data))
+        except Exception as e:
+            return {str(e)}
+        is_valid, errors = self._validate_xml_doc_xsd(
+            xml_doc, schema_path, relative_path
+        )
+        return errors if errors else set()
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """Remove template tags from XML text nodes and collect warnings.
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from pptx import Presentation
+# Kept outside validation/, whose pptx.py would shadow python-pptx if that
+# directory were on sys.path; run from here or from the repository root
+from validation import PPTXSchemaValidator
+from validation.base import _SCHEMA_CACHE, load_schema
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestSchemaValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+        self.original = self.dir / "deck.pptx"
+        self.unpacked = self.dir / "unpacked"
+
+        prs = Presentation()
+        for n in range(12):
+            prs.slides.add_slide(prs.slide_layouts[1]).shapes.title.text = f"Slide {n}"
+        prs.save(str(self.original))
+        with zipfile.ZipFile(self.original) as zf:
+            zf.extractall(self.unpacked)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def validator(self, jobs=1):
+        return PPTXSchemaValidator(self.unpacked, self.original, jobs=jobs)
+
+    def test_load_schema_compiles_once(self):
+        """Test a schema path is compiled on first use and reused afterwards"""
+        xsd = self.dir / "note.xsd"
+        xsd.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:element name="note" type="xs:string"/></xs:schema>'
+        )
+        schema = load_schema(xsd)
+        self.assertIs(load_schema(str(xsd)), schema)
+        self.assertIs(_SCHEMA_CACHE[str(xsd)], schema)
+
+    def test_validators_share_compiled_schemas(self):
+        """Test a second validator in the process reuses the first one's schemas"""
+        self.validator()._validate_parts_against_xsd()
+        pml = self.validator()._get_schema_path(self.unpacked / "ppt" / "presentation.xml")
+        compiled = _SCHEMA_CACHE[str(pml)]
+        self.validator()._validate_parts_against_xsd()
+        self.assertIs(_SCHEMA_CACHE[str(pml)], compiled)
+
+    def test_cached_schema_still_reports_new_errors(self):
+        """Test an edit is caught after the schema was compiled for an earlier run"""
+        self.assertTrue(self.validator().validate_against_xsd())
+        part = self.unpacked / "ppt" / "presentation.xml"
+        part.write_text(part.read_text().replace("<p:sldSz ", '<p:sldSz bogus="1" ', 1))
+        is_valid, errors = self.validator().validate_file_against_xsd(part)
+        self.assertFalse(is_valid)
+        self.assertTrue(any("bogus" in error for error in errors))
+
+    def test_parallel_results_match_serial(self):
+        """Test per-part results from a process pool equal the serial ones, in order"""
+        part = self.unpacked / "ppt" / "presentation.xml"
+        part.write_text(part.read_text().replace("<p:sldSz ", '<p:sldSz bogus="1" ', 1))
+        serial = self.validator(jobs=1)
+        self.assertGreaterEqual(len(serial.xml_files), serial.PARALLEL_MIN_PARTS)
+        expected = serial._validate_parts_against_xsd()
+        self.assertIn(False, [is_valid for is_valid, _ in expected])
+        self.assertEqual(self.validator(jobs=2)._validate_parts_against_xsd(), expected)
+
+    def test_parallel_report_fails_on_new_errors(self):
+        """Test the parallel XSD pass fails the document like the serial one"""
+        self.assertTrue(self.validator(jobs=2).validate_against_xsd())
+        part = self.unpacked / "ppt" / "presentation.xml"
+        part.write_text(part.read_text().replace("<p:sldSz ", '<p:sldSz bogus="1" ', 1))
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertFalse(self.validator(jobs=2).validate_against_xsd())
+        self.assertIn("presentation.xml", out.getvalue())
+
+    def test_original_package_is_closed(self):
+        """Test the original package is not left open after validation"""
+        validator = self.validator()
+        self.assertTrue(validator.validate_against_xsd())
+        self.assertIsNone(validator._original_zip)
+
+        part = self.unpacked / "ppt" / "presentation.xml"
+        with self.validator() as validator:
+            validator._get_original_file_errors(part)
+            original_zip = validator._original_zip
+            self.assertIsNotNone(original_zip.fp)
+        self.assertIsNone(original_zip.fp)
+        self.assertIsNone(validator._original_zip)
+
+    def test_jobs_zero_uses_every_cpu(self):
+        """Test jobs=0 runs one worker per CPU"""
+        self.assertEqual(self.validator(jobs=0).jobs, os.cpu_count() or 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
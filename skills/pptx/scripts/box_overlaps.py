@@ -0,0 +1,113 @@
+import heapq
+import random
+import sys
+import time
+from collections import defaultdict
+
+
+# Sweep-line overlap search for axis-aligned boxes, shared by check_bounding_boxes.py
+# (pdf skill) and inventory.py (pptx skill). Each skill keeps an identical copy.
+#
+# By default two boxes overlap when they overlap by more than `tolerance` on both axes:
+#   min(a.x1, b.x1) - max(a.x0, b.x0) > tolerance  and  the same for y.
+# With tolerance 0, boxes that only touch at an edge do not overlap.
+
+
+def boxes_overlap(a, b, tolerance=0.0):
+    ax0, ay0, ax1, ay1 = a
+    bx0, by0, bx1, by1 = b
+    return (min(ax1, bx1) - max(ax0, bx0) > tolerance
+            and min(ay1, by1) - max(ay0, by0) > tolerance)
+
+
+def overlapping_pairs(boxes, tolerance=0.0, groups=None, intersects=None):
+    """Return all (i, j) index pairs with i < j whose boxes overlap, sorted.
+
+    boxes: sequence of (x0, y0, x1, y1).
+    groups: optional sequence of keys (e.g. page numbers), one per box; only
+        boxes with equal keys are compared.
+    intersects: optional predicate(a, b) replacing boxes_overlap. It must only
+        accept pairs with a.x1 - b.x0 > tolerance and b.x1 - a.x0 > tolerance,
+        which is what lets the sweep drop boxes.
+
+    Boxes are swept left to right. A box leaves the active set once its right
+    edge can no longer overlap anything further right, so each box is only
+    compared with boxes it shares an x-range with.
+    """
+    if intersects is None:
+        intersects = lambda a, b: boxes_overlap(a, b, tolerance)
+
+    if groups is None:
+        buckets = {None: range(len(boxes))}
+    else:
+        buckets = defaultdict(list)
+        for i, key in enumerate(groups):
+            buckets[key].append(i)
+
+    pairs = []
+    for indices in buckets.values():
+        order = sorted(indices, key=lambda i: boxes[i][0])
+        pairs.extend(_sweep(boxes, order, tolerance, intersects))
+    pairs.sort()
+    return pairs
+
+
+def _sweep(boxes, order, tolerance, intersects):
+    active = []  # heap of (x1, index)
+    for j in order:
+        b = boxes[j]
+        while active and active[0][0] - b[0] <= tolerance:
+            heapq.heappop(active)
+        for _, i in active:
+            # Keep the original argument order: earlier box first
+            if intersects(boxes[i], b) if i < j else intersects(b, boxes[i]):
+                yield (i, j) if i < j else (j, i)
+        heapq.heappush(active, (b[2], j))
+
+
+def pairwise_overlapping_pairs(boxes, tolerance=0.0, groups=None, intersects=None):
+    """Reference O(N^2) implementation of overlapping_pairs."""
+    if intersects is None:
+        intersects = lambda a, b: boxes_overlap(a, b, tolerance)
+    pairs = []
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if groups is not None and groups[i] != groups[j]:
+                continue
+            if intersects(boxes[i], boxes[j]):
+                pairs.append((i, j))
+    return pairs
+
+
+def random_boxes(n, pages=1, page_size=(612, 792), max_box=(120, 24), seed=0):
+    """Form-like random boxes spread over `pages` pages, for benchmarks and tests."""
+    rng = random.Random(seed)
+    boxes, groups = [], []
+    for _ in range(n):
+        w, h = rng.uniform(5, max_box[0]), rng.uniform(5, max_box[1])
+        x0, y0 = rng.uniform(0, page_size[0] - w), rng.uniform(0, page_size[1] - h)
+        boxes.append((x0, y0, x0 + w, y0 + h))
+        groups.append(rng.randrange(pages))
+    return boxes, groups
+
+
+def benchmark(sizes=(1250, 2500, 5000, 10000), boxes_per_page=100):
+    # Pages grow with the box count, like a longer form, so density stays constant
+    for n in sizes:
+        boxes, groups = random_boxes(n, pages=max(1, n // boxes_per_page))
+        start = time.perf_counter()
+        fast = overlapping_pairs(boxes, groups=groups)
+        sweep_time = time.perf_counter() - start
+        start = time.perf_counter()
+        slow = pairwise_overlapping_pairs(boxes, groups=groups)
+        pairwise_time = time.perf_counter() - start
+        print(f"{n:>6} boxes: sweep {sweep_time:.3f}s, pairwise {pairwise_time:.3f}s, "
+              f"{len(fast)} overlaps, identical: {fast == slow}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark()
+    else:
+        print("Usage: box_overlaps.py --benchmark")
+        sys.exit(1)
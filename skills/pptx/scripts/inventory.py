@@ -27,13 +27,18 @@ import json
 import platform
 import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-from PIL import Image, ImageDraw, ImageFont
+from box_overlaps import overlapping_pairs
+from PIL import ImageFont
 from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.dml import MSO_THEME_COLOR
 from pptx.enum.text import PP_ALIGN
 from pptx.shapes.base import BaseShape
+from pptx.text.text import Font
 
 # Type aliases for cleaner signatures
 JsonValue = Union[str, int, float, bool, None]
@@ -46,6 +51,20 @@ InventoryData = Dict[
 ]  # Dict of slide_id -> {shape_id -> ShapeData}
 InventoryDict = Dict[str, Dict[str, ShapeDict]]  # JSON-serializable inventory
 
+# Font directories and file extensions by platform, scanned recursively
+if platform.system() == "Darwin":  # macOS
+    FONT_DIRS = ["/System/Library/Fonts/", "/Library/Fonts/", "~/Library/Fonts/"]
+    FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".dfont")
+else:  # Linux
+    FONT_DIRS = ["/usr/share/fonts/", "/usr/local/share/fonts/", "~/.fonts/"]
+    FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Number of (font path, size) pairs kept loaded by load_font
+FONT_CACHE_SIZE = 256
+
+# Number of (font, text) widths kept by text_width
+TEXT_WIDTH_CACHE_SIZE = 65536
+
 
 def main():
     """Main entry point for command-line usage."""
@@ -158,14 +177,14 @@ class ParagraphData:
         self.theme_color: Optional[str] = None
         self.line_spacing: Optional[float] = None
 
+        # Properties are read straight from the XML: python-pptx's paragraph
+        # and font getters add empty <a:pPr/>, <a:rPr/> and <a:solidFill/>
+        # elements when they are missing, and the presentation may be saved later
+        ns = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+        pPr = paragraph._p.pPr if hasattr(paragraph, "_p") else None
+
         # Check for bullet formatting
-        if (
-            hasattr(paragraph, "_p")
-            and paragraph._p is not None
-            and paragraph._p.pPr is not None
-        ):
-            pPr = paragraph._p.pPr
-            ns = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+        if pPr is not None:
             if (
                 pPr.find(f"{ns}buChar") is not None
                 or pPr.find(f"{ns}buAutoNum") is not None
@@ -174,8 +193,7 @@ class ParagraphData:
                 if hasattr(paragraph, "level"):
                     self.level = paragraph.level
 
-        # Add alignment if not LEFT (default)
-        if hasattr(paragraph, "alignment") and paragraph.alignment is not None:
+            # Add alignment if not LEFT (default)
             alignment_map = {
                 PP_ALIGN.CENTER: "CENTER",
                 PP_ALIGN.RIGHT: "RIGHT",
@@ -184,43 +202,39 @@ class ParagraphData:
             if paragraph.alignment in alignment_map:
                 self.alignment = alignment_map[paragraph.alignment]
 
-        # Add spacing properties if set
-        if hasattr(paragraph, "space_before") and paragraph.space_before:
-            self.space_before = paragraph.space_before.pt
-        if hasattr(paragraph, "space_after") and paragraph.space_after:
-            self.space_after = paragraph.space_after.pt
+            # Add spacing properties if set
+            if paragraph.space_before:
+                self.space_before = paragraph.space_before.pt
+            if paragraph.space_after:
+                self.space_after = paragraph.space_after.pt
 
         # Extract font properties from first run
-        if paragraph.runs:
-            first_run = paragraph.runs[0]
-            if hasattr(first_run, "font"):
-                font = first_run.font
-                if font.name:
-                    self.font_name = font.name
-                if font.size:
-                    self.font_size = font.size.pt
-                if font.bold is not None:
-                    self.bold = font.bold
-                if font.italic is not None:
-                    self.italic = font.italic
-                if font.underline is not None:
-                    self.underline = font.underline
-
-                # Handle color - both RGB and theme colors
-                try:
-                    # Try RGB color first
-                    if font.color.rgb:
-                        self.color = str(font.color.rgb)
-                except (AttributeError, TypeError):
-                    # Fall back to theme color
-                    try:
-                        if font.color.theme_color:
-                            self.theme_color = font.color.theme_color.name
-                    except (AttributeError, TypeError):
-                        pass
+        rPr = paragraph.runs[0]._r.rPr if paragraph.runs else None
+        if rPr is not None:
+            font = Font(rPr)
+            if font.name:
+                self.font_name = font.name
+            if font.size:
+                self.font_size = font.size.pt
+            if font.bold is not None:
+                self.bold = font.bold
+            if font.italic is not None:
+                self.italic = font.italic
+            if font.underline is not None:
+                self.underline = font.underline
+
+            # Handle color - both RGB and theme colors
+            solid_fill = rPr.find(f"{ns}solidFill")
+            if solid_fill is not None:
+                srgb = solid_fill.find(f"{ns}srgbClr")
+                scheme = solid_fill.find(f"{ns}schemeClr")
+                if srgb is not None:
+                    self.color = str(RGBColor.from_string(srgb.get("val")))
+                elif scheme is not None:
+                    self.theme_color = MSO_THEME_COLOR.from_xml(scheme.get("val")).name
 
         # Add line spacing if set
-        if hasattr(paragraph, "line_spacing") and paragraph.line_spacing is not None:
+        if pPr is not None and paragraph.line_spacing is not None:
             if hasattr(paragraph.line_spacing, "pt"):
                 self.line_spacing = round(paragraph.line_spacing.pt, 2)
             else:
@@ -280,67 +294,16 @@ class ShapeData:
     def get_font_path(font_name: str) -> Optional[str]:
         """Get the font file path for a given font name.
 
+        Lookups go through the process-wide font index (see build_font_index),
+        so font directories are scanned only once.
+
         Args:
             font_name: Name of the font (e.g., 'Arial', 'Calibri')
 
         Returns:
             Path to the font file, or None if not found
         """
-        system = platform.system()
-
-        # Common font file variations to try
-        font_variations = [
-            font_name,
-            font_name.lower(),
-            font_name.replace(" ", ""),
-            font_name.replace(" ", "-"),
-        ]
-
-        # Define font directories and extensions by platform
-        if system == "Darwin":  # macOS
-            font_dirs = [
-                "/System/Library/Fonts/",
-                "/Library/Fonts/",
-                "~/Library/Fonts/",
-            ]
-            extensions = [".ttf", ".otf", ".ttc", ".dfont"]
-        else:  # Linux
-            font_dirs = [
-                "/usr/share/fonts/truetype/",
-                "/usr/local/share/fonts/",
-                "~/.fonts/",
-            ]
-            extensions = [".ttf", ".otf"]
-
-        # Try to find the font file
-        from pathlib import Path
-
-        for font_dir in font_dirs:
-            font_dir_path = Path(font_dir).expanduser()
-            if not font_dir_path.exists():
-                continue
-
-            # First try exact matches
-            for variant in font_variations:
-                for ext in extensions:
-                    font_path = font_dir_path / f"{variant}{ext}"
-                    if font_path.exists():
-                        return str(font_path)
-
-            # Then try fuzzy matching - find files containing the font name
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
-
-        return None
+        return find_font_path(font_name)
 
     @staticmethod
     def get_slide_dimensions(slide: Any) -> tuple[Optional[int], Optional[int]]:
@@ -531,28 +494,34 @@ class ShapeData:
             self.inches_to_pixels(usable_height),
         )
 
-    def _wrap_text_line(self, line: str, max_width_px: int, draw, font) -> List[str]:
+    def _wrap_text_line(self, line: str, max_width_px: int, font) -> List[str]:
         """Wrap a single line of text to fit within max_width_px."""
         if not line:
             return [""]
 
-        # Use textlength for efficient width calculation
-        if draw.textlength(line, font=font) <= max_width_px:
+        if text_width(font, line) <= max_width_px:
             return [line]
 
-        # Need to wrap - split into words
+        # Need to wrap - split into words. The width of each candidate line is
+        # extended from the current line's width instead of re-measuring it.
+        additive = is_additive(font)
         wrapped = []
-        words = line.split(" ")
         current_line = ""
+        current_width = 0.0
 
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= max_width_px:
-                current_line = test_line
+        for word in line.split(" "):
+            piece = (" " if current_line else "") + word
+            test_line = current_line + piece
+            if additive:
+                test_width = joined_width(font, current_line, current_width, piece)
+            else:
+                test_width = font.getlength(test_line)
+            if test_width <= max_width_px:
+                current_line, current_width = test_line, test_width
             else:
                 if current_line:
                     wrapped.append(current_line)
-                current_line = word
+                current_line, current_width = word, text_width(font, word)
 
         if current_line:
             wrapped.append(current_line)
@@ -573,10 +542,6 @@ class ShapeData:
         if usable_width_px <= 0 or usable_height_px <= 0:
             return
 
-        # Set up PIL for text measurement
-        dummy_img = Image.new("RGB", (1, 1))
-        draw = ImageDraw.Draw(dummy_img)
-
         # Get default font size from placeholder or use conservative estimate
         default_font_size = self._get_default_font_size()
 
@@ -593,20 +558,12 @@ class ShapeData:
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
-            font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
+            font = load_font(self.get_font_path(font_name), font_size)
 
             # Wrap all lines in this paragraph
             all_wrapped_lines = []
             for line in paragraph.text.split("\n"):
-                wrapped = self._wrap_text_line(line, usable_width_px, draw, font)
+                wrapped = self._wrap_text_line(line, usable_width_px, font)
                 all_wrapped_lines.extend(wrapped)
 
             if all_wrapped_lines:
@@ -739,6 +696,128 @@ class ShapeData:
         return result
 
 
+@lru_cache(maxsize=None)
+def build_font_index() -> Tuple[Dict[str, str], Tuple[Tuple[str, str], ...]]:
+    """Scan the font directories once and index every font file.
+
+    Returns:
+        Tuple of (stem_map, files) where stem_map maps a file stem (as-is and
+        lowercased) to its path, and files lists (lowercased file name, path)
+        pairs in scan order for substring matching
+    """
+    stem_map: Dict[str, str] = {}
+    files: List[Tuple[str, str]] = []
+
+    for font_dir in FONT_DIRS:
+        font_dir_path = Path(font_dir).expanduser()
+        if not font_dir_path.is_dir():
+            continue
+        try:
+            candidates = sorted(font_dir_path.rglob("*"))
+        except (OSError, PermissionError):
+            continue
+        for file_path in candidates:
+            name_lower = file_path.name.lower()
+            if not name_lower.endswith(FONT_EXTENSIONS) or not file_path.is_file():
+                continue
+            path_str = str(file_path)
+            stem_map.setdefault(file_path.stem, path_str)
+            stem_map.setdefault(file_path.stem.lower(), path_str)
+            files.append((name_lower, path_str))
+
+    return stem_map, tuple(files)
+
+
+@lru_cache(maxsize=None)
+def find_font_path(font_name: str) -> Optional[str]:
+    """Resolve a font name to a font file through the font index.
+
+    Tries exact file-name matches for common name variants first, then any
+    file whose name contains the font name without spaces.
+
+    Args:
+        font_name: Name of the font (e.g., 'Arial', 'Calibri')
+
+    Returns:
+        Path to the font file, or None if not found
+    """
+    stem_map, files = build_font_index()
+
+    # Common font file variations to try
+    font_variations = [
+        font_name,
+        font_name.lower(),
+        font_name.replace(" ", ""),
+        font_name.replace(" ", "-"),
+    ]
+    for variant in font_variations:
+        if variant in stem_map:
+            return stem_map[variant]
+
+    # Then try fuzzy matching - find files containing the font name
+    font_name_lower = font_name.lower().replace(" ", "")
+    for file_name_lower, path in files:
+        if font_name_lower in file_name_lower:
+            return path
+
+    return None
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(font_path: Optional[str], size: int) -> Any:
+    """Load a font at the given size, reusing fonts that were already loaded.
+
+    Args:
+        font_path: Path to the font file, or None for PIL's default font
+        size: Font size in points
+
+    Returns:
+        PIL ImageFont, falling back to the default font if loading fails
+    """
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size=size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=TEXT_WIDTH_CACHE_SIZE)
+def text_width(font: Any, text: str) -> float:
+    """Measure the advance width of text in pixels, memoized per font."""
+    return font.getlength(text)
+
+
+def is_additive(font: Any) -> bool:
+    """Check whether joined text can be measured from the widths of its pieces.
+
+    With Pillow's basic layout a string's width is the sum of its glyph
+    advances plus pair kerning between neighbouring glyphs, so joining two
+    pieces only adds the kerning across the seam. Complex shaping (raqm) and
+    bitmap fonts are always measured in full.
+    """
+    return getattr(font, "layout_engine", None) == ImageFont.Layout.BASIC
+
+
+def joined_width(font: Any, left: str, left_width: float, right: str) -> float:
+    """Width of left + right, given the already measured width of left.
+
+    Args:
+        font: PIL font using the basic layout (see is_additive)
+        left: Text on the left of the seam
+        left_width: Width of left in pixels
+        right: Text appended to left
+
+    Returns:
+        Width of the joined text in pixels
+    """
+    width = left_width + text_width(font, right)
+    if left and right:
+        a, b = left[-1], right[0]
+        width += text_width(font, a + b) - text_width(font, a) - text_width(font, b)
+    return width
+
+
 def is_valid_shape(shape: BaseShape) -> bool:
     """Check if a shape contains meaningful text content."""
     # Must have a text frame with content
@@ -888,27 +967,28 @@ def detect_overlaps(shapes: List[ShapeData]) -> None:
     Args:
         shapes: List of ShapeData objects with shape_id attributes set
     """
-    n = len(shapes)
-
-    # Compare each pair of shapes
-    for i in range(n):
-        for j in range(i + 1, n):
-            shape1 = shapes[i]
-            shape2 = shapes[j]
+    for i, shape in enumerate(shapes):
+        # Ensure shape IDs are set
+        assert shape.shape_id, f"Shape at index {i} has no shape_id"
 
-            # Ensure shape IDs are set
-            assert shape1.shape_id, f"Shape at index {i} has no shape_id"
-            assert shape2.shape_id, f"Shape at index {j} has no shape_id"
+    # Sweep-line search for candidate pairs; pairs come back in the same (i, j)
+    # order the pairwise comparison used, so overlap dicts keep their order
+    boxes = [
+        (s.left, s.top, s.left + s.width, s.top + s.height) for s in shapes
+    ]
+    for i, j in overlapping_pairs(boxes, tolerance=0.05):
+        shape1 = shapes[i]
+        shape2 = shapes[j]
 
-            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
-            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
+        rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
+        rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
 
-            overlaps, overlap_area = calculate_overlap(rect1, rect2)
+        overlaps, overlap_area = calculate_overlap(rect1, rect2)
 
-            if overlaps:
-                # Add shape IDs with overlap area in square inches
-                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
-                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+        if overlaps:
+            # Add shape IDs with overlap area in square inches
+            shape1.overlapping_shapes[shape2.shape_id] = overlap_area
+            shape2.overlapping_shapes[shape1.shape_id] = overlap_area
 
 
 def extract_text_inventory(
@@ -974,6 +1054,43 @@ def extract_text_inventory(
     return inventory
 
 
+def remeasure_shapes(
+    inventory: InventoryData, shape_keys: Dict[str, List[str]]
+) -> InventoryData:
+    """Re-measure selected shapes of an inventory after their text changed.
+
+    Works on the live shapes of the loaded presentation without modifying it,
+    so it can run between editing and saving. Only the listed shapes are
+    measured again; they keep their shape IDs, and shapes left without text
+    are dropped as extract_text_inventory would. Overlaps are not recomputed.
+
+    Args:
+        inventory: Inventory from extract_text_inventory
+        shape_keys: Dict of slide_key -> list of shape_keys to re-measure
+
+    Returns:
+        Inventory holding fresh ShapeData for the re-measured shapes only
+    """
+    updated: InventoryData = {}
+    for slide_key, keys in shape_keys.items():
+        shapes: Dict[str, ShapeData] = {}
+        for shape_key in keys:
+            previous = inventory[slide_key][shape_key]
+            if not is_valid_shape(previous.shape):
+                continue
+            shape_data = ShapeData(
+                previous.shape,
+                previous.left_emu,
+                previous.top_emu,
+                previous.shape.part.slide,
+            )
+            shape_data.shape_id = shape_key
+            shapes[shape_key] = shape_data
+        if shapes:
+            updated[slide_key] = shapes
+    return updated
+
+
 def get_inventory_as_dict(pptx_path: Path, issues_only: bool = False) -> InventoryDict:
     """Extract text inventory and return as JSON-serializable dictionaries.
 
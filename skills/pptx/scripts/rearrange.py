@@ -162,6 +162,24 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
     else:
         prs = Presentation(template_path)
 
+    rearrange_slides(prs, slide_sequence)
+
+    # Save the presentation
+    prs.save(output_path)
+    print(f"\nSaved rearranged presentation to: {output_path}")
+    print(f"Final presentation has {len(prs.slides)} slides")
+
+
+def rearrange_slides(prs, slide_sequence, verbose=True):
+    """
+    Rearrange the slides of a loaded presentation in place.
+
+    Args:
+        prs: Presentation to modify
+        slide_sequence: List of slide indices (0-based) to include, in order
+        verbose: If True, print progress for each step
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
     total_slides = len(prs.slides)
 
     # Validate indices
@@ -174,18 +192,18 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
     duplicated = {}  # Track duplicates: original_idx -> [duplicate_indices]
 
     # Step 1: DUPLICATE repeated slides
-    print(f"Processing {len(slide_sequence)} slides from template...")
+    log(f"Processing {len(slide_sequence)} slides from template...")
     for i, template_idx in enumerate(slide_sequence):
         if template_idx in duplicated and duplicated[template_idx]:
             # Already duplicated this slide, use the duplicate
             slide_map.append(duplicated[template_idx].pop(0))
-            print(f"  [{i}] Using duplicate of slide {template_idx}")
+            log(f"  [{i}] Using duplicate of slide {template_idx}")
         elif slide_sequence.count(template_idx) > 1 and template_idx not in duplicated:
             # First occurrence of a repeated slide - create duplicates
             slide_map.append(template_idx)
             duplicates = []
             count = slide_sequence.count(template_idx) - 1
-            print(
+            log(
                 f"  [{i}] Using original slide {template_idx}, creating {count} duplicate(s)"
             )
             for _ in range(count):
@@ -195,11 +213,11 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
         else:
             # Unique slide or first occurrence already handled, use original
             slide_map.append(template_idx)
-            print(f"  [{i}] Using original slide {template_idx}")
+            log(f"  [{i}] Using original slide {template_idx}")
 
     # Step 2: DELETE unwanted slides (work backwards)
     slides_to_keep = set(slide_map)
-    print(f"\nDeleting {len(prs.slides) - len(slides_to_keep)} unused slides...")
+    log(f"\nDeleting {len(prs.slides) - len(slides_to_keep)} unused slides...")
     for i in range(len(prs.slides) - 1, -1, -1):
         if i not in slides_to_keep:
             delete_slide(prs, i)
@@ -207,7 +225,7 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
             slide_map = [idx - 1 if idx > i else idx for idx in slide_map]
 
     # Step 3: REORDER to final sequence
-    print(f"Reordering {len(slide_map)} slides to final sequence...")
+    log(f"Reordering {len(slide_map)} slides to final sequence...")
     for target_pos in range(len(slide_map)):
         # Find which slide should be at target_pos
         current_pos = slide_map[target_pos]
@@ -221,11 +239,6 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
                     slide_map[i] += 1
             slide_map[target_pos] = target_pos
 
-    # Save the presentation
-    prs.save(output_path)
-    print(f"\nSaved rearranged presentation to: {output_path}")
-    print(f"Final presentation has {len(prs.slides)} slides")
-
 
 if __name__ == "__main__":
     main()
@@ -12,9 +12,9 @@ unless "paragraphs" is specified in the replacements for that shape.
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from inventory import InventoryData, extract_text_inventory
+from inventory import InventoryData, extract_text_inventory, remeasure_shapes
 from pptx import Presentation
 from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
@@ -221,13 +221,49 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     # Pass prs to use same Presentation instance
     inventory = extract_text_inventory(Path(pptx_file), prs)
 
-    # Detect text overflow in original presentation
-    original_overflow = detect_frame_overflow(inventory)
-
     # Load replacement data with duplicate key detection
     with open(json_file, "r") as f:
         replacements = json.load(f, object_pairs_hook=check_duplicate_keys)
 
+    stats = fill_presentation(prs, inventory, replacements)
+
+    # Save the presentation
+    prs.save(output_file)
+
+    # Report results
+    print(f"Saved updated presentation to: {output_file}")
+    print(f"Processed {len(prs.slides)} slides")
+    print(f"  - Shapes processed: {stats['processed']}")
+    print(f"  - Shapes cleared: {stats['cleared']}")
+    print(f"  - Shapes replaced: {stats['replaced']}")
+
+
+def fill_presentation(
+    prs: Any,
+    inventory: InventoryData,
+    replacements: Dict,
+    original_overflow: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Dict[str, int]:
+    """Apply replacements to a loaded presentation and check the result.
+
+    Args:
+        prs: Presentation to modify in place
+        inventory: Inventory of prs from extract_text_inventory
+        replacements: Replacement data keyed by slide and shape
+        original_overflow: Overflow of the unmodified shapes, as returned by
+            detect_frame_overflow(inventory); computed if not given
+
+    Returns:
+        Dict with counts of shapes 'processed', 'cleared' and 'replaced'
+
+    Raises:
+        ValueError: If replacements name unknown shapes, or the result has
+            worse text overflow or formatting warnings
+    """
+    # Detect text overflow in original presentation
+    if original_overflow is None:
+        original_overflow = detect_frame_overflow(inventory)
+
     # Validate replacements
     errors = validate_replacements(inventory, replacements)
     if errors:
@@ -244,6 +280,7 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     shapes_processed = 0
     shapes_cleared = 0
     shapes_replaced = 0
+    replaced_keys: Dict[str, List[str]] = {}
 
     # Process each slide from inventory
     for slide_key, shapes_dict in inventory.items():
@@ -278,6 +315,7 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
                 continue
 
             shapes_replaced += 1
+            replaced_keys.setdefault(slide_key, []).append(shape_key)
 
             # Add replacement paragraphs
             for i, para_data in enumerate(replacement_shape_data["paragraphs"]):
@@ -289,19 +327,11 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
                 apply_paragraph_properties(p, para_data)
 
     # Check for issues after replacements
-    # Save to a temporary file and reload to avoid modifying the presentation during inventory
-    # (extract_text_inventory accesses font.color which adds empty <a:solidFill/> elements)
-    import tempfile
-
-    with tempfile.NamedTemporaryFile(suffix=".pptx", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-        prs.save(str(tmp_path))
-
-    try:
-        updated_inventory = extract_text_inventory(tmp_path)
-        updated_overflow = detect_frame_overflow(updated_inventory)
-    finally:
-        tmp_path.unlink()  # Clean up temp file
+    # Only shapes that received new text are measured again. Every other
+    # inventory shape was cleared, so a fresh inventory of the saved file would
+    # drop it too. Measuring does not modify the presentation.
+    updated_inventory = remeasure_shapes(inventory, replaced_keys)
+    updated_overflow = detect_frame_overflow(updated_inventory)
 
     # Check if any text overflow got worse
     overflow_errors = []
@@ -342,15 +372,11 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
             f"Found {len(overflow_errors)} overflow error(s) and {len(warnings)} warning(s)"
         )
 
-    # Save the presentation
-    prs.save(output_file)
-
-    # Report results
-    print(f"Saved updated presentation to: {output_file}")
-    print(f"Processed {len(prs.slides)} slides")
-    print(f"  - Shapes processed: {shapes_processed}")
-    print(f"  - Shapes cleared: {shapes_cleared}")
-    print(f"  - Shapes replaced: {shapes_replaced}")
+    return {
+        "processed": shapes_processed,
+        "cleared": shapes_cleared,
+        "replaced": shapes_replaced,
+    }
 
 
 def main():
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import replace
+from inventory import extract_text_inventory, remeasure_shapes
+from pptx import Presentation
+from pptx.util import Inches
+from replace import fill_presentation
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestFillPresentation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "deck.pptx"
+        prs = Presentation()
+        for n in range(2):
+            slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank
+            for i in range(3):
+                box = slide.shapes.add_textbox(Inches(1), Inches(1 + i * 1.5), Inches(4), Inches(1))
+                box.text_frame.text = f"Slide {n} box {i}"
+        prs.save(str(self.path))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fill(self, replacements):
+        prs = Presentation(str(self.path))
+        inventory = extract_text_inventory(self.path, prs)
+        with mock.patch.object(replace, "remeasure_shapes", wraps=remeasure_shapes) as remeasure:
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = fill_presentation(prs, inventory, replacements)
+        return inventory, remeasure.call_args.args[1], stats
+
+    def test_only_replaced_shapes_are_remeasured(self):
+        """Test shapes that were only cleared are not measured again"""
+        inventory = extract_text_inventory(self.path, Presentation(str(self.path)))
+        first = next(iter(inventory["slide-1"]))
+        paragraphs = {"paragraphs": [{"text": "New text"}]}
+        _, remeasured, stats = self.fill({"slide-1": {first: paragraphs}})
+        self.assertEqual(remeasured, {"slide-1": [first]})
+        self.assertEqual(stats, {"processed": 6, "cleared": 6, "replaced": 1})
+
+    def test_overflow_of_replaced_shape_is_reported(self):
+        """Test a replaced shape that now overflows still fails the fill"""
+        inventory = extract_text_inventory(self.path, Presentation(str(self.path)))
+        first = next(iter(inventory["slide-0"]))
+        long_text = {"paragraphs": [{"text": "Overflowing line " * 40, "font_size": 40}]}
+        with self.assertRaisesRegex(ValueError, "overflow"):
+            self.fill({"slide-0": {first: long_text}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Slide-level render cache for thumbnail.py.
+
+Each slide gets a key hashed from everything that can change how it renders:
+the slide XML, its relationships, and every part reachable from it (layout,
+master, theme, images, charts, ...), plus the presentation-wide settings in
+presentation.xml. Notes, comments and links to other slides are ignored. A
+slide that shows a slide number field also hashes its position in the deck.
+
+Thumbnails are stored as PNG files named after their key, so unchanged slides
+are reused across runs and across decks. The cache is kept under a size limit
+by deleting the least recently used thumbnails (see SlideCache.prune).
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from xml.etree import ElementTree
+
+from PIL import Image
+
+CACHE_VERSION = "1"  # Bump to invalidate all cached thumbnails
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "pptx-thumbnail-cache"
+DEFAULT_CACHE_MB = 200  # Size limit of the cache directory
+
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+PRESENTATION_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+OFFICE_REL_NS = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+)
+
+# Relationship types that do not affect how a slide renders
+IGNORED_REL_TYPES = ("/slide", "/notesSlide", "/comments", "/commentAuthors")
+
+SLIDE_LIST = re.compile(rb"<p:sldIdLst>.*?</p:sldIdLst>|<p:sldIdLst/>", re.DOTALL)
+SLIDE_ROOT = re.compile(rb"(<(?:[\w.-]+:)?sld)\b[^>]*>")  # Any namespace prefix
+SHOW_ATTR = re.compile(rb'\sshow="[^"]*"')
+
+
+def rels_path(part: str) -> str:
+    """Return the relationships part name for a package part."""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def resolve_target(folder: str, target: str) -> str:
+    """Resolve a relationship target against the folder of its source part."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(folder, target))
+
+
+def related_parts(zf: zipfile.ZipFile, part: str) -> List[str]:
+    """List internal parts the given part relates to, skipping ignored types."""
+    try:
+        root = ElementTree.fromstring(zf.read(rels_path(part)))
+    except KeyError:
+        return []
+
+    targets = []
+    folder = posixpath.dirname(part)
+    for rel in root.iter(f"{REL_NS}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        if rel.get("Type", "").endswith(IGNORED_REL_TYPES):
+            continue
+        targets.append(resolve_target(folder, rel.get("Target", "")))
+    return targets
+
+
+def slide_parts(zf: zipfile.ZipFile) -> List[str]:
+    """Return slide part names in presentation order."""
+    pres = ElementTree.fromstring(zf.read("ppt/presentation.xml"))
+    rels = ElementTree.fromstring(zf.read(rels_path("ppt/presentation.xml")))
+    targets = {
+        rel.get("Id"): resolve_target("ppt", rel.get("Target", ""))
+        for rel in rels.iter(f"{REL_NS}Relationship")
+    }
+    return [
+        targets[sld_id.get(f"{OFFICE_REL_NS}id")]
+        for sld_id in pres.iter(f"{PRESENTATION_NS}sldId")
+    ]
+
+
+def slide_render_keys(pptx_path: Path, salt: str = "") -> List[str]:
+    """Compute one render cache key per slide, in presentation order.
+
+    Args:
+        pptx_path: Path to the PowerPoint file
+        salt: Extra text mixed into every key, e.g. thumbnail width and renderer
+
+    Returns:
+        List of hex digests, one per slide
+    """
+    part_hashes: Dict[str, Optional[bytes]] = {}
+    part_has_slidenum: Dict[str, bool] = {}
+
+    def part_hash(zf: zipfile.ZipFile, part: str) -> Optional[bytes]:
+        if part not in part_hashes:
+            try:
+                data = zf.read(part)
+            except KeyError:
+                part_hashes[part] = None
+                return None
+            rels = zf.read(rels_path(part)) if rels_path(part) in names else b""
+            part_hashes[part] = hashlib.sha256(data + b"\0" + rels).digest()
+            part_has_slidenum[part] = b'type="slidenum"' in data
+        return part_hashes[part]
+
+    with zipfile.ZipFile(pptx_path) as zf:
+        names = set(zf.namelist())
+        settings = SLIDE_LIST.sub(b"", zf.read("ppt/presentation.xml"))
+        base = hashlib.sha256(
+            CACHE_VERSION.encode() + b"\0" + salt.encode() + b"\0" + settings
+        ).digest()
+
+        keys = []
+        for position, slide in enumerate(slide_parts(zf), start=1):
+            # Walk every part reachable from the slide
+            seen: Set[str] = set()
+            stack = [slide]
+            while stack:
+                part = stack.pop()
+                if part in seen:
+                    continue
+                seen.add(part)
+                if part_hash(zf, part) is not None and part.endswith(".xml"):
+                    stack.extend(related_parts(zf, part))
+
+            h = hashlib.sha256(base)
+            for part in sorted(seen):
+                h.update(part.encode() + b"\0" + (part_hashes[part] or b"-"))
+            if any(part_has_slidenum.get(part) for part in seen):
+                h.update(b"position:%d" % position)
+            keys.append(h.hexdigest())
+
+    return keys
+
+
+def write_partial_deck(pptx_path: Path, render_slides: Set[int], output_path: Path):
+    """Copy a deck with every slide except render_slides marked hidden.
+
+    Hidden slides are left out of PDF export but keep their place in the deck,
+    so slide numbers on the remaining slides are unchanged.
+
+    Args:
+        pptx_path: Path to the source PowerPoint file
+        render_slides: 1-based positions of the slides to keep visible
+        output_path: Where to write the copy
+    """
+    with zipfile.ZipFile(pptx_path) as src:
+        hide = {
+            part
+            for position, part in enumerate(slide_parts(src), start=1)
+            if position not in render_slides
+        }
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                data = src.read(item.filename)
+                if item.filename in hide:
+                    data = SLIDE_ROOT.sub(hide_slide_root, data, count=1)
+                dst.writestr(item, data)
+
+
+def hide_slide_root(match: "re.Match[bytes]") -> bytes:
+    """Set show="0" on a <p:sld> start tag."""
+    name = match.group(1)
+    return name + b' show="0"' + SHOW_ATTR.sub(b"", match.group(0)[len(name):])
+
+
+class SlideCache:
+    """Directory of rendered slide thumbnails, keyed by slide render key."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_CACHE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        """Load a cached thumbnail, or return None if there is none."""
+        path = self.path(key)
+        try:
+            with Image.open(path) as img:
+                image = img.convert("RGB")
+            os.utime(path)  # Mark as recently used for prune()
+            return image
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, image: Image.Image) -> None:
+        """Store a thumbnail, replacing any previous file atomically."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        image.save(tmp_path, "PNG")
+        os.replace(tmp_path, path)
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def prune(self) -> int:
+        """Delete the least recently used thumbnails until the cache fits max_bytes.
+
+        Returns:
+            Number of thumbnails deleted
+        """
+        entries = []
+        for path in self.cache_dir.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            deleted += 1
+        return deleted
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import pypdfium2 as pdfium
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+from slide_cache import SlideCache, slide_render_keys, write_partial_deck
+from thumbnail import iter_slide_images
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestSlideCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_deck(self, name, texts):
+        prs = Presentation()
+        for text in texts:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank
+            box = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+            box.text_frame.text = text
+        path = self.dir / name
+        prs.save(str(path))
+        return path
+
+    def test_keys_are_stable_across_files(self):
+        """Test identical slides in two saves of a deck get the same keys"""
+        first = slide_render_keys(self.make_deck("a.pptx", ["one", "two"]))
+        second = slide_render_keys(self.make_deck("b.pptx", ["one", "two"]))
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 2)
+
+    def test_only_edited_slide_changes_key(self):
+        """Test editing one slide changes only that slide's key"""
+        before = slide_render_keys(self.make_deck("a.pptx", ["one", "two", "three"]))
+        after = slide_render_keys(self.make_deck("b.pptx", ["one", "TWO", "three"]))
+        self.assertEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+        self.assertEqual(before[2], after[2])
+
+    def test_salt_changes_every_key(self):
+        """Test a different render setting invalidates every key"""
+        deck = self.make_deck("a.pptx", ["one", "two"])
+        plain = slide_render_keys(deck)
+        salted = slide_render_keys(deck, salt="width=600")
+        self.assertTrue(all(a != b for a, b in zip(plain, salted)))
+
+    def test_partial_deck_hides_other_slides(self):
+        """Test only the requested slides stay visible in the partial deck"""
+        deck = self.make_deck("a.pptx", ["one", "two", "three"])
+        partial = self.dir / "partial.pptx"
+        write_partial_deck(deck, {2}, partial)
+        with zipfile.ZipFile(partial) as zf:
+            shown = [b'show="0"' not in zf.read(f"ppt/slides/slide{n}.xml") for n in (1, 2, 3)]
+        self.assertEqual(shown, [False, True, False])
+        self.assertEqual(len(Presentation(str(partial)).slides), 3)
+
+    def test_cache_round_trip(self):
+        """Test a stored thumbnail is returned for its key and missing keys give None"""
+        cache = SlideCache(self.dir / "cache")
+        image = Image.new("RGB", (30, 20), color="#336699")
+        self.assertIsNone(cache.get("ab" * 32))
+        cache.put("ab" * 32, image)
+        self.assertIn("ab" * 32, cache)
+        loaded = cache.get("ab" * 32)
+        self.assertEqual(loaded.size, (30, 20))
+        self.assertEqual(loaded.getpixel((0, 0)), (0x33, 0x66, 0x99))
+
+    def test_prune_drops_least_recently_used(self):
+        """Test pruning deletes the oldest thumbnails first and keeps recently read ones"""
+        image = Image.frombytes("RGB", (64, 64), os.urandom(64 * 64 * 3))
+        keys = [f"{n:02x}" * 32 for n in range(4)]
+        cache = SlideCache(self.dir / "cache")
+        for age, key in enumerate(keys):
+            cache.put(key, image)
+            os.utime(cache.path(key), (1000 + age, 1000 + age))
+        cache.get(keys[0])  # Reading a thumbnail marks it as recently used
+        cache.max_bytes = 2 * cache.path(keys[0]).stat().st_size
+        self.assertEqual(cache.prune(), 2)
+        self.assertEqual([key in cache for key in keys], [True, False, False, True])
+
+    def test_page_count_mismatch_caches_nothing(self):
+        """Test a rendered PDF without one page per slide is rejected before caching"""
+        pdf_path = self.dir / "partial.pdf"
+        pdf = pdfium.PdfDocument.new()
+        for _ in range(3):
+            pdf.new_page(200, 100)
+        pdf.save(str(pdf_path))
+        pdf.close()
+        cache = SlideCache(self.dir / "cache")
+        keys = [f"{n:02x}" * 32 for n in range(2)]
+        images = iter_slide_images(pdf_path, 2, set(), [1, 2], 50, (200, 100), 1, cache, keys)
+        with self.assertRaises(RuntimeError):
+            next(images)
+        self.assertFalse(any(key in cache for key in keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
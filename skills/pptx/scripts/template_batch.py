@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Render many presentations from one template.
+
+Usage:
+    python template_batch.py template.pptx jobs.json [--workers N]
+
+jobs.json is a list of jobs, each producing one output file:
+    [
+      {"output": "out/alice.pptx", "replacements": "alice.json"},
+      {"output": "out/bob.pptx", "slides": [0, 3, 3, 5], "replacements": {...}}
+    ]
+
+"slides" is optional and works like rearrange.py (0-based template indices,
+repeats allowed). "replacements" is a replacement JSON as used by replace.py,
+given inline or as a path, with slide keys referring to the rearranged deck.
+
+The template file is parsed and inventoried once per process. Each job works
+on a fork cloned from the parsed template (see clone_presentation): XML parts
+are deep copies private to the fork, while media parts (images, fonts,
+embedded files) reuse the template's bytes instead of holding their own copies.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from inventory import InventoryData, extract_text_inventory
+from pptx import Presentation
+from pptx.opc.package import XmlPart, _Relationship
+from rearrange import rearrange_slides
+from replace import check_duplicate_keys, detect_frame_overflow, fill_presentation
+
+# Template loaded once per worker process (see _init_worker)
+_WORKER_BATCH: Optional["TemplateBatch"] = None
+
+
+class TemplateBatch:
+    """A template presentation parsed once and forked for each output."""
+
+    def __init__(self, template_path: Path):
+        """Load and inventory the template.
+
+        Args:
+            template_path: Path to the template PPTX file
+        """
+        self.template_path = Path(template_path)
+        self.template = Presentation(str(self.template_path))
+        # The inventory does not modify the presentation, so it stays pristine
+        self.inventory = extract_text_inventory(self.template_path, self.template)
+        self.overflow = detect_frame_overflow(self.inventory)
+
+        # Path of each inventoried shape through the slide's shape tree (index
+        # in slide.shapes, then in each enclosing group), so the same shape can
+        # be found again in a fork. Duplicated slides keep their shape order
+        # but not the rest of the spTree, so positions in the XML would not do.
+        self._shape_paths: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        for slide_key, shapes in self.inventory.items():
+            slide = self.template.slides[int(slide_key.split("-")[1])]
+            paths = shape_paths(slide)
+            self._shape_paths[slide_key] = {
+                shape_key: paths[shape_data.shape.element]
+                for shape_key, shape_data in shapes.items()
+            }
+
+    def fork(
+        self, slide_sequence: Optional[List[int]] = None
+    ) -> Tuple[Any, InventoryData, Dict[str, Dict[str, float]]]:
+        """Create an independent copy of the template, optionally rearranged.
+
+        Args:
+            slide_sequence: Optional list of template slide indices, as for
+                rearrange.py
+
+        Returns:
+            Tuple of (presentation, inventory, original_overflow) for the fork,
+            keyed by the fork's slide positions
+        """
+        prs = clone_presentation(self.template)
+        if slide_sequence is None:
+            slide_sequence = list(range(len(prs.slides)))
+        else:
+            rearrange_slides(prs, slide_sequence, verbose=False)
+
+        inventory: InventoryData = {}
+        overflow: Dict[str, Dict[str, float]] = {}
+        for position, template_idx in enumerate(slide_sequence):
+            template_key = f"slide-{template_idx}"
+            if template_key not in self.inventory:
+                continue
+            slide = prs.slides[position]
+            slide_key = f"slide-{position}"
+            inventory[slide_key] = {}
+            for shape_key, shape_data in self.inventory[template_key].items():
+                # Measurements carry over; only the shape reference changes
+                forked = copy.copy(shape_data)
+                forked.shape = shape_at(
+                    slide, self._shape_paths[template_key][shape_key]
+                )
+                inventory[slide_key][shape_key] = forked
+            if template_key in self.overflow:
+                overflow[slide_key] = self.overflow[template_key]
+        return prs, inventory, overflow
+
+    def render(
+        self,
+        output_path: Path,
+        replacements: Dict,
+        slide_sequence: Optional[List[int]] = None,
+    ) -> Dict[str, int]:
+        """Fill a fork of the template and save it.
+
+        Args:
+            output_path: Path for the output PPTX file
+            replacements: Replacement data as used by replace.py
+            slide_sequence: Optional slide order, as for rearrange.py
+
+        Returns:
+            Replacement statistics from fill_presentation
+
+        Raises:
+            ValueError: If the replacements are invalid or cause issues
+        """
+        prs, inventory, overflow = self.fork(slide_sequence)
+        stats = fill_presentation(prs, inventory, replacements, overflow)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        prs.save(str(output_path))
+        return stats
+
+
+def clone_presentation(prs: Any) -> Any:
+    """Copy a loaded presentation without reading or parsing its package again.
+
+    Deep-copying the Presentation itself is not safe: python-pptx caches proxy
+    objects for inner elements, which deepcopy detaches from their parts. So
+    the part graph is rebuilt instead, the way python-pptx loads a package.
+
+    Args:
+        prs: Presentation to copy; it is not modified
+
+    Returns:
+        An independent Presentation. XML parts hold deep copies of the
+        original element trees; other parts (images, fonts, embedded files)
+        are new part objects around the original, immutable bytes.
+    """
+    source = prs.part.package
+    package = type(source)(None)
+    parts = {}
+    source_parts = list(source.iter_parts())
+    for part in source_parts:
+        if isinstance(part, XmlPart):
+            parts[part] = type(part)(
+                part.partname, part.content_type, package, copy.deepcopy(part._element)
+            )
+        else:
+            parts[part] = type(part).load(
+                part.partname, part.content_type, package, part.blob
+            )
+
+    # Same relationships, pointing at the copies
+    _copy_rels(source._rels, package._rels, parts)
+    for part in source_parts:
+        _copy_rels(part.rels, parts[part]._rels, parts)
+    return package.main_document_part.presentation
+
+
+def _copy_rels(source_rels: Any, rels: Any, parts: Dict[Any, Any]) -> None:
+    """Add each relationship of source_rels to rels, retargeted through parts."""
+    for rId, rel in source_rels.items():
+        target = rel.target_ref if rel.is_external else parts[rel.target_part]
+        rels._rels[rId] = _Relationship(
+            rels._base_uri, rId, rel.reltype, rel._target_mode, target
+        )
+
+
+def shape_paths(slide: Any) -> Dict[Any, Tuple[int, ...]]:
+    """Map each shape element on a slide, including group members, to its path.
+
+    A path is the shape's index in slide.shapes followed by its index within
+    each enclosing group, as understood by shape_at.
+    """
+    paths = {}
+    stack = [((i,), shape) for i, shape in enumerate(slide.shapes)]
+    while stack:
+        path, shape = stack.pop()
+        paths[shape.element] = path
+        if hasattr(shape, "shapes"):  # GroupShape
+            stack.extend((path + (i,), child) for i, child in enumerate(shape.shapes))
+    return paths
+
+
+def shape_at(slide: Any, path: Tuple[int, ...]) -> Any:
+    """Return the shape at a path from shape_paths."""
+    shape = slide.shapes[path[0]]
+    for i in path[1:]:
+        shape = shape.shapes[i]
+    return shape
+
+
+def load_job(job: Dict) -> Tuple[Path, Dict, Optional[List[int]]]:
+    """Normalize a job entry into (output_path, replacements, slide_sequence)."""
+    replacements = job.get("replacements", {})
+    if isinstance(replacements, str):
+        with open(replacements, "r") as f:
+            replacements = json.load(f, object_pairs_hook=check_duplicate_keys)
+    return Path(job["output"]), replacements, job.get("slides")
+
+
+def _init_worker(template_path: Path) -> None:
+    # With fork-based pools the parent's parsed template is inherited as is
+    global _WORKER_BATCH
+    if _WORKER_BATCH is None or _WORKER_BATCH.template_path != Path(template_path):
+        _WORKER_BATCH = TemplateBatch(template_path)
+
+
+def _render_job(job: Dict) -> Tuple[str, Optional[Dict[str, int]], Optional[str]]:
+    # A job that cannot be loaded fails on its own, like one that cannot render
+    output = str(job.get("output", "?")) if isinstance(job, dict) else "?"
+    try:
+        output_path, replacements, slide_sequence = load_job(job)
+        output = str(output_path)
+        stats = _WORKER_BATCH.render(output_path, replacements, slide_sequence)  # type: ignore
+        return output, stats, None
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        return output, None, str(e)
+
+
+def render_batch(
+    template_path: Path, jobs: List[Dict], workers: int = 1
+) -> List[Tuple[str, Optional[Dict[str, int]], Optional[str]]]:
+    """Render every job from one template, in parallel when workers > 1.
+
+    Returns:
+        List of (output_path, stats, error) per job, in job order; error is
+        None on success and stats is None on failure
+    """
+    _init_worker(template_path)
+    if workers <= 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)),
+        initializer=_init_worker,
+        initargs=(Path(template_path),),
+    ) as executor:
+        return list(executor.map(_render_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render many presentations from one template."
+    )
+    parser.add_argument("template", help="Path to template PPTX file")
+    parser.add_argument("jobs", help="JSON file with a list of jobs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel worker processes (default: CPU count)",
+    )
+    args = parser.parse_args()
+
+    template_path = Path(args.template)
+    if not template_path.exists():
+        print(f"Error: Template file not found: {args.template}")
+        sys.exit(1)
+
+    with open(args.jobs, "r") as f:
+        jobs = json.load(f)
+
+    results = render_batch(template_path, jobs, args.workers)
+    failed = 0
+    for output, stats, error in results:
+        if error is None:
+            print(f"Saved {output} ({stats['replaced']} shapes replaced)")  # type: ignore
+        else:
+            failed += 1
+            print(f"FAILED {output}: {error}")
+
+    print(f"Rendered {len(results) - failed} of {len(results)} presentations")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
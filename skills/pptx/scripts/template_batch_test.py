@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from pptx import Presentation
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.opc.package import XmlPart
+from pptx.util import Inches
+from PIL import Image
+from template_batch import TemplateBatch, render_batch
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestTemplateBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+        self.template_path = self.dir / "template.pptx"
+
+        self.image_path = self.dir / "logo.png"
+        Image.new("RGB", (40, 20), color="#336699").save(self.image_path)
+
+        prs = Presentation()
+        layout = prs.slide_layouts[6]  # Blank
+        for n in range(2):
+            slide = prs.slides.add_slide(layout)
+            box = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+            box.text_frame.text = f"Slide {n} title"
+            group = slide.shapes.add_group_shape()
+            inner = group.shapes.add_textbox(Inches(1), Inches(3), Inches(4), Inches(1))
+            inner.text_frame.text = f"Slide {n} grouped"
+            slide.shapes.add_picture(str(self.image_path), Inches(6), Inches(1))
+            # PowerPoint writes a transform into the slide's own group properties;
+            # slides duplicated by rearrange.py start from an empty <p:grpSpPr/>
+            slide.shapes._spTree.grpSpPr.append(parse_xml(
+                f'<a:xfrm {nsdecls("a")}><a:off x="0" y="0"/><a:ext cx="0" cy="0"/>'
+                '<a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm>'
+            ))
+        prs.save(str(self.template_path))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def texts(self, inventory, slide_key):
+        return sorted(data.shape.text_frame.text for data in inventory[slide_key].values())
+
+    def test_fork_keeps_template_order(self):
+        """Test a fork without a slide sequence mirrors the template"""
+        batch = TemplateBatch(self.template_path)
+        prs, inventory, _ = batch.fork()
+        self.assertEqual(len(prs.slides), 2)
+        self.assertEqual(self.texts(inventory, "slide-1"), ["Slide 1 grouped", "Slide 1 title"])
+
+    def test_fork_with_repeated_slide(self):
+        """Test a template slide used twice yields shapes on each copy"""
+        batch = TemplateBatch(self.template_path)
+        prs, inventory, _ = batch.fork([1, 0, 0])
+        self.assertEqual(len(prs.slides), 3)
+        self.assertEqual(self.texts(inventory, "slide-0"), ["Slide 1 grouped", "Slide 1 title"])
+        for position in (1, 2):
+            slide_key = f"slide-{position}"
+            self.assertEqual(self.texts(inventory, slide_key), ["Slide 0 grouped", "Slide 0 title"])
+            slide_part = prs.slides[position].part
+            for data in inventory[slide_key].values():
+                self.assertIs(data.shape.part, slide_part)
+
+    def test_fork_leaves_template_untouched(self):
+        """Test filling a fork does not change the template or other forks"""
+        batch = TemplateBatch(self.template_path)
+        _, first, _ = batch.fork([0, 0])
+        _, second, _ = batch.fork([0])
+        for data in first["slide-1"].values():
+            data.shape.text_frame.text = "changed"
+        self.assertEqual(self.texts(first, "slide-0"), ["Slide 0 grouped", "Slide 0 title"])
+        self.assertEqual(self.texts(second, "slide-0"), ["Slide 0 grouped", "Slide 0 title"])
+        self.assertEqual(self.texts(batch.inventory, "slide-0"), ["Slide 0 grouped", "Slide 0 title"])
+
+    def test_fork_clones_without_rereading_template(self):
+        """Test forks come from the parsed template, not from the template file"""
+        batch = TemplateBatch(self.template_path)
+        self.template_path.unlink()
+        prs, inventory, _ = batch.fork([1, 0])
+        output = self.dir / "out.pptx"
+        prs.save(str(output))
+        saved = Presentation(str(output))
+        self.assertEqual(len(saved.slides), 2)
+        pictures = [shape for shape in saved.slides[0].shapes if shape.shape_type == 13]
+        self.assertEqual(pictures[0].image.blob, self.image_path.read_bytes())
+
+    def test_fork_shares_media_bytes(self):
+        """Test XML parts are private to a fork while media bytes are shared"""
+        batch = TemplateBatch(self.template_path)
+        prs, _, _ = batch.fork()
+        template_parts = {part.partname: part for part in batch.template.part.package.iter_parts()}
+        media = 0
+        for part in prs.part.package.iter_parts():
+            source = template_parts[part.partname]
+            self.assertIsNot(part, source)
+            if isinstance(part, XmlPart):
+                self.assertIsNot(part._element, source._element)
+            else:
+                self.assertIs(part.blob, source.blob)
+                media += 1
+        self.assertGreater(media, 0)
+
+    def test_render_batch_isolates_bad_jobs(self):
+        """Test a job whose replacements cannot be loaded fails on its own"""
+        batch = TemplateBatch(self.template_path)
+        shape_key = next(iter(batch.inventory["slide-0"]))
+        good = {
+            "output": str(self.dir / "good.pptx"),
+            "slides": [0, 0],
+            "replacements": {"slide-1": {shape_key: {"paragraphs": [{"text": "Hello"}]}}},
+        }
+        missing = {"output": str(self.dir / "missing.pptx"), "replacements": str(self.dir / "nope.json")}
+        results = render_batch(self.template_path, [missing, good], workers=1)
+
+        self.assertEqual(results[0][0], missing["output"])
+        self.assertIsNone(results[0][1])
+        self.assertIsNotNone(results[0][2])
+        self.assertIsNone(results[1][2])
+        self.assertEqual(results[1][1]["replaced"], 1)
+        self.assertFalse(os.path.exists(missing["output"]))
+
+        texts = [shape.text_frame.text for shape in Presentation(good["output"]).slides[1].shapes
+                 if shape.has_text_frame]
+        self.assertEqual(texts, ["Hello"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,8 +18,16 @@ Grid limits by column count:
 - 5 cols: max 30 slides per grid (5×6) [default]
 - 6 cols: max 42 slides per grid (6×7)
 
+Slides are rendered straight to thumbnail width, in parallel page ranges, and
+passed to the grid builder in memory. pypdfium2 is used when installed,
+otherwise pdftoppm. Rendered slides are cached by a hash of the slide and
+everything it depends on (see slide_cache.py), so re-running on an edited deck
+only renders the slides that changed. The cache is trimmed to --cache-size MB,
+least recently used thumbnails first.
+
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders] [--workers N]
+                        [--cache-dir DIR] [--cache-size MB] [--no-cache]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -41,21 +49,35 @@ Examples:
 """
 
 import argparse
+import importlib.util
+import os
+import re
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 
 from inventory import extract_text_inventory
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from slide_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MB,
+    SlideCache,
+    slide_render_keys,
+    write_partial_deck,
+)
 
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
-CONVERSION_DPI = 100  # DPI for PDF to image conversion
+CONVERSION_DPI = 100  # Reference DPI that outline and placeholder strokes are sized for
 MAX_COLS = 6  # Maximum number of columns
 DEFAULT_COLS = 5  # Default number of columns
 JPEG_QUALITY = 95  # JPEG compression quality
+RENDER_WORKERS = min(4, os.cpu_count() or 1)  # Default parallel render workers
+PAGES_PER_TASK = 8  # Pages rendered by one worker task
 
 # Grid layout constants
 GRID_PADDING = 20  # Padding between thumbnails
@@ -86,6 +108,29 @@ def main():
         action="store_true",
         help="Outline text placeholders with a colored border",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=RENDER_WORKERS,
+        help=f"Parallel render workers (default: {RENDER_WORKERS})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory for cached slide thumbnails (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_CACHE_MB,
+        help=f"Size limit of the cache in MB, least recently used thumbnails are "
+        f"deleted first (default: {DEFAULT_CACHE_MB})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render every slide without reading or writing the cache",
+    )
 
     args = parser.parse_args()
 
@@ -118,13 +163,24 @@ def main():
                 if placeholder_regions:
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
-            # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
-            if not slide_images:
+            # Convert slides to images, rendered lazily while grids are built
+            cache = (
+                None
+                if args.no_cache
+                else SlideCache(Path(args.cache_dir), args.cache_size)
+            )
+            total_slides, slide_images = convert_to_images(
+                input_path,
+                Path(temp_dir),
+                THUMBNAIL_WIDTH,
+                max(1, args.workers),
+                cache,
+            )
+            if not total_slides:
                 print("Error: No slides found")
                 sys.exit(1)
 
-            print(f"Found {len(slide_images)} slides")
+            print(f"Found {total_slides} slides")
 
             # Create grids (max cols×(cols+1) images per grid)
             grid_files = create_grids(
@@ -141,6 +197,9 @@ def main():
             for grid_file in grid_files:
                 print(f"  - {grid_file}")
 
+            if cache is not None:
+                cache.prune()
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -194,8 +253,17 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
+def convert_to_images(
+    pptx_path, temp_dir, width, workers=RENDER_WORKERS, cache=None
+):
+    """Convert PowerPoint to thumbnail images via PDF, handling hidden slides.
+
+    With a SlideCache, only slides whose render key is not cached yet are
+    converted and rendered; the others are loaded from the cache.
+
+    Returns a tuple of (total_slides, images) where images is an iterator of
+    PIL images, one per slide in order, rendered at the given width.
+    """
     # Detect hidden slides
     print("Analyzing presentation...")
     prs = Presentation(str(pptx_path))
@@ -212,9 +280,55 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
+    visible_slides = [n for n in range(1, total_slides + 1) if n not in hidden_slides]
+    keys = None
+    render_slides = visible_slides
+    if cache is not None:
+        keys = slide_render_keys(pptx_path, f"{width}:{pdf_renderer()}")
+        render_slides = [n for n in visible_slides if keys[n - 1] not in cache]
+        print(
+            f"Cached slides: {len(visible_slides) - len(render_slides)} "
+            f"of {len(visible_slides)}"
+        )
+
+    pdf_path = None
+    if render_slides:
+        deck_path = pptx_path
+        if len(render_slides) < len(visible_slides):
+            # Hide the cached slides so only the changed ones are exported
+            deck_path = temp_dir / pptx_path.name
+            write_partial_deck(pptx_path, set(render_slides), deck_path)
+        pdf_path = convert_to_pdf(deck_path, temp_dir)
+
+    # Hidden slides are drawn at the reference DPI, like a rendered slide
+    placeholder_size = (
+        int((prs.slide_width or 9144000) / 914400.0 * CONVERSION_DPI),
+        int((prs.slide_height or 5143500) / 914400.0 * CONVERSION_DPI),
+    )
+
+    if render_slides:
+        print(
+            f"Rendering {len(render_slides)} slide(s) at {width}px wide "
+            f"with {workers} worker(s)..."
+        )
+    images = iter_slide_images(
+        pdf_path,
+        total_slides,
+        hidden_slides,
+        render_slides,
+        width,
+        placeholder_size,
+        workers,
+        cache,
+        keys,
+    )
+    return total_slides, images
+
+
+def convert_to_pdf(pptx_path, temp_dir):
+    """Convert a PowerPoint file to PDF with LibreOffice and return the PDF path."""
     pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
 
-    # Convert to PDF
     print("Converting to PDF...")
     result = subprocess.run(
         [
@@ -231,55 +345,181 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     )
     if result.returncode != 0 or not pdf_path.exists():
         raise RuntimeError("PDF conversion failed")
+    return pdf_path
+
+
+def iter_slide_images(
+    pdf_path,
+    total_slides,
+    hidden_slides,
+    render_slides,
+    width,
+    placeholder_size,
+    workers,
+    cache=None,
+    keys=None,
+):
+    """Yield one image per slide, with placeholders for hidden slides.
+
+    The PDF only contains the slides in render_slides, so its pages are matched
+    up with those slide numbers in order; newly rendered slides are stored in
+    the cache. Any other visible slide is loaded from the cache. A PDF with a
+    different number of pages cannot be matched up, so it is rejected before
+    anything is cached under the wrong slide's key.
+    """
+    if render_slides:
+        page_count = pdf_page_count(pdf_path)
+        if page_count != len(render_slides):
+            raise RuntimeError(
+                f"Rendered PDF has {page_count} pages for {len(render_slides)} "
+                f"slides, cannot tell which page belongs to which slide"
+            )
+    render_set = set(render_slides)
+    pages = (
+        render_pdf_pages(pdf_path, len(render_slides), width, workers)
+        if render_slides
+        else iter(())
+    )
 
-    # Convert PDF to images
-    print(f"Converting to images at {dpi} DPI...")
+    for slide_num in range(1, total_slides + 1):
+        if slide_num in hidden_slides:
+            yield create_hidden_slide_placeholder(placeholder_size)
+        elif slide_num in render_set:
+            page = next(pages)
+            if cache is not None:
+                cache.put(keys[slide_num - 1], page)
+            yield page
+        else:
+            image = cache.get(keys[slide_num - 1])
+            if image is None:
+                raise RuntimeError(
+                    f"Cached thumbnail for slide {slide_num} is missing, run again"
+                )
+            yield image
+
+
+def pdf_renderer():
+    """Name of the renderer used for PDF pages: pypdfium2 if installed, else pdftoppm."""
+    return "pdfium" if importlib.util.find_spec("pypdfium2") else "pdftoppm"
+
+
+def pdf_page_count(pdf_path):
+    """Number of pages in a PDF, read with pypdfium2 if installed, else pdfinfo."""
+    if pdf_renderer() == "pdfium":
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    result = subprocess.run(["pdfinfo", str(pdf_path)], capture_output=True, text=True)
+    match = re.search(r"^Pages:\s+(\d+)", result.stdout, re.MULTILINE)
+    if result.returncode != 0 or not match:
+        raise RuntimeError("Could not read the rendered PDF")
+    return int(match.group(1))
+
+
+def render_pdf_pages(pdf_path, page_count, width, workers):
+    """Render PDF pages at the given width, splitting page ranges across workers.
+
+    Pages are yielded in order as soon as their range is done. pypdfium2
+    renders in worker processes; without it, pdftoppm processes are run in
+    parallel and their output is read from stdout.
+    """
+    ranges = [
+        (first, min(first + PAGES_PER_TASK - 1, page_count))
+        for first in range(1, page_count + 1, PAGES_PER_TASK)
+    ]
+    if pdf_renderer() == "pdfium":
+        render, executor_cls = render_page_range_pdfium, ProcessPoolExecutor
+    else:
+        render, executor_cls = render_page_range_pdftoppm, ThreadPoolExecutor
+
+    if workers == 1 or len(ranges) <= 1:
+        for first, last in ranges:
+            yield from render(pdf_path, first, last, width)
+        return
+
+    with executor_cls(max_workers=min(workers, len(ranges))) as executor:
+        futures = [
+            executor.submit(render, pdf_path, first, last, width)
+            for first, last in ranges
+        ]
+        for future in futures:
+            yield from future.result()
+
+
+def render_page_range_pdfium(pdf_path, first, last, width):
+    """Render 1-based pages first..last with pypdfium2, scaled to width."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        images = []
+        for index in range(first - 1, last):
+            page = pdf[index]
+            bitmap = page.render(scale=width / page.get_width())
+            images.append(bitmap.to_pil().convert("RGB"))
+            page.close()
+        return images
+    finally:
+        pdf.close()
+
+
+def render_page_range_pdftoppm(pdf_path, first, last, width):
+    """Render 1-based pages first..last with pdftoppm, scaled to width."""
     result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
+        [
+            "pdftoppm",
+            "-f",
+            str(first),
+            "-l",
+            str(last),
+            "-scale-to-x",
+            str(width),
+            "-scale-to-y",
+            "-1",
+            str(pdf_path),
+        ],
         capture_output=True,
-        text=True,
     )
     if result.returncode != 0:
         raise RuntimeError("Image conversion failed")
+    return read_ppm_stream(result.stdout)
 
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
 
-    # Create full list with placeholders for hidden slides
-    all_images = []
-    visible_idx = 0
+PPM_HEADER = re.compile(rb"P6\s+(\d+)\s+(\d+)\s+(\d+)\s")
 
-    # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
-            placeholder_size = img.size
-    else:
-        placeholder_size = (1920, 1080)
 
-    for slide_num in range(1, total_slides + 1):
-        if slide_num in hidden_slides:
-            # Create placeholder image for hidden slide
-            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
-            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
-            placeholder_img.save(placeholder_path, "JPEG")
-            all_images.append(placeholder_path)
-        else:
-            # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
-
-    return all_images
+def read_ppm_stream(data):
+    """Split concatenated binary PPM images (as written by pdftoppm) into PIL images."""
+    images = []
+    pos = 0
+    while pos < len(data):
+        match = PPM_HEADER.match(data, pos)
+        if not match:
+            raise RuntimeError("Unexpected pdftoppm output")
+        w, h = int(match.group(1)), int(match.group(2))
+        end = match.end() + w * h * 3
+        images.append(Image.frombytes("RGB", (w, h), data[match.end() : end]))
+        pos = end
+    return images
 
 
 def create_grids(
-    image_paths,
+    images,
     cols,
     width,
     output_path,
     placeholder_regions=None,
     slide_dimensions=None,
 ):
-    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid."""
+    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid.
+
+    images may be any iterable of PIL images or image paths; it is consumed one
+    grid at a time.
+    """
     # Maximum images per grid is cols × (cols + 1) for better proportions
     max_images_per_grid = cols * (cols + 1)
     grid_files = []
@@ -288,12 +528,13 @@ def create_grids(
         f"Creating grids with {cols} columns (max {max_images_per_grid} images per grid)"
     )
 
-    # Split images into chunks
-    for chunk_idx, start_idx in enumerate(
-        range(0, len(image_paths), max_images_per_grid)
-    ):
-        end_idx = min(start_idx + max_images_per_grid, len(image_paths))
-        chunk_images = image_paths[start_idx:end_idx]
+    # Split images into chunks, looking one chunk ahead to know if there are more
+    images = iter(images)
+    chunk_images = list(islice(images, max_images_per_grid))
+    chunk_idx = 0
+    while chunk_images:
+        next_chunk = list(islice(images, max_images_per_grid))
+        start_idx = chunk_idx * max_images_per_grid
 
         # Create grid for this chunk
         grid = create_grid(
@@ -301,7 +542,7 @@ def create_grids(
         )
 
         # Generate output filename
-        if len(image_paths) <= max_images_per_grid:
+        if chunk_idx == 0 and not next_chunk:
             # Single grid - use base filename without suffix
             grid_filename = output_path
         else:
@@ -315,11 +556,19 @@ def create_grids(
         grid.save(str(grid_filename), quality=JPEG_QUALITY)
         grid_files.append(str(grid_filename))
 
+        chunk_images = next_chunk
+        chunk_idx += 1
+
     return grid_files
 
 
+def open_slide_image(image):
+    """Return a PIL image for a slide given either an image or a path to one."""
+    return image if isinstance(image, Image.Image) else Image.open(image)
+
+
 def create_grid(
-    image_paths,
+    images,
     cols,
     width,
     start_slide_num=0,
@@ -331,12 +580,12 @@ def create_grid(
     label_padding = int(font_size * LABEL_PADDING_RATIO)
 
     # Get dimensions
-    with Image.open(image_paths[0]) as img:
-        aspect = img.height / img.width
+    images = [open_slide_image(image) for image in images]
+    aspect = images[0].height / images[0].width
     height = int(width * aspect)
 
     # Calculate grid size
-    rows = (len(image_paths) + cols - 1) // cols
+    rows = (len(images) + cols - 1) // cols
     grid_w = cols * width + (cols + 1) * GRID_PADDING
     grid_h = rows * (height + font_size + label_padding * 2) + (rows + 1) * GRID_PADDING
 
@@ -353,7 +602,7 @@ def create_grid(
         font = ImageFont.load_default()
 
     # Place thumbnails
-    for i, img_path in enumerate(image_paths):
+    for i, slide_img in enumerate(images):
         row, col = i // cols, i % cols
         x = col * width + (col + 1) * GRID_PADDING
         y_base = (
@@ -374,7 +623,7 @@ def create_grid(
         # Add thumbnail below label with proportional spacing
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
+        with slide_img as img:
             # Get original dimensions before thumbnail
             orig_w, orig_h = img.size
 
@@ -398,6 +647,12 @@ def create_grid(
                 x_scale = orig_w / slide_width_inches
                 y_scale = orig_h / slide_height_inches
 
+                # Size the stroke as on a slide rendered at CONVERSION_DPI, so
+                # outlines look the same whatever size the image was rendered at
+                ref_scale = CONVERSION_DPI / x_scale
+                ref_stroke = max(5, int(min(orig_w, orig_h) * ref_scale) // 150)
+                stroke_width = max(1, round(ref_stroke / ref_scale))
+
                 # Create a highlight overlay
                 overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
                 overlay_draw = ImageDraw.Draw(overlay)
@@ -412,9 +667,6 @@ def create_grid(
 
                     # Draw highlight outline with red color and thick stroke
                     # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
                     overlay_draw.rectangle(
                         [(px_left, px_top), (px_left + px_width, px_top + px_height)],
                         outline=(255, 0, 0, 255),  # Bright red, fully opaque
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import pypdfium2 as pdfium
+
+# Attachment index: page count, size and content hash per PDF, cached on disk by
+# (size, mtime) so later steps (page totals, merge) never reopen unchanged files.
+
+INDEX_FILE = '.attachment_index.json'
+ATTACHMENT_DIRS = ['火车票', '滴滴出行电子发票及行程报销单']
+
+def pdf_page_count(path):
+    # pdfium only resolves the page tree here; no page content is parsed
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def list_pdfs(directory):
+    found = []
+    if not os.path.exists(directory): return found
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for f in sorted(files):
+            if f.lower().endswith('.pdf'):
+                found.append(os.path.join(root, f))
+    return found
+
+def load_index(index_file=INDEX_FILE):
+    if not index_file or not os.path.exists(index_file): return {}
+    try:
+        with open(index_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_index(index, index_file=INDEX_FILE):
+    if not index_file: return
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+
+def index_entry(path, cache=None):
+    st = os.stat(path)
+    cached = (cache or {}).get(path)
+    if cached and cached['size'] == st.st_size and cached['mtime'] == st.st_mtime:
+        return cached
+    return {'path': path, 'size': st.st_size, 'mtime': st.st_mtime,
+            'pages': pdf_page_count(path), 'sha256': file_hash(path)}
+
+def build_index(paths=ATTACHMENT_DIRS, index_file=INDEX_FILE):
+    # paths may mix directories (walked recursively) and single PDF files
+    cache = load_index(index_file)
+    entries = []
+    for p in paths:
+        for f in (list_pdfs(p) if os.path.isdir(p) else [p] if os.path.exists(p) else []):
+            entries.append(index_entry(f, cache))
+    cache.update((e['path'], e) for e in entries)
+    save_index(cache, index_file)
+    return entries
+
+def total_pages(entries):
+    # Identical files are merged once, so they are counted once
+    return sum({e['sha256']: e['pages'] for e in entries}.values())
@@ -2,20 +2,16 @@ import pandas as pd
 from openpyxl import load_workbook
 import datetime
 import os
+from attachment_index import build_index
+from ledger import Ledger
 
-def count_pdfs(directory):
-    count = 0
-    if not os.path.exists(directory):
-        return 0
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith('.pdf'):
-                count += 1
-    return count
+def count_pages(ledger, *directories):
+    # 按 PDF 实际页数统计，多页附件按页计数；附件记入台账，由台账汇总页数
+    ledger.replace('attachments', build_index(directories))
+    return ledger.attachment_pages()
 
-def fill_reimbursement():
-    # 1. 汇总火车票金额
-    train_file = '火车票汇总信息表.xlsx'
+def sum_train_file(train_file):
+    # 台账中没有记录时（如旧版脚本生成的汇总表），直接汇总表格
     train_sum = 0
     if os.path.exists(train_file):
         wb_train = load_workbook(train_file, data_only=False)
@@ -32,9 +28,9 @@ def fill_reimbursement():
                     try:
                         train_sum += float(val)
                     except: pass
-    
-    # 2. 汇总滴滴发票金额
-    didi_file = '滴滴电子发票汇总.xlsx'
+    return train_sum
+
+def sum_didi_file(didi_file):
     didi_sum = 0
     if os.path.exists(didi_file):
         wb_didi = load_workbook(didi_file, data_only=False)
@@ -59,14 +55,26 @@ def fill_reimbursement():
                         try:
                             didi_sum += float(val)
                         except: pass
+    return didi_sum
 
+def fill_reimbursement():
+    with Ledger() as ledger:
+        # 1. 汇总火车票金额（台账中的 SQL 汇总）
+        if ledger.count('train_tickets'):
+            train_sum = ledger.total('train_tickets')
+        else:
+            train_sum = sum_train_file('火车票汇总信息表.xlsx')
 
-    total_transport = train_sum + didi_sum
-    
-    # 3. 统计 PDF 数量
-    didi_pdf_count = count_pdfs('滴滴出行电子发票及行程报销单')
-    train_pdf_count = count_pdfs('火车票')
-    total_pages = didi_pdf_count + train_pdf_count + 2
+        # 2. 汇总滴滴发票金额
+        if ledger.count('didi_invoices'):
+            didi_sum = ledger.total('didi_invoices')
+        else:
+            didi_sum = sum_didi_file('滴滴电子发票汇总.xlsx')
+
+        total_transport = round(train_sum + didi_sum, 2)
+
+        # 3. 统计 PDF 附件页数
+        total_pages = count_pages(ledger, '滴滴出行电子发票及行程报销单', '火车票') + 2
     
     # 4. 填充模板
     # 获取脚本所在目录，以便定位 assets 文件夹
@@ -6,10 +6,14 @@ import pandas as pd
 from datetime import datetime
 import pdfplumber
 from pathlib import Path
+from claim_index import INDEX_FILE, TRAIN_INVOICE, flag_claims
+from ledger import LEDGER_FILE, record, train_row
 
 class TrainTicketExtractor:
-    def __init__(self):
+    def __init__(self, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
         self.extracted_data = []
+        self.claim_index = claim_index
+        self.ledger_file = ledger_file
         
     def extract_text_from_pdf(self, pdf_path):
         try:
@@ -105,6 +109,7 @@ class TrainTicketExtractor:
     def save_to_xlsx(self, output_file="train_tickets_extracted.xlsx"):
         if not self.extracted_data:
             print("No data to save.")
+            record('train_tickets', [], self.ledger_file)  # clear rows left by an earlier run
             return
         
         unique_data = {}
@@ -116,15 +121,22 @@ class TrainTicketExtractor:
                 unique_data[ticket['filename']] = ticket
         
         deduplicated_data = list(unique_data.values())
-        for ticket_data in deduplicated_data:
+        # Invoice numbers already claimed in an earlier run or by someone else
+        claimed = flag_claims(TRAIN_INVOICE, [(t.get('invoice_number', ''), t['filename']) for t in deduplicated_data],
+                              self.claim_index)
+        for ticket_data, duplicate_claim in zip(deduplicated_data, claimed):
             departure = ticket_data.get('departure_station', '')
             arrival = ticket_data.get('arrival_station', '')
             ticket_data['route'] = f"{departure} → {arrival}" if departure and arrival else ""
+            ticket_data['duplicate_claim'] = duplicate_claim
+            if duplicate_claim:
+                print(f"Warning: {ticket_data['filename']} was already claimed: {duplicate_claim}")
+        record('train_tickets', [train_row(t) for t in deduplicated_data], self.ledger_file)
         
         headers = [
             'filename', 'invoice_number', 'date', 'train_number', 'departure_station', 
             'arrival_station', 'route', 'departure_time', 
-            'passenger_name', 'seat_type', 'seat_number', 'price'
+            'passenger_name', 'seat_type', 'seat_number', 'price', 'duplicate_claim'
         ]
         
         try:
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import unittest
+from claim_index import DIDI_TRIP, TRAIN_INVOICE, ClaimIndex, flag_claims, trip_fingerprint
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestClaimIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'claims.sqlite')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def register(self, claim, items, kind=TRAIN_INVOICE, employee='alice'):
+        with ClaimIndex(self.path, claim=claim, employee=employee) as index:
+            return index.register(kind, items)
+
+    def test_first_claim_is_not_flagged(self):
+        """Test keys seen for the first time are recorded without a flag"""
+        self.assertEqual(self.register('/claims/2024-11', [('111', 'a.pdf'), ('222', 'b.pdf')]), [None, None])
+
+    def test_rerun_of_same_workspace_flags_nothing(self):
+        """Test running a workspace again over the same files is not a double claim"""
+        self.register('/claims/2024-11', [('111', 'a.pdf')])
+        self.assertEqual(self.register('/claims/2024-11', [('111', 'a.pdf')]), [None])
+
+    def test_claim_in_other_workspace_is_flagged(self):
+        """Test a key claimed under another workspace reports the first claim"""
+        self.register('/claims/2024-11', [('111', 'a.pdf')], employee='alice')
+        flags = self.register('/claims/2024-12', [('111', 'copy.pdf'), ('333', 'c.pdf')], employee='bob')
+        self.assertIsNone(flags[1])
+        claim, employee, source, _ = flags[0]
+        self.assertEqual((claim, employee, source), ('/claims/2024-11', 'alice', 'a.pdf'))
+
+    def test_same_key_twice_in_one_batch(self):
+        """Test only the second of two files with the same key is flagged"""
+        flags = self.register('/claims/2024-11', [('111', 'a.pdf'), ('111', 'b.pdf')])
+        self.assertIsNone(flags[0])
+        self.assertEqual(flags[1][2], 'a.pdf')
+
+    def test_kinds_are_separate(self):
+        """Test the same key under different kinds is not a conflict"""
+        self.register('/claims/2024-11', [('111', 'a.pdf')])
+        self.assertEqual(self.register('/claims/2024-12', [('111', 'a.pdf')], kind=DIDI_TRIP), [None])
+
+    def test_empty_keys_are_ignored(self):
+        """Test tickets without an invoice number are never flagged"""
+        self.register('/claims/2024-11', [('', 'a.pdf')])
+        self.assertEqual(self.register('/claims/2024-12', [('', 'b.pdf')]), [None])
+
+    def test_concurrent_claimants_are_flagged(self):
+        """Test that of several runs registering the same keys at once, only one claims each key"""
+        ClaimIndex(self.path).close()  # create the schema up front
+        keys = [str(k) for k in range(2000)]
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def run(n):
+            barrier.wait()
+            results[n] = self.register(f'/claims/{n}', [(key, f'{n}.pdf') for key in keys])
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        for i in range(len(keys)):
+            self.assertEqual(sum(flags[i] is None for flags in results.values()), 1)
+
+    def test_flag_claims_describes_previous_claim(self):
+        """Test flag_claims gives a readable text for flagged items and '' otherwise"""
+        flag_claims(TRAIN_INVOICE, [('111', 'a.pdf')], self.path)
+        texts = flag_claims(TRAIN_INVOICE, [('111', 'b.pdf'), ('222', 'c.pdf')], self.path)
+        self.assertIn('已报销', texts[0])
+        self.assertIn('a.pdf', texts[0])
+        self.assertEqual(texts[1], '')
+
+    def test_flag_claims_warns_on_unusable_index(self):
+        """Test an index that cannot be opened flags nothing instead of failing"""
+        texts = flag_claims(TRAIN_INVOICE, [('111', 'a.pdf')], self.temp_dir.name)
+        self.assertEqual(texts, [''])
+
+    def test_trip_fingerprint_normalizes_amount(self):
+        """Test amounts written differently give the same trip fingerprint"""
+        self.assertEqual(trip_fingerprint('11-09 08:25', '23.5', 'A ', 'B'),
+                         trip_fingerprint('11-09 08:25 ', '=23.50', 'A', ' B'))
+
+
+if __name__ == '__main__':
+    unittest.main()
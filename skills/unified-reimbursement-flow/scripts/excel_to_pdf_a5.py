@@ -1,12 +1,21 @@
 import os
-import win32com.client
 import sys
 import argparse
-import pdfplumber
 import re
+import queue
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import load_workbook
+from attachment_index import build_index
+
+A5_SIZE = (14800, 21000) # 1/100 mm, portrait
 
 def convert_to_pdf_win32(xlsx_path, pdf_path):
+    import win32com.client
     abs_xlsx = os.path.abspath(xlsx_path)
     abs_pdf = os.path.abspath(pdf_path)
     excel = win32com.client.DispatchEx("Excel.Application")
@@ -24,10 +33,140 @@ def convert_to_pdf_win32(xlsx_path, pdf_path):
     finally:
         excel.Quit()
 
+class SofficeInstance:
+    """One headless soffice process with its own profile, reachable over a UNO pipe.
+
+    The pipe name is unique to this instance, so it can never attach to another
+    soffice (such as recalc.py's server) that is already listening.
+    """
+
+    def __init__(self, startup_timeout=60):
+        self.pipe = f"soffice-a5-{os.getpid()}-{uuid.uuid4().hex}"
+        self.profile = tempfile.mkdtemp(prefix="soffice-a5-")
+        self.proc = subprocess.Popen([
+            'soffice', '--headless', '--invisible', '--norestore', '--nologo', '--nodefault',
+            f'-env:UserInstallation=file://{self.profile}',
+            f'--accept=pipe,name={self.pipe};urp;StarOffice.ComponentContext',
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.desktop = self._connect(startup_timeout)
+
+    def _connect(self, startup_timeout):
+        import uno
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        url = f"uno:pipe,name={self.pipe};urp;StarOffice.ComponentContext"
+        deadline = time.time() + startup_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(url)
+                return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            except Exception:
+                if self.proc.poll() is not None or time.time() > deadline:
+                    self.proc.kill()
+                    shutil.rmtree(self.profile, ignore_errors=True)
+                    raise RuntimeError(f"soffice on pipe {self.pipe} did not start")
+                time.sleep(0.25)
+
+    def convert(self, xlsx_path, pdf_path):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def props(**kw):
+            out = []
+            for k, v in kw.items():
+                p = PropertyValue()
+                p.Name, p.Value = k, v
+                out.append(p)
+            return tuple(out)
+
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(xlsx_path)), "_blank", 0, props(Hidden=True))
+        try:
+            styles = doc.StyleFamilies.getByName("PageStyles")
+            for name in {sheet.PageStyle for sheet in doc.Sheets}:
+                style = styles.getByName(name)
+                w, h = A5_SIZE
+                style.Width, style.Height = (h, w) if style.IsLandscape else (w, h)
+                style.ScaleToPagesX = 1 # fit to one page wide
+                style.ScaleToPagesY = 0 # as many pages tall as needed
+            doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(pdf_path)), props(FilterName="calc_pdf_Export"))
+        finally:
+            doc.close(True)
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+class SofficePool:
+    """Keeps `size` warm soffice instances and hands each conversion to a free one."""
+
+    def __init__(self, size=None):
+        self.size = size or min(4, os.cpu_count() or 1)
+        self.instances = []
+        self.free = queue.Queue()
+
+    def __enter__(self):
+        with ThreadPoolExecutor(self.size) as ex:
+            futures = [ex.submit(SofficeInstance) for _ in range(self.size)]
+        self.instances = [f.result() for f in futures if f.exception() is None]
+        if len(self.instances) < self.size:
+            self.__exit__()
+            raise RuntimeError("failed to start soffice pool")
+        for inst in self.instances:
+            self.free.put(inst)
+        return self
+
+    def __exit__(self, *exc):
+        for inst in self.instances:
+            inst.close()
+        self.instances = []
+
+    def convert(self, xlsx_path, pdf_path):
+        inst = self.free.get()
+        try:
+            inst.convert(xlsx_path, pdf_path)
+        finally:
+            self.free.put(inst)
+        return pdf_path
+
+    def convert_many(self, pairs):
+        with ThreadPoolExecutor(self.size) as ex:
+            return list(ex.map(lambda p: self.convert(*p), pairs))
+
+def convert_to_pdf_libreoffice(xlsx_path, pdf_path):
+    with SofficePool(size=1) as pool:
+        pool.convert(xlsx_path, pdf_path)
+
+def use_win32(engine):
+    return engine == "win32" or (engine == "auto" and sys.platform == "win32")
+
+def convert_to_pdf(xlsx_path, pdf_path, engine="auto"):
+    if use_win32(engine):
+        convert_to_pdf_win32(xlsx_path, pdf_path)
+    else:
+        convert_to_pdf_libreoffice(xlsx_path, pdf_path)
+
+def convert_batch(pairs, engine="auto", workers=None):
+    # Excel converts one workbook at a time; LibreOffice uses a warm pool
+    if use_win32(engine):
+        for xlsx_path, pdf_path in pairs:
+            convert_to_pdf_win32(xlsx_path, pdf_path)
+            yield pdf_path
+        return
+    with SofficePool(size=workers) as pool:
+        yield from pool.convert_many(pairs)
+
 def update_count(xlsx_path, pdf_path):
     if not os.path.exists(pdf_path): return
-    with pdfplumber.open(pdf_path) as pdf:
-        n = len(pdf.pages)
+    n = build_index([pdf_path])[0]['pages']
     if n > 1:
         wb = load_workbook(xlsx_path)
         ws = wb.active
@@ -40,24 +179,27 @@ def update_count(xlsx_path, pdf_path):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("xlsx")
-    parser.add_argument("pdf")
+    parser.add_argument("xlsx", help="xlsx file, or input directory with --batch")
+    parser.add_argument("pdf", help="pdf file, or output directory with --batch")
     parser.add_argument("--update-count", action="store_true")
+    parser.add_argument("--engine", choices=["auto", "win32", "libreoffice"], default="auto")
+    parser.add_argument("--batch", action="store_true", help="convert every .xlsx in the input directory")
+    parser.add_argument("--workers", type=int, default=None, help="warm soffice instances for --batch (LibreOffice only)")
     args = parser.parse_args()
-    
-    # Special logic for reimbursement form: 
+
+    if args.batch:
+        os.makedirs(args.pdf, exist_ok=True)
+        pairs = [(os.path.join(args.xlsx, f), os.path.join(args.pdf, os.path.splitext(f)[0] + '.pdf'))
+                 for f in sorted(os.listdir(args.xlsx)) if f.lower().endswith('.xlsx') and not f.startswith('~$')]
+        for out in convert_batch(pairs, args.engine, args.workers):
+            print(out)
+        sys.exit(0)
+
+    # Special logic for reimbursement form:
     # The requirement was to check page count of '费用清单.pdf' and update '费用报销单.xlsx'
-    # Here we adapt: if --update-count is passed, we assume we are converting '费用报销单' 
+    # Here we adapt: if --update-count is passed, we assume we are converting '费用报销单'
     # and we should check '费用清单.pdf' first.
-    if args.update_count and os.path.exists('费用清单.pdf'):
-        with pdfplumber.open('费用清单.pdf') as pdf:
-            extra = len(pdf.pages) - 1
-            if extra > 0:
-                wb = load_workbook(args.xlsx)
-                ws = wb.active
-                match = re.search(r'(\d+)', str(ws['J3'].value))
-                if match:
-                    ws['J3'] = f"单据及附件共{int(match.group(1)) + extra}页"
-                    wb.save(args.xlsx)
-
-    convert_to_pdf_win32(args.xlsx, args.pdf)
+    if args.update_count:
+        update_count(args.xlsx, '费用清单.pdf')
+
+    convert_to_pdf(args.xlsx, args.pdf, args.engine)
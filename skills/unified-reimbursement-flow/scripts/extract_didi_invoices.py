@@ -1,4 +1,6 @@
 import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfplumber.page import Page
 import pandas as pd
 import os
 import sys
@@ -6,36 +8,80 @@ import re
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
+from buyer_registry import BUYER, REGISTRY_FILE, SELLER, BuyerRegistry, assign_parties, load_registry
+from claim_index import DIDI_INVOICE, INDEX_FILE, flag_claims
+from ledger import LEDGER_FILE, invoice_row, record
 
-def extract_invoice_info(pdf_path):
-    info = {"文件名": os.path.basename(pdf_path), "开票日期": "", "金额": 0.0, "购买方名称": "", "购买方识别号": "", "销售方名称": "", "销售方识别号": ""}
+INVOICE_NUMBER_PATTERN = re.compile(r"发票号码[:：]\s*(\d+)")
+DATE_PATTERN = re.compile(r"开票日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)")
+AMOUNT_PATTERN = re.compile(r"¥\s*([\d\.]+)")
+TOTAL_PATTERN = re.compile(r"^(?=[^\n]*价税合计)[^\n]*?¥\s*([\d\.]+)", re.MULTILINE)
+NAME_PATTERN = re.compile(r"名称[:：]\s*([^\n\s]+)")
+TAX_ID_PATTERN = re.compile(r"纳税人识别号[:：]\s*([A-Z0-9]+)")
+
+def iter_page_texts(pdf):
+    for i, page_obj in enumerate(PDFPage.create_pages(pdf.doc)):
+        page = Page(pdf, page_obj, page_number=i + 1, initial_doctop=0)
+        yield page.extract_text() or ""
+        page.close()
+
+def extract_invoice_info(pdf_path, registry=None):
+    info = {"文件名": os.path.basename(pdf_path), "发票号码": "", "开票日期": "", "金额": 0.0, "购买方名称": "", "购买方识别号": "", "销售方名称": "", "销售方识别号": "", "购买方主体": ""}
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text()
-            date_match = re.search(r"开票日期[:：]\s*(\d{4}年\d{1,2}月\d{1,2}日)", text)
-            if date_match: info["开票日期"] = date_match.group(1)
-            amts = re.findall(r"¥\s*([\d\.]+)", text)
-            if amts: info["金额"] = float(amts[-1])
-            name_matches = re.findall(r"名称[:：]\s*([^\n\s]+)", text)
-            if len(name_matches) >= 1: info["购买方名称"] = name_matches[0].strip()
-            if len(name_matches) >= 2: info["销售方名称"] = name_matches[1].strip()
-            tax_matches = re.findall(r"纳税人识别号[:：]\s*([A-Z0-9]+)", text)
-            if len(tax_matches) >= 1: info["购买方识别号"] = tax_matches[0].strip()
-            if len(tax_matches) >= 2: info["销售方识别号"] = tax_matches[1].strip()
+            names, tax_ids = [], []
+            # Fallback amount only from the invoice page (the one with the invoice number, else page 1)
+            invoice_page_amount = first_page_amount = None
+            # Stop at the first page (normally page 1) by which every field is found
+            for page_index, text in enumerate(iter_page_texts(pdf)):
+                number_match = INVOICE_NUMBER_PATTERN.search(text)
+                if number_match and not info["发票号码"]: info["发票号码"] = number_match.group(1)
+                if not info["开票日期"]:
+                    date_match = DATE_PATTERN.search(text)
+                    if date_match: info["开票日期"] = date_match.group(1)
+                if info["金额"] == 0.0:
+                    total_match = TOTAL_PATTERN.search(text)
+                    if total_match: info["金额"] = float(total_match.group(1))
+                    else:
+                        amts = AMOUNT_PATTERN.findall(text)
+                        if amts and number_match and invoice_page_amount is None: invoice_page_amount = amts[-1]
+                        elif amts and page_index == 0: first_page_amount = amts[-1]
+                if len(names) < 2: names += NAME_PATTERN.findall(text)
+                if len(tax_ids) < 2: tax_ids += TAX_ID_PATTERN.findall(text)
+                if info["发票号码"] and info["开票日期"] and info["金额"] != 0.0 and len(names) >= 2 and len(tax_ids) >= 2: break
+            last_amount = invoice_page_amount or first_page_amount
+            if info["金额"] == 0.0 and last_amount: info["金额"] = float(last_amount)
+            parties = assign_parties([n.strip() for n in names], [t.strip() for t in tax_ids], registry or BuyerRegistry())
+            info["购买方名称"], info["购买方识别号"], entity = parties[BUYER]
+            info["销售方名称"], info["销售方识别号"], _ = parties[SELLER]
+            info["购买方主体"] = entity or info["购买方名称"]
     except: pass
     return info
 
-def process_directory(input_dir, output_file):
+def process_directory(input_dir, output_file, registry_file=REGISTRY_FILE, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
     pdf_files = [f for f in os.listdir(input_dir) if f.endswith('.pdf') and '发票' in f]
-    results = [extract_invoice_info(os.path.join(input_dir, f)) for f in pdf_files]
-    if not results: return
+    registry = load_registry(registry_file)
+    results = [extract_invoice_info(os.path.join(input_dir, f), registry) for f in pdf_files]
+    if not results:
+        record('didi_invoices', [], ledger_file)  # clear rows left by an earlier run
+        return
+    claimed = flag_claims(DIDI_INVOICE, [(r["发票号码"], r["文件名"]) for r in results], claim_index)
+    for r, duplicate_claim in zip(results, claimed): r["重复报销"] = duplicate_claim
+    record('didi_invoices', [invoice_row(r) for r in results], ledger_file)
+    # Rows grouped by buyer entity (order of first appearance)
+    groups = {}
+    for r in results: groups.setdefault(r["购买方主体"], []).append(r)
+    results = [r for group in groups.values() for r in group]
     wb = Workbook()
     ws = wb.active
-    headers = ["文件名", "开票日期", "金额", "购买方名称", "购买方识别号", "销售方名称", "销售方识别号"]
+    headers = ["文件名", "发票号码", "开票日期", "金额", "购买方名称", "购买方识别号", "销售方名称", "销售方识别号", "重复报销"]
     ws.append(headers)
     for r in results:
-        ws.append([r["文件名"], r["开票日期"], f'={r["金额"]}', r["购买方名称"], f'="{r["购买方识别号"]}"', r["销售方名称"], f'="{r["销售方识别号"]}"'])
+        ws.append([r["文件名"], f'="{r["发票号码"]}"', r["开票日期"], f'={r["金额"]}', r["购买方名称"], f'="{r["购买方识别号"]}"', r["销售方名称"], f'="{r["销售方识别号"]}"', r["重复报销"]])
+    ws_buyers = wb.create_sheet("按购买方汇总")
+    ws_buyers.append(["购买方", "发票数", "金额合计"])
+    for buyer, group in groups.items(): ws_buyers.append([buyer, len(group), round(sum(r["金额"] for r in group), 2)])
     wb.save(output_file)
 
 if __name__ == "__main__":
-    process_directory(sys.argv[1], sys.argv[2])
+    process_directory(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else REGISTRY_FILE, sys.argv[4] if len(sys.argv) > 4 else INDEX_FILE)
@@ -5,10 +5,14 @@ import pandas as pd
 import pdfplumber
 from pathlib import Path
 import sys
+from claim_index import INDEX_FILE, TRAIN_INVOICE, flag_claims
+from ledger import LEDGER_FILE, record, train_row
 
 class TrainTicketExtractor:
-    def __init__(self):
+    def __init__(self, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
         self.extracted_data = []
+        self.claim_index = claim_index
+        self.ledger_file = ledger_file
         
     def extract_text_from_pdf(self, pdf_path):
         try:
@@ -93,7 +97,12 @@ class TrainTicketExtractor:
                 self.extracted_data.append(ticket_info)
     
     def save_to_xlsx(self, output_file):
-        if not self.extracted_data: return
+        if not self.extracted_data:
+            record('train_tickets', [], self.ledger_file)  # clear rows left by an earlier run
+            return
+        claimed = flag_claims(TRAIN_INVOICE, [(t['invoice_number'], t['filename']) for t in self.extracted_data], self.claim_index)
+        for t, duplicate_claim in zip(self.extracted_data, claimed): t['duplicate_claim'] = duplicate_claim
+        record('train_tickets', [train_row(t) for t in self.extracted_data], self.ledger_file)
         df = pd.DataFrame(self.extracted_data)
         if 'invoice_number' in df.columns:
             df['invoice_number'] = df['invoice_number'].apply(lambda x: f'="{x}"' if x else "")
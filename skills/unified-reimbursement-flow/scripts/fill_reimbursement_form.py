@@ -2,35 +2,32 @@ import pandas as pd
 from openpyxl import load_workbook
 import datetime
 import os
+from attachment_index import build_index
+from ledger import Ledger
 
-def count_pdfs(directory):
-    count = 0
-    if not os.path.exists(directory): return 0
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith('.pdf'): count += 1
-    return count
+def count_pages(ledger, *directories):
+    # Attachments are recorded in the ledger and their pages summed there
+    ledger.replace('attachments', build_index(directories))
+    return ledger.attachment_pages()
+
+def file_total(path, column):
+    # Summaries written without a ledger (e.g. by older extractors)
+    if not os.path.exists(path): return 0
+    df = pd.read_excel(path)
+    return df[column].apply(lambda x: float(str(x).replace('=', '')) if pd.notna(x) else 0).sum()
 
 def fill_reimbursement():
     train_file, didi_file = '火车票汇总信息表.xlsx', '滴滴电子发票汇总.xlsx'
-    train_sum = 0
-
-    if os.path.exists(train_file):
-        df = pd.read_excel(train_file)
-        train_sum = df['price'].apply(lambda x: float(str(x).replace('=', '')) if pd.notna(x) else 0).sum()
-    
-    didi_sum = 0
-    if os.path.exists(didi_file):
-        df = pd.read_excel(didi_file)
-        didi_sum = df['金额'].apply(lambda x: float(str(x).replace('=', '')) if pd.notna(x) else 0).sum()
-
-    total_pages = count_pdfs('滴滴出行电子发票及行程报销单') + count_pdfs('火车票') + 2
+    with Ledger() as ledger:
+        train_sum = ledger.total('train_tickets') if ledger.count('train_tickets') else file_total(train_file, 'price')
+        didi_sum = ledger.total('didi_invoices') if ledger.count('didi_invoices') else file_total(didi_file, '金额')
+        total_pages = count_pages(ledger, '滴滴出行电子发票及行程报销单', '火车票') + 2
     
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     template_file = os.path.join(base_dir, 'assets', 'reimbursement_template.xlsx')
     wb = load_workbook(template_file)
     ws = wb.active
-    ws['E5'] = train_sum + didi_sum
+    ws['E5'] = round(train_sum + didi_sum, 2)
     ws['E6'], ws['E7'] = 0, 0
     now = datetime.datetime.now()
     ws['D3'] = f"{now.year} 年 {now.month}月{now.day} 日 填"
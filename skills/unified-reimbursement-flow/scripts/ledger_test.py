@@ -0,0 +1,95 @@
+import csv
+import os
+import tempfile
+import unittest
+from openpyxl import load_workbook
+from ledger import Ledger, invoice_row, iso_date, record, to_amount, train_row, trip_row
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'ledger.sqlite')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def ledger(self, claim='/claims/2024-11', employee='alice'):
+        return Ledger(self.path, claim=claim, employee=employee)
+
+    def test_amounts_and_dates_are_normalized(self):
+        """Test extractor text is stored as numbers and sortable dates"""
+        self.assertEqual(to_amount('=35.0'), 35.0)
+        self.assertEqual(to_amount('¥1,234.50'), 1234.5)
+        self.assertIsNone(to_amount('未找到'))
+        self.assertEqual(iso_date('2024年11月5日'), '2024-11-05')
+        self.assertEqual(iso_date(''), None)
+
+    def test_total_sums_rows_of_the_claim(self):
+        """Test totals add up the rows of the current claim only"""
+        with self.ledger() as ledger:
+            ledger.replace('train_tickets', [train_row({'filename': 'a.pdf', 'price': '553.0'}),
+                                             train_row({'filename': 'b.pdf', 'price': '=120.5'})])
+        with self.ledger(claim='/claims/2024-12') as ledger:
+            ledger.replace('train_tickets', [train_row({'filename': 'c.pdf', 'price': '99'})])
+        with self.ledger() as ledger:
+            self.assertEqual(ledger.count('train_tickets'), 2)
+            self.assertAlmostEqual(ledger.total('train_tickets'), 673.5)
+            self.assertEqual(ledger.total('didi_invoices'), 0)
+
+    def test_replace_drops_rows_of_an_earlier_run(self):
+        """Test a rerun replaces the claim's rows instead of adding to them"""
+        row = invoice_row({'文件名': 'a.pdf', '发票号码': '111', '开票日期': '2024年11月05日', '金额': 35.0})
+        with self.ledger() as ledger:
+            ledger.replace('didi_invoices', [row])
+            ledger.replace('didi_invoices', [row])
+            self.assertEqual(ledger.count('didi_invoices'), 1)
+            self.assertEqual(ledger.total('didi_invoices'), 35.0)
+
+    def test_record_with_no_rows_clears_the_claim(self):
+        """Test an extractor run that found nothing leaves no stale rows"""
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            record('didi_trips', [trip_row({'来源文件': 'a.pdf', '序号': '1', '金额[元]': '23.50'})], self.path)
+            record('didi_trips', [], self.path)
+            with Ledger(self.path) as ledger:
+                self.assertEqual(ledger.count('didi_trips'), 0)
+        finally:
+            os.chdir(cwd)
+
+    def test_trip_row_maps_receipt_columns(self):
+        """Test receipt table headers map onto ledger columns"""
+        row = trip_row({'序号': '3', '上车时间': '11-09 08:25', '里程[公里]': '12.3', '金额[元]': '35.50', '来源文件': 'a.pdf'})
+        self.assertEqual((row['seq'], row['time'], row['distance'], row['amount'], row['source']),
+                         (3, '11-09 08:25', '12.3', 35.5, 'a.pdf'))
+
+    def test_attachment_pages_count_identical_files_once(self):
+        """Test the same PDF in two folders adds its pages once"""
+        entries = [{'path': 'a/x.pdf', 'size': 1, 'mtime': 0, 'pages': 2, 'sha256': 'x'},
+                   {'path': 'b/x.pdf', 'size': 1, 'mtime': 0, 'pages': 2, 'sha256': 'x'},
+                   {'path': 'b/y.pdf', 'size': 1, 'mtime': 0, 'pages': 3, 'sha256': 'y'}]
+        with self.ledger() as ledger:
+            ledger.replace('attachments', entries)
+            self.assertEqual(ledger.attachment_pages(), 5)
+
+    def test_export_writes_csv_and_xlsx(self):
+        """Test a table exports with its header to CSV and XLSX"""
+        csv_path = os.path.join(self.temp_dir.name, 'trips.csv')
+        xlsx_path = os.path.join(self.temp_dir.name, 'trips.xlsx')
+        with self.ledger() as ledger:
+            ledger.replace('didi_trips', [trip_row({'来源文件': 'a.pdf', '序号': '1', '金额[元]': '23.50'})])
+            self.assertEqual(ledger.export('didi_trips', csv_path), 1)
+            self.assertEqual(ledger.export('didi_trips', xlsx_path), 1)
+        with open(csv_path, encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][0], 'source')
+        self.assertEqual(rows[1][0], 'a.pdf')
+        sheet = load_workbook(xlsx_path).active
+        self.assertEqual(sheet.cell(row=2, column=1).value, 'a.pdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,28 +1,78 @@
 import os
+import json
+import argparse
 import pypdfium2 as pdfium
-import sys
-
-def merge_pdfs(output_path):
-    dest = pdfium.PdfDocument.new()
-    
-    # Order: Reimbursement -> Expense List -> Train -> Didi
-    files = []
-    if os.path.exists('费用报销单.pdf'): files.append('费用报销单.pdf')
-    if os.path.exists('费用清单.pdf'): files.append('费用清单.pdf')
-    
-    for d in ['火车票', '滴滴出行电子发票及行程报销单']:
-        if os.path.exists(d):
-            for root, _, fs in os.walk(d):
-                for f in fs:
-                    if f.lower().endswith('.pdf'):
-                        files.append(os.path.join(root, f))
-    
-    for f in files:
-        src = pdfium.PdfDocument(f)
-        dest.import_pages(src)
-        src.close()
-    dest.save(output_path)
-    dest.close()
+from attachment_index import build_index, pdf_page_count, ATTACHMENT_DIRS
+
+# Order: Reimbursement -> Expense List -> Train -> Didi
+HEAD_FILES = ['费用报销单.pdf', '费用清单.pdf']
+MERGE_ORDER = HEAD_FILES + ATTACHMENT_DIRS
+BATCH_SIZE = 50
+
+def manifest_path(output_path):
+    return output_path + '.manifest.json'
+
+def load_manifest(output_path):
+    if not os.path.exists(output_path) or not os.path.exists(manifest_path(output_path)): return []
+    with open(manifest_path(output_path), encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(output_path, manifest):
+    with open(manifest_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+def merge_pdfs(output_path, append=False, batch_size=BATCH_SIZE):
+    # In append mode only new attachments are added behind the existing package;
+    # everything already merged (by content hash) is left untouched. A changed
+    # 费用报销单.pdf or 费用清单.pdf leads the package, so it is rebuilt instead.
+    manifest = load_manifest(output_path) if append else []
+    if manifest:
+        merged_heads = {(m['path'], m['sha256']) for m in manifest if m['path'] in HEAD_FILES}
+        if merged_heads != {(e['path'], e['sha256']) for e in build_index(HEAD_FILES)}:
+            print(f"{' / '.join(HEAD_FILES)} changed, rebuilding {output_path}")
+            manifest = []
+    entries = build_index(ATTACHMENT_DIRS if manifest else MERGE_ORDER)
+
+    seen = {m['sha256'] for m in manifest}
+    todo, skipped = [], []
+    for e in entries:
+        if e['sha256'] in seen:
+            skipped.append(e['path'])
+            continue
+        seen.add(e['sha256'])
+        todo.append(e)
+
+    # Import in bounded batches: each source is closed right after its pages are
+    # imported, and every batch_size sources the merged document is saved and
+    # reopened. Saves onto an existing output are incremental (the pages already
+    # written are copied as bytes, not loaded), so pdfium holds one batch of
+    # pages at a time. batch_size 0 imports everything before a single save.
+    step = batch_size if batch_size > 0 else max(len(todo), 1)
+    batches = [todo[i:i + step] for i in range(0, len(todo), step)] or ([] if manifest else [[]])
+    tmp_path = output_path + '.tmp'
+    for batch in batches:
+        dest = pdfium.PdfDocument(output_path) if manifest else pdfium.PdfDocument.new()
+        for e in batch:
+            src = pdfium.PdfDocument(e['path'])
+            dest.import_pages(src)
+            src.close()
+        dest.save(tmp_path, flags=pdfium.raw.FPDF_INCREMENTAL if manifest else 0)
+        dest.close()
+        os.replace(tmp_path, output_path)
+        manifest += [{'path': e['path'], 'sha256': e['sha256'], 'pages': e['pages']} for e in batch]
+        save_manifest(output_path, manifest)
+
+    report = {'output': output_path, 'added': len(todo), 'duplicates': skipped,
+              'pages': pdf_page_count(output_path), 'size': os.path.getsize(output_path)}
+    for path in skipped:
+        print(f"Skipped duplicate: {path}")
+    print(f"Merged {len(todo)} file(s) into {output_path}: {report['pages']} pages, {report['size']} bytes")
+    return report
 
 if __name__ == "__main__":
-    merge_pdfs(sys.argv[1] if len(sys.argv) > 1 else '最终合并报销文件.pdf')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", nargs="?", default='最终合并报销文件.pdf')
+    parser.add_argument("--append", action="store_true", help="append new attachments to an existing merged file")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="sources per write of the output (0: write once)")
+    args = parser.parse_args()
+    merge_pdfs(args.output, args.append, args.batch_size)
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import pypdfium2 as pdfium
+from merge_all_pdfs import merge_pdfs
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestMergeAllPdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        os.makedirs('火车票')
+        os.makedirs('滴滴出行电子发票及行程报销单')
+        self.write_pdf('费用报销单.pdf', 500)
+        for n in range(5):
+            self.write_pdf(f'火车票/{n}.pdf', 100 + n)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def write_pdf(self, path, width):
+        # The page width tells the sources apart in the merged file
+        doc = pdfium.PdfDocument.new()
+        doc.new_page(width, 200)
+        doc.save(path)
+        doc.close()
+
+    def merge(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return merge_pdfs('out.pdf', **kwargs)
+
+    def widths(self):
+        doc = pdfium.PdfDocument('out.pdf')
+        widths = [round(doc[i].get_width()) for i in range(len(doc))]
+        doc.close()
+        return widths
+
+    def test_batches_give_the_same_document(self):
+        """Test merging in small batches keeps every page in merge order"""
+        self.merge(batch_size=0)
+        single = self.widths()
+        self.merge(batch_size=2)
+        self.assertEqual(self.widths(), single)
+        self.assertEqual(single, [500, 100, 101, 102, 103, 104])
+
+    def test_append_adds_only_new_files(self):
+        """Test append mode adds new attachments behind the merged ones"""
+        self.merge(batch_size=2)
+        self.write_pdf('滴滴出行电子发票及行程报销单/a.pdf', 300)
+        shutil.copy('火车票/4.pdf', '滴滴出行电子发票及行程报销单/copy.pdf')
+        report = self.merge(append=True, batch_size=2)
+        self.assertEqual(report['added'], 1)
+        self.assertEqual(self.widths(), [500, 100, 101, 102, 103, 104, 300])
+
+    def test_changed_cover_rebuilds(self):
+        """Test a changed 费用报销单.pdf is merged in front again instead of appended"""
+        self.merge()
+        self.write_pdf('费用报销单.pdf', 600)
+        report = self.merge(append=True)
+        self.assertEqual(report['added'], 6)
+        self.assertEqual(self.widths()[0], 600)
+        self.assertEqual(len(self.widths()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,12 +3,14 @@ import pandas as pd
 import os
 import sys
 import re
+from claim_index import DIDI_TRIP, INDEX_FILE, flag_claims, trip_fingerprint
+from ledger import LEDGER_FILE, record, trip_row
 
 def clean_text(text):
     if not text: return ""
     return str(text).replace('\n', ' ').strip()
 
-def process_didi_pdfs(input_dir, output_file):
+def process_didi_pdfs(input_dir, output_file, claim_index=INDEX_FILE, ledger_file=LEDGER_FILE):
     all_trips = []
     pdf_files = [f for f in os.listdir(input_dir) if f.endswith('.pdf') and '行程报销单' in f]
     for file_name in pdf_files:
@@ -41,7 +43,14 @@ def process_didi_pdfs(input_dir, output_file):
                             all_trips.append(clean_row + [file_name])
     if all_trips:
         columns = header + ["来源文件"] if header else None
-        pd.DataFrame(all_trips, columns=columns).to_excel(output_file, index=False)
+        df = pd.DataFrame(all_trips, columns=columns)
+        if columns:
+            fingerprints = [trip_fingerprint(t['上车时间'], t.get('金额[元]', ''), t.get('起点', ''), t.get('终点', '')) for t in df.to_dict('records')]
+            df['重复报销'] = flag_claims(DIDI_TRIP, list(zip(fingerprints, df['来源文件'])), claim_index)
+        record('didi_trips', [trip_row(t) for t in df.to_dict('records')] if columns else [], ledger_file)
+        df.to_excel(output_file, index=False)
+    else:
+        record('didi_trips', [], ledger_file)  # clear rows left by an earlier run
 
 if __name__ == "__main__":
     process_didi_pdfs(sys.argv[1], sys.argv[2])
@@ -0,0 +1,146 @@
+import bisect
+import csv
+import datetime
+import re
+import sys
+from collections import defaultdict
+from openpyxl import Workbook, load_workbook
+
+# Reconciles Didi trip receipts (滴滴行程明细汇总表.xlsx, one row per trip with its
+# 来源文件) against Didi invoices (滴滴电子发票汇总.xlsx). The CSV outputs of
+# Didi/extract_trip_receipts.py (trip_receipts.csv, source in 文件名) and
+# Didi/extract_invoice_amount.py (didi_invoices_extracted.csv) work too. Trips are indexed by
+# receipt (total, trip count, date range); each receipt is then matched to an
+# unused invoice with the same total (hash join on the amount in cents) dated
+# on or after its last trip, the earliest such invoice winning. Trips that show
+# up more than once are flagged as double claimed.
+
+TRIPS_FILE = '滴滴行程明细汇总表.xlsx'
+INVOICES_FILE = '滴滴电子发票汇总.xlsx'
+OUTPUT_FILE = '滴滴发票行程对账.xlsx'
+TRIP_KEY_COLUMNS = ('上车时间', '城市', '起点', '终点')
+
+def read_rows(path):
+    # Rows as dicts keyed by the header row, streamed without loading the sheet
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                if any(v not in (None, '') for v in row.values()):
+                    yield row
+        return
+    wb = load_workbook(path, read_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else '' for h in next(rows, [])]
+        for row in rows:
+            if any(v is not None and v != '' for v in row):
+                yield dict(zip(header, row))
+    finally:
+        wb.close()
+
+def to_cents(value):
+    # '=35.0', '¥1,234.50', 35 -> cents; None if not a number
+    try: return round(float(str(value).replace('=', '').replace('¥', '').replace(',', '').strip()) * 100)
+    except (TypeError, ValueError): return None
+
+def parse_invoice_date(value):
+    m = re.search(r'(\d{4})\D+(\d{1,2})\D+(\d{1,2})', str(value or ''))
+    return datetime.date(*map(int, m.groups())) if m else None
+
+def parse_trip_month_day(value):
+    # '11-09 08:25' -> (11, 9); '2025/11/9 8:25' (trip_receipts.csv) -> (11, 9).
+    # The year written by extract_trip_receipts.py is fixed, so it is ignored.
+    m = re.match(r'\s*(?:\d{4}/)?(\d{1,2})[-/](\d{1,2})', str(value or ''))
+    return (int(m.group(1)), int(m.group(2))) if m else None
+
+def trip_date(month_day, ref):
+    # Receipts omit the year: take the latest such day on or before ref
+    try:
+        d = datetime.date(ref.year, *month_day)
+        return d if d <= ref else datetime.date(ref.year - 1, *month_day)
+    except ValueError:  # 02-29 outside a leap year
+        return datetime.date(ref.year - 1, *month_day)
+
+def index_receipts(trips, ref):
+    # -> ({source file: receipt summary}, [double-claimed trips])
+    receipts, first_seen, duplicates = {}, {}, []
+    amount_col = None
+    for trip in trips:
+        if amount_col is None:
+            amount_col = next((c for c in trip if c.startswith('金额')), '金额')
+        source = trip.get('来源文件') or trip.get('文件名') or ''
+        cents = to_cents(trip.get(amount_col)) or 0
+        md = parse_trip_month_day(trip.get('上车时间'))
+        day = trip_date(md, ref) if md else None
+        r = receipts.get(source)
+        if r is None:
+            r = receipts[source] = {'source': source, 'trips': 0, 'cents': 0, 'first': day, 'last': day}
+        r['trips'] += 1
+        r['cents'] += cents
+        if day:
+            if r['first'] is None or day < r['first']: r['first'] = day
+            if r['last'] is None or day > r['last']: r['last'] = day
+        key = tuple(str(trip.get(c) or '') for c in TRIP_KEY_COLUMNS) + (cents,)
+        if key in first_seen: duplicates.append((key, first_seen[key], source))
+        else: first_seen[key] = source
+    return receipts, duplicates
+
+def match_invoices(receipts, invoices):
+    # -> ([(receipt, invoice)], unmatched receipts, unmatched invoices)
+    by_amount = defaultdict(list)  # cents -> [(date, n, invoice)] sorted by date
+    for n, inv in enumerate(invoices):
+        by_amount[inv['cents']].append((inv['date'] or datetime.date.min, n, inv))
+    for candidates in by_amount.values(): candidates.sort(key=lambda c: c[:2])
+    used = set()
+    pairs, unmatched = [], []
+    # Oldest receipts first, so earlier invoices go to earlier trips
+    for r in sorted(receipts.values(), key=lambda r: r['last'] or datetime.date.min):
+        candidates = by_amount.get(r['cents'], [])
+        i = bisect.bisect_left(candidates, (r['last'] or datetime.date.min, -1))
+        while i < len(candidates) and candidates[i][1] in used: i += 1
+        if i < len(candidates):
+            used.add(candidates[i][1])
+            pairs.append((r, candidates[i][2]))
+        else:
+            unmatched.append(r)
+    return pairs, unmatched, [inv for n, inv in enumerate(invoices) if n not in used]
+
+def load_invoices(path):
+    invoices = []
+    for row in read_rows(path):
+        invoices.append({'file': row.get('文件名') or '', 'cents': to_cents(row.get('金额')),
+                         'date': parse_invoice_date(row.get('开票日期')), 'date_text': row.get('开票日期') or ''})
+    return invoices
+
+def reconcile(trips_file=TRIPS_FILE, invoices_file=INVOICES_FILE, output_file=OUTPUT_FILE):
+    invoices = load_invoices(invoices_file)
+    # Trip years are inferred relative to the latest invoice
+    dates = [inv['date'] for inv in invoices if inv['date']]
+    receipts, duplicates = index_receipts(read_rows(trips_file), max(dates) if dates else datetime.date.today())
+    pairs, lone_receipts, lone_invoices = match_invoices(receipts, invoices)
+
+    fmt_md = lambda day: day.strftime('%m-%d') if day else ''
+    yuan = lambda cents: round(cents / 100, 2) if cents is not None else None
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '对账'
+    ws.append(['状态', '行程报销单', '行程数', '行程日期', '行程金额', '发票文件', '开票日期', '发票金额'])
+    for r, inv in pairs:
+        ws.append(['已匹配', r['source'], r['trips'], f"{fmt_md(r['first'])}~{fmt_md(r['last'])}", yuan(r['cents']), inv['file'], inv['date_text'], yuan(inv['cents'])])
+    for r in lone_receipts:
+        ws.append(['无对应发票', r['source'], r['trips'], f"{fmt_md(r['first'])}~{fmt_md(r['last'])}", yuan(r['cents']), '', '', None])
+    for inv in lone_invoices:
+        ws.append(['无对应行程', '', None, '', None, inv['file'], inv['date_text'], yuan(inv['cents'])])
+    ws_dup = wb.create_sheet('重复行程')
+    ws_dup.append(list(TRIP_KEY_COLUMNS) + ['金额', '首次出现', '重复出现'])
+    for key, first, again in duplicates:
+        ws_dup.append(list(key[:-1]) + [yuan(key[-1]), first, again])
+    wb.save(output_file)
+
+    print(f"Matched {len(pairs)} receipts to invoices; {len(lone_receipts)} receipts without invoice, "
+          f"{len(lone_invoices)} invoices without trips, {len(duplicates)} double-claimed trips -> {output_file}")
+    return not (lone_receipts or lone_invoices or duplicates)
+
+if __name__ == "__main__":
+    args = sys.argv[1:] + [TRIPS_FILE, INVOICES_FILE, OUTPUT_FILE][len(sys.argv) - 1:]
+    sys.exit(0 if reconcile(*args[:3]) else 1)
@@ -0,0 +1,88 @@
+import csv
+import datetime
+import os
+import tempfile
+import unittest
+from openpyxl import load_workbook
+from reconcile_didi import index_receipts, match_invoices, reconcile, trip_date
+
+
+def trip(source, time, amount, start='A', end='B'):
+    return {'来源文件': source, '上车时间': time, '城市': '北京市', '起点': start, '终点': end, '金额[元]': amount}
+
+def invoice(name, cents, date):
+    return {'file': name, 'cents': cents, 'date': date, 'date_text': str(date)}
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestReconcileDidi(unittest.TestCase):
+
+    def test_trip_date_uses_latest_year_before_reference(self):
+        """Test receipt dates without a year fall on or before the reference date"""
+        ref = datetime.date(2026, 1, 5)
+        self.assertEqual(trip_date((1, 2), ref), datetime.date(2026, 1, 2))
+        self.assertEqual(trip_date((12, 30), ref), datetime.date(2025, 12, 30))
+        self.assertEqual(trip_date((2, 29), datetime.date(2025, 3, 1)), datetime.date(2024, 2, 29))
+
+    def test_index_receipts_sums_trips_per_source(self):
+        """Test trips are totalled per receipt with their date range"""
+        trips = [trip('a.pdf', '12-30 08:00', '20.50'), trip('a.pdf', '01-02 09:00', 14.5, 'B', 'C')]
+        receipts, duplicates = index_receipts(trips, datetime.date(2026, 1, 5))
+        self.assertEqual(receipts['a.pdf']['trips'], 2)
+        self.assertEqual(receipts['a.pdf']['cents'], 3500)
+        self.assertEqual(receipts['a.pdf']['first'], datetime.date(2025, 12, 30))
+        self.assertEqual(receipts['a.pdf']['last'], datetime.date(2026, 1, 2))
+        self.assertEqual(duplicates, [])
+
+    def test_index_receipts_flags_repeated_trips(self):
+        """Test the same trip on two receipts is reported as double claimed"""
+        trips = [trip('a.pdf', '11-09 08:25', '23.50'), trip('b.pdf', '11-09 08:25', '23.5')]
+        _, duplicates = index_receipts(trips, datetime.date(2025, 12, 1))
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0][1:], ('a.pdf', 'b.pdf'))
+
+    def test_match_prefers_earliest_invoice_after_last_trip(self):
+        """Test a receipt takes the earliest unused invoice of its total dated after its trips"""
+        trips = [trip('a.pdf', '11-09 08:25', '35'), trip('b.pdf', '11-20 08:25', '35', 'C', 'D')]
+        receipts, _ = index_receipts(trips, datetime.date(2025, 12, 31))
+        invoices = [invoice('late.pdf', 3500, datetime.date(2025, 11, 25)),
+                    invoice('early.pdf', 3500, datetime.date(2025, 11, 10)),
+                    invoice('before.pdf', 3500, datetime.date(2025, 11, 1)),
+                    invoice('other.pdf', 1200, datetime.date(2025, 11, 10))]
+        pairs, lone_receipts, lone_invoices = match_invoices(receipts, invoices)
+        self.assertEqual([(r['source'], inv['file']) for r, inv in pairs], [('a.pdf', 'early.pdf'), ('b.pdf', 'late.pdf')])
+        self.assertEqual(lone_receipts, [])
+        self.assertEqual([inv['file'] for inv in lone_invoices], ['before.pdf', 'other.pdf'])
+
+    def test_match_reports_receipt_without_invoice(self):
+        """Test a receipt whose total has no invoice stays unmatched"""
+        receipts, _ = index_receipts([trip('a.pdf', '11-09 08:25', '35')], datetime.date(2025, 12, 31))
+        pairs, lone_receipts, lone_invoices = match_invoices(receipts, [invoice('x.pdf', 3600, datetime.date(2025, 11, 10))])
+        self.assertEqual(pairs, [])
+        self.assertEqual([r['source'] for r in lone_receipts], ['a.pdf'])
+        self.assertEqual(len(lone_invoices), 1)
+
+    def test_reconcile_reads_didi_csv_outputs(self):
+        """Test the CSVs of the Didi/ scripts reconcile like the workbooks"""
+        with tempfile.TemporaryDirectory() as tmp:
+            trips_file = os.path.join(tmp, 'trip_receipts.csv')
+            invoices_file = os.path.join(tmp, 'didi_invoices_extracted.csv')
+            output_file = os.path.join(tmp, 'out.xlsx')
+            with open(trips_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['文件名', '序号', '车型', '上车时间', '城市', '起点', '终点', '里程', '金额'])
+                writer.writerow(['滴滴出行行程报销单A.pdf', '1', '快车', '2025/12/30 8:05', '北京市', 'A', 'B', '3.2', '20.50'])
+                writer.writerow(['滴滴出行行程报销单A.pdf', '2', '快车', '2025/1/2 9:05', '北京市', 'B', 'C', '3.2', '14.50'])
+            with open(invoices_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['文件名', '开票日期', '金额', '购买方名称', '购买方识别号', '销售方名称', '销售方识别号'])
+                writer.writerow(['滴滴电子发票A.pdf', '2026年01月03日', '35.0', '未找到', '未找到', '未找到', '未找到'])
+
+            self.assertTrue(reconcile(trips_file, invoices_file, output_file))
+            rows = list(load_workbook(output_file)['对账'].iter_rows(values_only=True))
+            self.assertEqual(rows[1][:2], ('已匹配', '滴滴出行行程报销单A.pdf'))
+            self.assertEqual(rows[1][5], '滴滴电子发票A.pdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,8 +9,31 @@ import sys
 import subprocess
 import os
 import platform
+import posixpath
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
-from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+
+EXCEL_ERRORS = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
+# LibreOffice formula error codes and the Excel error each is saved as in
+# .xlsx; the other codes (Err:501, Err:502, ...) are saved as #N/A
+LIBREOFFICE_ERRORS = {503: '#NUM!', 519: '#VALUE!', 521: '#NULL!', 524: '#REF!', 525: '#NAME?', 532: '#DIV/0!',
+                      32767: '#N/A'}
+DEFAULT_PORT = 2002
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+SHEET_DATA = f'{{{MAIN_NS}}}sheetData'
+ROW = f'{{{MAIN_NS}}}row'
+CELL = f'{{{MAIN_NS}}}c'
+FORMULA = f'{{{MAIN_NS}}}f'
+VALUE = f'{{{MAIN_NS}}}v'
+INLINE_STRING = f'{{{MAIN_NS}}}is'
 
 
 def setup_libreoffice_macro():
@@ -100,65 +123,299 @@ def recalc(filename, timeout=30):
     
     # Check for Excel errors in the recalculated file - scan ALL cells
     try:
-        wb = load_workbook(filename, data_only=True)
-        
-        excel_errors = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
-        
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            # Check ALL rows and columns - no limits
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
-        
-        wb.close()
-        
-        # Build result summary
-        result = {
-            'status': 'success' if total_errors == 0 else 'errors_found',
-            'total_errors': total_errors,
-            'error_summary': {}
-        }
-        
-        # Add non-empty error categories
-        for err_type, locations in error_details.items():
-            if locations:
-                result['error_summary'][err_type] = {
-                    'count': len(locations),
-                    'locations': locations[:20]  # Show up to 20 locations
-                }
+        return scan_workbook(filename)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _sheet_parts(zf):
+    """Return (sheet name, zip member) pairs in workbook order"""
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels.iter(f'{{{PKG_REL_NS}}}Relationship'):
+        target = rel.get('Target')
+        target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = target
+    
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    return [(sheet.get('name'), targets[sheet.get(f'{{{DOC_REL_NS}}}id')])
+            for sheet in workbook.iter(f'{{{MAIN_NS}}}sheet')]
+
+
+def _match_error(text):
+    for err in EXCEL_ERRORS:
+        if err in text:
+            return err
+    return None
+
+
+def _shared_string_errors(zf):
+    """Map the index of each shared string containing an error token to that error"""
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return {}
+    matches = {}
+    index = 0
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f'{{{MAIN_NS}}}si':
+                err = _match_error(''.join(elem.itertext()))
+                if err:
+                    matches[index] = err
+                index += 1
+                elem.clear()
+    return matches
+
+
+def scan_workbook(filename):
+    """
+    Collect error cells and count formulas straight from the sheet XML parts
+    
+    Each worksheet part is streamed out of the zip with iterparse and every row
+    is dropped once read, so memory does not grow with the sheet size. Both the
+    error scan and the formula count happen in the same pass.
+    
+    Args:
+        filename: Path to Excel file
+    
+    Returns:
+        dict with error locations and counts
+    """
+    error_details = {err: [] for err in EXCEL_ERRORS}
+    formula_count = 0
+    
+    with zipfile.ZipFile(filename) as zf:
+        shared_errors = _shared_string_errors(zf)
+        for sheet_name, part in _sheet_parts(zf):
+            sheet_data = None
+            with zf.open(part) as f:
+                for event, elem in ET.iterparse(f, events=('start', 'end')):
+                    if event == 'start':
+                        if elem.tag == SHEET_DATA:
+                            sheet_data = elem
+                        continue
+                    if elem.tag == CELL:
+                        cell_type = elem.get('t')
+                        err = None
+                        if elem.find(FORMULA) is not None:
+                            formula_count += 1
+                        if cell_type == 's':
+                            value = elem.findtext(VALUE)
+                            err = shared_errors.get(int(value)) if value else None
+                        elif cell_type == 'inlineStr':
+                            inline = elem.find(INLINE_STRING)
+                            err = _match_error(''.join(inline.itertext())) if inline is not None else None
+                        elif cell_type in ('e', 'str'):
+                            err = _match_error(elem.findtext(VALUE) or '')
+                        if err:
+                            error_details[err].append(f"{sheet_name}!{elem.get('r')}")
+                    elif elem.tag == ROW and sheet_data is not None:
+                        sheet_data.remove(elem)
+    
+    return summarize_errors(error_details, formula_count)
+
+
+def summarize_errors(error_details, formula_count):
+    """
+    Build the JSON result from error locations and the formula count
+    
+    Args:
+        error_details: dict mapping each Excel error string to its cell locations
+        formula_count: Number of formula cells in the workbook
+    
+    Returns:
+        dict with status, totals and per-error summary
+    """
+    total_errors = sum(len(locations) for locations in error_details.values())
+    result = {
+        'status': 'success' if total_errors == 0 else 'errors_found',
+        'total_errors': total_errors,
+        'error_summary': {}
+    }
+    
+    # Add non-empty error categories
+    for err_type, locations in error_details.items():
+        if locations:
+            result['error_summary'][err_type] = {
+                'count': len(locations),
+                'locations': locations[:20]  # Show up to 20 locations
+            }
+    
+    result['total_formulas'] = formula_count
+    return result
+
+
+class RecalcServer:
+    """
+    Warm LibreOffice instance that recalculates workbooks over a UNO socket
+    
+    Connects to a soffice already listening on the port (for example one started
+    with `recalc.py --serve`) or launches one. Workbooks are loaded, recalculated,
+    stored and scanned inside that instance, so each file costs neither a soffice
+    start-up nor extra openpyxl loads.
+    """
+    
+    def __init__(self, port=DEFAULT_PORT, startup_timeout=60, launch=True, detach=False):
+        self.port = port
+        self.proc = None
+        self.detach = detach
+        self.desktop = self._resolve()
+        if self.desktop is None and launch:
+            self.proc = start_server(port, detach)
+            deadline = time.time() + startup_timeout
+            while self.desktop is None:
+                if self.proc.poll() is not None or time.time() > deadline:
+                    raise RuntimeError(f'LibreOffice did not start listening on port {port}')
+                time.sleep(0.25)
+                self.desktop = self._resolve()
+    
+    def _resolve(self):
+        import uno
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        try:
+            ctx = resolver.resolve(f'uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext')
+        except Exception:
+            return None
+        return ctx.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', ctx)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        # Only stop an instance this object launched; a --serve daemon keeps running
+        if self.proc is not None and not self.detach:
+            self.shutdown()
+    
+    def shutdown(self):
+        """Terminate the LibreOffice instance behind this connection"""
+        try:
+            self.desktop.terminate()
+        except Exception:
+            pass
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+    
+    def recalc(self, filename):
+        """
+        Recalculate formulas in Excel file and report any errors
         
-        # Add formula count for context - also check ALL cells
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str) and cell.value.startswith('='):
-                        formula_count += 1
-        wb_formulas.close()
+        Args:
+            filename: Path to Excel file
         
-        result['total_formulas'] = formula_count
+        Returns:
+            dict with error locations and counts, same shape as recalc()
+        """
+        if not Path(filename).exists():
+            return {'error': f'File {filename} does not exist'}
         
-        return result
+        import uno
+        from com.sun.star.beans import PropertyValue
         
-    except Exception as e:
-        return {'error': str(e)}
+        hidden = PropertyValue()
+        hidden.Name, hidden.Value = 'Hidden', True
+        try:
+            doc = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(Path(filename).absolute())), '_blank', 0, (hidden,))
+            try:
+                doc.calculateAll()
+                doc.store()
+                return scan_document(doc)
+            finally:
+                doc.close(True)
+        except Exception as e:
+            return {'error': str(e)}
+
+
+def scan_document(doc):
+    """
+    Collect error cells and count formulas of an open LibreOffice document in one pass
+    
+    Formula and text cells are walked once per sheet. As in scan_workbook, any
+    cell whose text contains an error token counts, whether it is a literal or
+    a formula result. Formula errors that LibreOffice shows as "Err:5xx" are
+    mapped to the Excel error they are saved as.
+    """
+    from com.sun.star.sheet.CellFlags import FORMULA, STRING
+    from com.sun.star.table.CellContentType import FORMULA as FORMULA_CELL
+    
+    error_details = {err: [] for err in EXCEL_ERRORS}
+    formula_count = 0
+    sheets = doc.Sheets
+    for i in range(sheets.Count):
+        sheet = sheets.getByIndex(i)
+        cells = sheet.queryContentCells(FORMULA | STRING).Cells.createEnumeration()
+        while cells.hasMoreElements():
+            cell = cells.nextElement()
+            code = 0
+            if cell.getType() == FORMULA_CELL:
+                formula_count += 1
+                code = cell.getError()
+            err = _match_error(cell.getString()) or (LIBREOFFICE_ERRORS.get(code, '#N/A') if code else None)
+            if err:
+                address = cell.CellAddress
+                location = f"{sheet.Name}!{get_column_letter(address.Column + 1)}{address.Row + 1}"
+                error_details[err].append(location)
+    return summarize_errors(error_details, formula_count)
+
+
+def start_server(port=DEFAULT_PORT, detach=False):
+    """
+    Launch a headless soffice listening for UNO connections on localhost
+    
+    Args:
+        port: TCP port to listen on
+        detach: If True, start it in its own session so it outlives this process
+    
+    Returns:
+        subprocess.Popen of the soffice process
+    """
+    profile = Path(tempfile.gettempdir()) / f'recalc-soffice-{port}'
+    cmd = [
+        'soffice', '--headless', '--invisible', '--norestore', '--nologo', '--nodefault',
+        f'-env:UserInstallation={profile.as_uri()}',
+        f'--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext',
+    ]
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=detach)
 
 
 def main():
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    port = DEFAULT_PORT
+    if '--port' in args:
+        i = args.index('--port')
+        port = int(args[i + 1])
+        del args[i:i + 2]
+    
+    if args[:1] == ['--serve']:
+        RecalcServer(port, detach=True)
+        print(json.dumps({'status': 'listening', 'port': port}))
+        return
+    
+    if args[:1] == ['--stop']:
+        server = RecalcServer(port, launch=False)
+        if server.desktop is not None:
+            server.shutdown()
+        print(json.dumps({'status': 'stopped', 'port': port}))
+        return
+    
+    if args[:1] == ['--daemon'] and len(args) > 1:
+        with RecalcServer(port) as server:
+            results = {filename: server.recalc(filename) for filename in args[1:]}
+        result = results[args[1]] if len(results) == 1 else results
+        print(json.dumps(result, indent=2))
+        return
+    
+    if len(args) < 1:
         print("Usage: python recalc.py <excel_file> [timeout_seconds]")
+        print("       python recalc.py --daemon <excel_file> [<excel_file> ...] [--port N]")
+        print("       python recalc.py --serve|--stop [--port N]")
         print("\nRecalculates all formulas in an Excel file using LibreOffice")
+        print("\n--daemon recalculates through a LibreOffice instance listening on a local")
+        print("socket (started with --serve, or launched for the duration of the call)")
         print("\nReturns JSON with error details:")
         print("  - status: 'success' or 'errors_found'")
         print("  - total_errors: Total number of Excel errors found")
@@ -167,8 +424,8 @@ def main():
         print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
         sys.exit(1)
     
-    filename = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    filename = args[0]
+    timeout = int(args[1]) if len(args) > 1 else 30
     
     result = recalc(filename, timeout)
     print(json.dumps(result, indent=2))